@@ -0,0 +1,185 @@
+"""
+Functions for measuring how pull, push and test scale with the size of an
+Aquarium instance.
+
+A synthetic instance is generated in a fake Aquarium server, and each
+benchmark runs against it in a separate process, so that its peak memory
+use is measured on its own.
+The benchmarks run in order on the same pfish directory: the pull writes
+the files that the pushes and tests use.
+For each benchmark the wall time, the number of HTTP requests, the bytes of
+request and response bodies, and the peak resident set size of the process
+are recorded.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import fake_aquarium
+
+# the size of the generated instance, by default
+DEFAULT_SIZE = {
+    'categories': 4,
+    'operation_types': 40,
+    'libraries': 8,
+    'sample_types': 4,
+    'field_types': 4,
+    'code_lines': 40,
+    'library_lines': 400
+}
+
+BENCHMARKS = ['pull', 'push_category', 'push_instance', 'run_tests']
+
+# the category pushed by the push_category benchmark
+PUSHED_CATEGORY = 'category_1'
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def edit_protocols(path):
+    """
+    Appends a line to every protocol file under path, so that a push has
+    code to upload.
+    """
+    for directory, _, file_names in os.walk(path):
+        if 'protocol.rb' in file_names:
+            with open(os.path.join(directory, 'protocol.rb'), 'a') as file:
+                file.write('# edited for benchmark\n')
+
+
+def run_benchmark(name, *, url, login, password, path, jobs):
+    """
+    Runs the named benchmark against the server at url.
+    Called in a fresh process for each benchmark.
+
+    Returns:
+        Dictionary with the wall time in seconds and the peak resident set
+        size in bytes
+    """
+    logging.basicConfig(level=logging.WARNING)
+    from pydent import AqSession
+    import category
+    import instance
+    from session import CachedSession
+
+    session = CachedSession(AqSession(login, password, url))
+
+    if name == 'pull':
+        def benchmark():
+            instance.pull(session=session, path=path, jobs=jobs)
+    elif name == 'push_category':
+        category_path = os.path.join(path, PUSHED_CATEGORY)
+        edit_protocols(category_path)
+
+        def benchmark():
+            category.push(session=session, path=category_path, jobs=jobs)
+    elif name == 'push_instance':
+        edit_protocols(path)
+
+        def benchmark():
+            instance.push(session=session, path=path, jobs=jobs)
+    elif name == 'run_tests':
+        def benchmark():
+            instance.run_tests(
+                session=session, path=path, jobs=jobs, use_cache=False)
+    else:
+        raise ValueError('Unknown benchmark {}'.format(name))
+
+    started = time.perf_counter()
+    benchmark()
+    return {
+        'wall_time': time.perf_counter() - started,
+        'peak_rss': peak_rss()
+    }
+
+
+def run(*, benchmarks=None, size=None, latency=0.0, jobs=1, path=None):
+    """
+    Generates a fake Aquarium instance and runs the benchmarks against it.
+
+    Arguments:
+        benchmarks (List): names of the benchmarks to run, in order; the
+                           pushes and tests need the files of a pull;
+                           by default, all of BENCHMARKS
+        size (Dictionary): arguments for fake_aquarium.generate_dataset,
+                           overriding DEFAULT_SIZE
+        latency (Float): seconds the server delays each request
+        jobs (Int): the number of items to pull, push, or test at once
+        path (String): the pfish directory to use; by default a temporary
+                       directory is created and removed
+
+    Returns:
+        Dictionary with the configuration and a result for each benchmark
+    """
+    size = dict(DEFAULT_SIZE, **(size or {}))
+    logging.info('Generating a fake instance with %s', size)
+    aquarium = fake_aquarium.generate_dataset(
+        fake_aquarium.FakeAquarium(latency=latency), **size)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='pfish-bench-') as temporary_path, \
+            fake_aquarium.running(aquarium) as url:
+        for name in benchmarks or BENCHMARKS:
+            aquarium.reset_stats()
+            with context.Pool(1) as pool:
+                measured = pool.apply(
+                    run_benchmark, (name,),
+                    dict(url=url, login=aquarium.login,
+                         password=aquarium.password,
+                         path=path or temporary_path, jobs=jobs))
+            stats = aquarium.stats()
+            result = {
+                'name': name,
+                'wall_time': round(measured['wall_time'], 4),
+                'requests': stats['requests'],
+                'bytes_sent': stats['bytes_received'],
+                'bytes_received': stats['bytes_sent'],
+                'peak_rss': measured['peak_rss'],
+                'requests_by_kind': stats['by_kind']
+            }
+            logging.info(
+                '%s: %.2f seconds, %d requests', name,
+                result['wall_time'], result['requests'])
+            results.append(result)
+
+    return {
+        'config': dict(size, latency=latency, jobs=jobs),
+        'python': platform.python_version(),
+        'results': results
+    }
+
+
+def print_results(report):
+    """Prints a table of the benchmark results."""
+    row_format = '{:<16}{:>10}{:>10}{:>12}{:>12}{:>10}'
+    print(row_format.format(
+        'Benchmark', 'Seconds', 'Requests', 'Sent KB', 'Received KB',
+        'RSS MB'))
+    for result in report['results']:
+        print(row_format.format(
+            result['name'],
+            '{:.2f}'.format(result['wall_time']),
+            result['requests'],
+            '{:.1f}'.format(result['bytes_sent'] / 1024),
+            '{:.1f}'.format(result['bytes_received'] / 1024),
+            '{:.1f}'.format(result['peak_rss'] / 2 ** 20)
+        ))
+
+
+def write_results(report, file_path):
+    """Writes the benchmark results as JSON to the file."""
+    with open(file_path, 'w') as file:
+        file.write(json.dumps(report, indent=2))
+    logging.info('Benchmark results written to %s', file_path)
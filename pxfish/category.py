@@ -3,11 +3,19 @@ Functions for retrieving categories
 """
 import logging
 import os
+import definition
+import journal
 import operation_type
 import library
+import manifest
 import object_type
 import sample_type
+import prefetch
+import protocol_test
+import result_cache
+import workers
 from paths import create_named_path
+from type_registry import TypeRegistry
 
 
 def is_category(path):
@@ -26,7 +34,8 @@ def is_category(path):
     return not set(entries).isdisjoint({'libraries', 'operation_types'})
 
 
-def pull(*, session, path, name):
+def pull(*, session, path, name, jobs: int = 1, incremental=False,
+         resume=False):
     """
     Retrieves all Libraries and Operation Types within a category.
 
@@ -34,6 +43,11 @@ def pull(*, session, path, name):
         session (Session Object): Aquarium session object
         path (String): the path where the files will be written
         name (String): the category name
+        jobs (Int): the number of operation types or libraries to write at once
+        incremental (Boolean): if set, only writes files that changed since
+                               the last pull
+        resume (Boolean): if set, skips the items completed by an
+                          interrupted pull
     """
     operation_types = session.OperationType.where({"category": name})
 
@@ -42,55 +56,368 @@ def pull(*, session, path, name):
     if not operation_types and not libraries:
         logging.error('Category %s was not found.', name)
 
-    for op_type in operation_types:
-        operation_type.write_files(session=session, path=path,
-                                   operation_type=op_type)
+    write_files(
+        session=session,
+        path=path,
+        operation_types=operation_types,
+        libraries=libraries,
+        jobs=jobs,
+        incremental=incremental,
+        resume=resume
+    )
 
-    for lib in libraries:
+
+def write_files(*, session, path, operation_types, libraries,
+                jobs: int = 1, incremental=False, resume=False):
+    """
+    Writes the files for the operation types and libraries to the path,
+    and records them in the manifest for the path.
+
+    The data for each batch of operation types and libraries is loaded in
+    bulk before its files are written.
+    Batches are taken from operation_types and libraries as they are needed,
+    and nothing is kept from a batch once it is written.
+    An error writing one operation type or library is reported at the end
+    and does not stop the others from being written.
+
+    Each associated sample type and object type is written once.
+
+    If incremental is set, the code versions for each batch are loaded first,
+    and only the operation types and libraries that differ from the manifest
+    are loaded in full and written.
+
+    Progress is recorded in a journal, and if resume is set, the items
+    completed by an interrupted pull are skipped before anything is loaded
+    for them.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        path (String): the path where the files will be written
+        operation_types (Iterable): the operation types to be written
+        libraries (Iterable): the libraries to be written
+        jobs (Int): the number of operation types or libraries to write at once
+        incremental (Boolean): if set, skips items unchanged since last pull
+        resume (Boolean): if set, skips items completed by an interrupted pull
+
+    Returns:
+        List of JobResult, one for each operation type and library
+    """
+    sync_manifest = manifest.Manifest.load(path)
+    pull_journal = journal.Journal.open(path, action='pull', resume=resume)
+    registry = TypeRegistry()
+
+    def operation_type_path(op_type):
+        return operation_type.local_path(path=path, operation_type=op_type)
+
+    def library_path(lib):
+        return library.local_path(path=path, library=lib)
+
+    def write_operation_type(op_type):
+        pull_journal.begin(
+            operation_type_path(op_type),
+            files=item_files(operation_type.all_component_names()))
+        operation_type.write_files(
+            session=session, path=path,
+            operation_type=op_type, registry=registry,
+            sync_manifest=sync_manifest)
+        operation_type.record(
+            sync_manifest=sync_manifest, path=path, operation_type=op_type)
+        pull_journal.complete(operation_type_path(op_type))
+
+    def write_library(lib):
+        pull_journal.begin(
+            library_path(lib),
+            files=item_files(library.get_component_names()))
         library.write_files(path=path, library=lib)
+        library.record(sync_manifest=sync_manifest, path=path, library=lib)
+        pull_journal.complete(library_path(lib))
 
+    def describe_operation_type(op_type):
+        return 'Operation Type {}/{}'.format(op_type.category, op_type.name)
+
+    def describe_library(lib):
+        return 'Library {}/{}'.format(lib.category, lib.name)
+
+    results = []
+    # the manifest is saved even if the run is interrupted, so that the
+    # items a resumed run skips as completed are recorded
+    try:
+        for batch in prefetch.batches(operation_types):
+            if resume:
+                batch = skip_current(
+                    items=batch,
+                    is_current=lambda op_type: pull_journal.is_completed(
+                        operation_type_path(op_type)),
+                    describe=describe_operation_type,
+                    results=results
+                )
+            prefetch.load_codes(
+                session=session,
+                parents=batch,
+                parent_class='OperationType',
+                component_names=operation_type.all_component_names()
+            )
+            if incremental:
+                batch = skip_current(
+                    items=batch,
+                    is_current=lambda op_type: operation_type.is_current(
+                        sync_manifest=sync_manifest,
+                        path=path,
+                        operation_type=op_type),
+                    describe=describe_operation_type,
+                    results=results
+                )
+            prefetch.load_field_types(session=session, operation_types=batch)
+            results.extend(workers.run_jobs(
+                items=batch,
+                function=write_operation_type,
+                describe=describe_operation_type,
+                jobs=jobs
+            ))
 
-def push(*, session, path):
+        # TODO: might need to add session back in if we add library tests
+        for batch in prefetch.batches(libraries):
+            if resume:
+                batch = skip_current(
+                    items=batch,
+                    is_current=lambda lib: pull_journal.is_completed(
+                        library_path(lib)),
+                    describe=describe_library,
+                    results=results
+                )
+            prefetch.load_libraries(
+                session=session,
+                libraries=batch,
+                component_names=library.get_component_names()
+            )
+            if incremental:
+                batch = skip_current(
+                    items=batch,
+                    is_current=lambda lib: library.is_current(
+                        sync_manifest=sync_manifest, path=path, library=lib),
+                    describe=describe_library,
+                    results=results
+                )
+            results.extend(workers.run_jobs(
+                items=batch,
+                function=write_library,
+                describe=describe_library,
+                jobs=jobs
+            ))
+    finally:
+        sync_manifest.save()
+    pull_journal.finish(failed=any(
+        result.status == workers.FAILED for result in results))
+    workers.report(results, action='pull')
+    return results
+
+
+def item_files(component_names):
+    """
+    Returns the names of the files written for an operation type or library
+    with the named code components.
+    """
+    return ['{}.rb'.format(name) for name in component_names] + [
+        'definition.json']
+
+
+def skip_current(*, items, is_current, describe, results):
     """
-    Finds all library and operation type files in a specific category.
+    Returns the items that are not current,
+    and adds a skipped result to results for each item that is.
+    """
+    changed = []
+    for item in items:
+        if is_current(item):
+            results.append(
+                workers.JobResult(describe(item), workers.SKIPPED, None, []))
+        else:
+            changed.append(item)
+    return changed
+
+
+def push(*, session, path, jobs: int = 1, resume=False):
+    """
+    Finds all library and operation type files in a specific category,
+    and pushes them to Aquarium.
 
     Arguments:
         session (Session Object): Aquarium session object
         path (String): the path the category
+        jobs (Int): the number of libraries or operation types to push at once
+        resume (Boolean): if set, skips the items completed by an
+                          interrupted push
+
+    Returns:
+        List of JobResult, one for each library and operation type
+    """
+    library_paths, operation_type_paths = find_entries(path)
+    return push_entries(
+        session=session,
+        library_paths=library_paths,
+        operation_type_paths=operation_type_paths,
+        name=os.path.basename(path),
+        jobs=jobs,
+        resume=resume
+    )
+
+
+def find_entries(path):
+    """
+    Finds the library and operation type directories in a category.
+
+    Files in the category, such as the test_summary.json written by a
+    category test, are skipped.
+
+    Arguments:
+        path (String): the path the category
+
+    Returns:
+        Tuple of lists of library paths and operation type paths
     """
+    library_paths = []
+    operation_type_paths = []
+
     if not is_category(path):
         logging.warning('No valid pfish category at %s', path)
-        return
-
-    category_entries = os.listdir(path)
+        return library_paths, operation_type_paths
 
-    for directory_entry in category_entries:
-        try:
-            files = os.listdir(os.path.join(path, directory_entry))
-        except NotADirectoryError:
-            logging.warning('%s is not a directory', directory_entry)
+    for directory_entry in sorted(os.listdir(path)):
+        entry_path = os.path.join(path, directory_entry)
+        if not os.path.isdir(entry_path):
+            logging.debug('Skipping file %s in %s', directory_entry, path)
             continue
+        files = sorted(os.listdir(entry_path))
 
         if directory_entry == 'libraries':
-            for name in files:
-                library.push(
-                    session=session,
-                    path=create_named_path(
-                        path, name, subdirectory='libraries')
-                )
+            library_paths.extend(
+                create_named_path(path, name, subdirectory='libraries')
+                for name in files)
         elif directory_entry == 'operation_types':
-            for name in files:
-                operation_type.push(
-                    session=session,
-                    path=create_named_path(
-                        path, name, subdirectory='operation_types')
-                )
+            operation_type_paths.extend(
+                create_named_path(path, name, subdirectory='operation_types')
+                for name in files)
         else:
             logging.warning('Unexpected directory entry %s in %s',
                             directory_entry, path)
 
+    return library_paths, operation_type_paths
+
+
+def push_entries(*, session, library_paths, operation_type_paths, name,
+                 jobs: int = 1, resume=False):
+    """
+    Pushes libraries and then operation types, and prints a table of
+    which were pushed, skipped, or failed.
+
+    All libraries are pushed before any operation type, so that operation
+    types using a library are pushed after the library code is current.
+
+    The pushed libraries and operation types are recorded in the manifest
+    of the pfish directory they are in.
+
+    Progress is recorded in a journal, and if resume is set, the items
+    completed by an interrupted push are skipped.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        library_paths (List): paths of the libraries to push
+        operation_type_paths (List): paths of the operation types to push
+        name (String): name of what is pushed, used in the report
+        jobs (Int): the number of libraries or operation types to push at once
+        resume (Boolean): if set, skips items completed by an interrupted push
+
+    Returns:
+        List of JobResult, one for each library and operation type
+    """
+    paths = library_paths + operation_type_paths
+    if not paths:
+        workers.report([], action='push')
+        report_code_updates([], name=name)
+        return []
+
+    root = manifest.item_root(paths[0])
+    sync_manifest = manifest.Manifest.load(root)
+    push_journal = journal.Journal.open(root, action='push', resume=resume)
+
+    def journaled(push_item):
+        def push_path(item_path):
+            push_journal.begin(item_path)
+            value = push_item(
+                session=session, path=item_path,
+                sync_manifest=sync_manifest) or False
+            push_journal.complete(item_path)
+            return value
+        return push_path
+
+    results = []
+    if resume:
+        library_paths = skip_current(
+            items=library_paths, is_current=push_journal.is_completed,
+            describe=describe_path, results=results)
+        operation_type_paths = skip_current(
+            items=operation_type_paths, is_current=push_journal.is_completed,
+            describe=describe_path, results=results)
+
+    # the manifest is saved even if the run is interrupted, so that the
+    # items a resumed run skips as completed are recorded
+    try:
+        results.extend(workers.run_jobs(
+            items=library_paths,
+            function=journaled(library.push),
+            describe=describe_path,
+            jobs=jobs
+        ))
+        results.extend(workers.run_jobs(
+            items=operation_type_paths,
+            function=journaled(operation_type.push),
+            describe=describe_path,
+            jobs=jobs
+        ))
+    finally:
+        sync_manifest.save()
+    push_journal.finish(failed=any(
+        result.status == workers.FAILED for result in results))
+
+    if results:
+        workers.print_table(results, details=describe_code_updates)
+    workers.report(results, action='push')
+    report_code_updates(
+        [result.value for result in results if result.value], name=name)
+    return results
+
+
+def describe_path(path):
+    """Returns the category/subdirectory/name form of an entry path."""
+    return '/'.join(os.path.normpath(path).split(os.sep)[-3:])
+
+
+def describe_code_updates(result):
+    """Returns a summary of the code updates in a push result."""
+    if not result.value:
+        return ''
+    return 'uploaded {}, unchanged {}'.format(
+        len(result.value.uploaded), len(result.value.skipped))
+
+
+def report_code_updates(updates, *, name):
+    """
+    Logs the number of code components uploaded and skipped.
+
+    Arguments:
+        updates (List): CodeUpdates for the pushed libraries and operation types
+        name (String): name of what was pushed, used in the log message
+    """
+    logging.info(
+        'Pushed %s: uploaded %d code components, skipped %d unchanged uploads',
+        name,
+        sum(len(update.uploaded) for update in updates),
+        sum(len(update.skipped) for update in updates)
+    )
+
 
-def run_tests(*, session, path, name, timeout: int = None):
+def run_tests(*, session, path, name, timeout: int = None, jobs: int = 1,
+              use_cache=True):
     """
     Runs tests for all library and operation type files in a specific category.
 
@@ -99,30 +426,95 @@ def run_tests(*, session, path, name, timeout: int = None):
         path (String): path to category
         name (String): name of the category to be tested
         timeout (Int): time (seconds) to wait for test result
+        jobs (Int): the number of tests to run at once
+        use_cache (Boolean): if not set, tests with unchanged inputs are
+                             run again
+
+    Returns:
+        List of JobResult, one for each operation type
     """
-    # TODO: another place to catch NotADirectoryError and other errors
-    category_entries = os.listdir(path)
-    for subdirectory_entry in category_entries:
-
-        if subdirectory_entry == 'libraries':
-            logging.warning('Tests not available for libraries')
-
-        elif subdirectory_entry == 'operation_types':
-            path = os.path.join(path, subdirectory_entry)
-            files = os.listdir(path)
-            for filename in files:
-                logging.info('Testing Operation Type %s', filename)
-                entry_path = os.path.join(path, filename)
-                operation_type.run_test(
-                    session=session,
-                    path=entry_path,
-                    category=name,
-                    name=filename,
-                    timeout=timeout
-                )
-        else:
-            logging.warning(
-                'Unexpected directory entry %s in %s',
-                subdirectory_entry,
-                path
-            )
+    library_paths, operation_type_paths = find_entries(path)
+    if library_paths:
+        logging.warning('Tests not available for libraries')
+
+    logging.info('Testing category %s', name)
+    return test_entries(
+        session=session,
+        operation_type_paths=operation_type_paths,
+        summary_path=path,
+        timeout=timeout,
+        jobs=jobs,
+        use_cache=use_cache
+    )
+
+
+def test_entries(*, session, operation_type_paths, summary_path,
+                 timeout: int = None, jobs: int = 1, use_cache=True):
+    """
+    Runs the tests for the operation types, keeping up to jobs tests running
+    at once.
+
+    The result of each test is reported as soon as it finishes, and a summary
+    of all results is written to the summary_path directory.
+    The test files pushed for each test are recorded in the manifest of the
+    pfish directory, which is saved once all tests have finished.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        operation_type_paths (List): paths of the operation types to test
+        summary_path (String): directory where the summary is written
+        timeout (Int): time (seconds) to wait for each test result
+        jobs (Int): the number of tests to run at once
+        use_cache (Boolean): if not set, tests with unchanged inputs are
+                             run again
+
+    Returns:
+        List of JobResult, one for each operation type
+    """
+    test_cache = None
+    sync_manifest = None
+    if operation_type_paths:
+        root = manifest.item_root(operation_type_paths[0])
+        sync_manifest = manifest.Manifest.load(root)
+        if use_cache:
+            test_cache = result_cache.ResultCache.load(root)
+
+    def run_test(operation_type_path):
+        definitions = definition.read(operation_type_path)
+        response = operation_type.run_test(
+            session=session,
+            path=operation_type_path,
+            category=definitions['category'],
+            name=definitions['name'],
+            timeout=timeout,
+            use_cache=use_cache,
+            test_cache=test_cache,
+            sync_manifest=sync_manifest
+        )
+        return response or False
+
+    finished = []
+
+    def report_test(result):
+        finished.append(result)
+        outcome = (protocol_test.outcome(result.value)
+                   if result.value else result.status)
+        logging.info(
+            '[%d/%d] %s: %s',
+            len(finished), len(operation_type_paths), result.name, outcome)
+
+    results = workers.run_jobs(
+        items=operation_type_paths,
+        function=run_test,
+        describe=describe_path,
+        jobs=jobs,
+        on_result=report_test
+    )
+
+    if sync_manifest:
+        sync_manifest.save()
+    if test_cache:
+        test_cache.save()
+    protocol_test.write_test_summary(path=summary_path, results=results)
+    workers.report(results, action='test')
+    return results
@@ -3,20 +3,29 @@ Functions for writing code to files, or creating code objects
 """
 import logging
 import os
+import profiler
+from collections import namedtuple
+
+from manifest import content_hash
+from writer import write_if_changed
+
+# uploaded and skipped are lists of component names, and codes has the new
+# Code object for each uploaded component
+CodeUpdates = namedtuple(
+    'CodeUpdates', ['uploaded', 'skipped', 'codes'], defaults=[None])
 
 
 def write(*, path, file_name, code_object):
     """
-    Writes the content of the aquarium code object to the given path.
+    Writes the content of the aquarium code object to the given path,
+    unless the file already has that content.
 
     Arguments:
       path (string): the path of the file to be written
       file_name (string): the name of the file to be written
       code_object (Code): the code object to be written
     """
-    file_path = os.path.join(path, file_name)
-    with open(file_path, 'w') as file:
-        file.write(code_object.content)
+    write_if_changed(os.path.join(path, file_name), code_object.content)
 
 
 def create_code_objects(*, session, component_names):
@@ -53,13 +62,28 @@ def add_default_content(name):
     return read(path=path, name=name)
 
 
+@profiler.profiled('update_code_objects', item='parent_object')
 def update_code_objects(component_names, parent_object, parent_class, user_id, session, path):
-    """Replaces text of existing code objects with newest versions"""
+    """
+    Replaces text of existing code objects with newest versions.
+
+    Components whose file content is identical to the current code in
+    Aquarium are not uploaded.
+
+    Returns:
+        CodeUpdates with the names of the uploaded and skipped components,
+        and the new code objects
+    """
+    updates = CodeUpdates(uploaded=[], skipped=[], codes={})
     for name in component_names:
         read_file = read(path=path, name=name)
         if read_file is None:
             logging.warning('Code Component File %s was not found', name)
-            return
+            return updates
+
+        if is_unchanged(parent_object=parent_object, name=name, content=read_file):
+            updates.skipped.append(name)
+            continue
 
         new_code = session.Code.new(
             name=name,
@@ -72,6 +96,29 @@ def update_code_objects(component_names, parent_object, parent_class, user_id, s
         logging.info('writing file %s to instance', parent_object.name)
 
         session.utils.update_code(new_code)
+        updates.uploaded.append(name)
+        updates.codes[name] = new_code
+
+    if updates.skipped:
+        logging.info(
+            'Skipped %d unchanged code components for %s',
+            len(updates.skipped), parent_object.name)
+    return updates
+
+
+def is_unchanged(*, parent_object, name, content):
+    """
+    Checks whether content matches the current named code object of the parent.
+
+    Arguments:
+        parent_object (OperationType or Library): the parent of the code
+        name (String): name of the code component
+        content (String): the local content of the component
+    """
+    code_object = parent_object.code(name)
+    if not code_object or code_object.content is None:
+        return False
+    return content_hash(code_object.content) == content_hash(content)
 
 
 def create_code_object(*, session, name, operation_type):
@@ -0,0 +1,300 @@
+"""
+Functions for running pfish commands in a long-lived server process.
+
+The server keeps its Aquarium sessions between commands, so that a command
+forwarded to it does not pay for starting Python, importing pydent, and
+logging in.
+Commands are sent over a Unix socket in the config directory, and are run
+one at a time in the directory the command was given in.
+
+Each message is a line of JSON.
+The client sends {"argv": [...], "cwd": "..."}, and the server replies with
+{"stdout": "..."} and {"stderr": "..."} messages as the command runs,
+followed by {"exit": status}.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+SOCKET_FILE = 'pfish.sock'
+
+# commands that are always run by the process they were given to,
+# including watch, which would keep the server from running other commands,
+# and bench, which measures the process it runs in
+LOCAL_COMMANDS = {'serve', 'configure', 'watch', 'bench'}
+
+
+def socket_path(path):
+    """Returns the path of the server socket for the config directory."""
+    return os.path.join(path, SOCKET_FILE)
+
+
+def should_forward(argv) -> bool:
+    """
+    Checks whether the command line arguments can be sent to a server.
+
+    Profiled commands are run locally, since the profile of a command is
+    kept for the process it runs in.
+
+    Arguments:
+        argv (List): the command line arguments, without the program name
+    """
+    if os.environ.get('PFISH_NO_DAEMON'):
+        return False
+    if '--profile' in argv:
+        return False
+    return bool(argv) and argv[0] not in LOCAL_COMMANDS
+
+
+def send_command(*, path, argv, cwd):
+    """
+    Runs the command in the server listening on the socket, and copies its
+    output to stdout and stderr.
+
+    Arguments:
+        path (String): the path of the server socket
+        argv (List): the command line arguments, without the program name
+        cwd (String): the directory to run the command in
+
+    Returns:
+        the exit status of the command,
+        or None if there is no server listening on the socket
+    """
+    if not os.path.exists(path):
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+
+    with client, client.makefile('rwb') as stream:
+        request = {'argv': list(argv), 'cwd': cwd}
+        stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        stream.flush()
+
+        for line in stream:
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+            if 'stdout' in message:
+                sys.stdout.write(message['stdout'])
+                sys.stdout.flush()
+            if 'stderr' in message:
+                sys.stderr.write(message['stderr'])
+                sys.stderr.flush()
+
+    logging.error('The pfish server closed the connection')
+    return 1
+
+
+class ClientStream:
+    """
+    A writable text stream that forwards what is written to a client as
+    messages of the given kind.
+
+    Writing is safe from multiple threads, so output from worker threads
+    is forwarded whole.
+    """
+
+    def __init__(self, wfile, kind, lock):
+        self.wfile = wfile
+        self.kind = kind
+        self.lock = lock
+
+    def write(self, text):
+        if not text:
+            return 0
+        message = json.dumps({self.kind: text}).encode('utf-8') + b'\n'
+        with self.lock:
+            try:
+                self.wfile.write(message)
+                self.wfile.flush()
+            except OSError:
+                # the client went away; let the command finish
+                pass
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+@contextlib.contextmanager
+def client_output(wfile):
+    """
+    Sends stdout, stderr, and log messages to the client while the
+    context is active.
+    """
+    lock = threading.Lock()
+    stdout = ClientStream(wfile, 'stdout', lock)
+    stderr = ClientStream(wfile, 'stderr', lock)
+
+    handler = logging.StreamHandler(stderr)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root_logger = logging.getLogger()
+    saved_handlers = root_logger.handlers[:]
+    root_logger.handlers = [handler]
+
+    try:
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            yield
+    finally:
+        root_logger.handlers = saved_handlers
+
+
+def run_request(*, request, run_command, wfile) -> int:
+    """
+    Runs a command sent by a client in the directory it was given in.
+
+    Arguments:
+        request (Dictionary): the command line arguments and directory
+        run_command (Function): runs a list of command line arguments
+        wfile (File): the connection to the client
+
+    Returns:
+        the exit status of the command
+    """
+    saved_cwd = os.getcwd()
+    status = 0
+    with client_output(wfile):
+        try:
+            os.chdir(request['cwd'])
+            run_command(request['argv'])
+        except SystemExit as error:
+            if error.code is None:
+                status = 0
+            elif isinstance(error.code, int):
+                status = error.code
+            else:
+                status = 1
+            if error.code and not isinstance(error.code, int):
+                print(error.code, file=sys.stderr)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            status = 1
+        finally:
+            os.chdir(saved_cwd)
+    return status
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Runs the command sent on a connection to the server."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            logging.warning('Ignoring malformed request: %r', line)
+            return
+
+        logging.info('Running pfish %s', ' '.join(request['argv']))
+        status = run_request(
+            request=request,
+            run_command=self.server.run_command,
+            wfile=self.wfile
+        )
+        try:
+            self.wfile.write(
+                json.dumps({'exit': status}).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Accepts commands on a Unix socket and runs them one at a time.
+    """
+
+    def __init__(self, path, run_command):
+        self.run_command = run_command
+        super().__init__(path, CommandHandler)
+
+
+def create_server(*, path, run_command):
+    """
+    Creates a server listening on the socket.
+
+    A socket left behind by a server that is no longer running is replaced.
+    The socket is only accessible by the user, since commands are run with
+    the user's Aquarium logins.
+
+    Arguments:
+        path (String): the path of the server socket
+        run_command (Function): runs a list of command line arguments
+
+    Returns:
+        the CommandServer
+
+    Raises:
+        ServerRunningError if another server is listening on the socket
+    """
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+        else:
+            raise ServerRunningError(path)
+        finally:
+            probe.close()
+
+    old_umask = os.umask(0o077)
+    try:
+        server = CommandServer(path, run_command)
+    finally:
+        os.umask(old_umask)
+    return server
+
+
+def serve(*, path, run_command):
+    """
+    Runs commands sent to the socket until interrupted or terminated.
+
+    Arguments:
+        path (String): the path of the server socket
+        run_command (Function): runs a list of command line arguments
+    """
+    server = create_server(path=path, run_command=run_command)
+    signal.signal(signal.SIGTERM, _interrupt)
+    logging.info('pfish is listening on %s', path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Stopping pfish server')
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class ServerRunningError(Exception):
+    """
+    Raised when starting a server on a socket that another server is
+    listening on.
+    """
+
+    def __init__(self, path):
+        self.socket_path = path
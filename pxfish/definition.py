@@ -4,6 +4,8 @@ import logging
 import os
 from typing import Dict
 
+from writer import write_json_if_changed
+
 
 def has_definition(path) -> bool:
     return 'definition.json' in os.listdir(path)
@@ -115,8 +117,7 @@ def write_definition_json(file_path, operation_type):
     ot_ser['on_the_fly'] = operation_type.on_the_fly
     ot_ser['user_id'] = operation_type.protocol.user_id
 
-    with open(file_path, 'w') as file:
-        file.write(json.dumps(ot_ser, indent=2))
+    write_json_if_changed(file_path, ot_ser)
 
 
 def write_library_definition_json(file_path, library):
@@ -133,8 +134,7 @@ def write_library_definition_json(file_path, library):
     library_ser['category'] = library.category
     library_ser['user_id'] = library.source.user_id
 
-    with open(file_path, 'w') as file:
-        file.write(json.dumps(library_ser, indent=2))
+    write_json_if_changed(file_path, library_ser)
 
 
 def read(path):
@@ -0,0 +1,299 @@
+"""
+Functions for finding the libraries that operation types and libraries use,
+and the operation types affected by changes to libraries.
+
+Protocol code names the libraries it uses with lines of the form
+
+    needs 'Category/Library Name'
+
+which are resolved to library directories in the same pfish directory.
+
+The needs of every operation type and library in a pfish directory are kept
+in an index file at its root.
+Only files whose size or modification time changed are read again when the
+index is updated.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import status
+
+from manifest import Manifest, find_root
+from paths import create_named_path
+from writer import write_if_changed
+
+INDEX_FILE = '.pfish_dependencies.json'
+
+# code files read for needs, for operation types and libraries
+CODE_FILES = ['protocol.rb', 'test.rb', 'source.rb']
+
+NEEDS_PATTERN = re.compile(
+    r'''^\s*needs\s*\(?\s*['"]([^'"]+)['"]''', re.MULTILINE)
+
+
+def parse_needs(source):
+    """
+    Returns the names of the libraries needed by the code,
+    in the Category/Library Name form, in the order they appear.
+    """
+    return [match.group(1) for match in NEEDS_PATTERN.finditer(source or '')]
+
+
+def library_path(*, root, name):
+    """
+    Returns the directory for the library named in a needs line.
+
+    Arguments:
+        root (String): the root of the pfish directory
+        name (String): the library, in the Category/Library Name form
+
+    Returns:
+        the path of the library directory, or None if the name has no category
+    """
+    category, separator, library_name = name.partition('/')
+    if not separator:
+        return None
+    return create_named_path(
+        create_named_path(root, category), library_name,
+        subdirectory='libraries')
+
+
+def read_needs(path, file_names):
+    """
+    Returns the libraries needed by the named code files in the directory.
+    Files that do not exist are skipped.
+    """
+    needs = []
+    for file_name in file_names:
+        try:
+            with open(os.path.join(path, file_name)) as file:
+                needs.extend(parse_needs(file.read()))
+        except FileNotFoundError:
+            continue
+    return needs
+
+
+def find_libraries(*, root, path, file_names):
+    """
+    Finds the libraries needed by the code files of an operation type or
+    library, including the libraries needed by those libraries.
+
+    Arguments:
+        root (String): the root of the pfish directory
+        path (String): the operation type or library directory
+        file_names (List): names of the code files to read
+
+    Returns:
+        Dictionary with the needed library names as keys, and the paths of
+        their directories as values, or None for libraries that are not in
+        the pfish directory
+    """
+    libraries = {}
+    pending = read_needs(path, file_names)
+    while pending:
+        name = pending.pop(0)
+        if name in libraries:
+            continue
+
+        needed_path = library_path(root=root, name=name)
+        if not needed_path or not os.path.isfile(
+                os.path.join(needed_path, 'source.rb')):
+            logging.debug('Library %s is not in %s', name, root)
+            libraries[name] = None
+            continue
+
+        libraries[name] = needed_path
+        pending.extend(read_needs(needed_path, ['source.rb']))
+    return libraries
+
+
+def index_file_path(root):
+    return os.path.join(root, INDEX_FILE)
+
+
+def file_signature(file_path):
+    """Returns the size and modification time of the file, or None."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_operation_type_key(key) -> bool:
+    return key.split('/')[-2:-1] == ['operation_types']
+
+
+class DependencyIndex:
+    """
+    The libraries needed by each operation type and library in a pfish
+    directory.
+
+    Entries are keyed by the path of the item directory relative to the
+    root, and hold the needs of the item and the signatures of the code
+    files they were read from.
+    """
+
+    def __init__(self, root, items=None):
+        self.root = root
+        self.items = items or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root):
+        """
+        Reads the index for the directory at root.
+        Returns an empty index if there is none.
+        """
+        file_path = index_file_path(root)
+        try:
+            with open(file_path) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(root)
+        except json.JSONDecodeError as error:
+            logging.warning(
+                'Ignoring unreadable dependency index %s: %s', file_path, error)
+            return cls(root)
+
+        return cls(root, data.get('items', {}))
+
+    def save(self):
+        """Writes the index to the root directory, unless it is unchanged."""
+        with self._lock:
+            data = {'items': self.items}
+            write_if_changed(
+                index_file_path(self.root),
+                json.dumps(data, indent=2, sort_keys=True))
+
+    def key(self, path) -> str:
+        """Returns the index key for the directory at path."""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def update(self):
+        """
+        Brings the index up to date with the files in the pfish directory,
+        reading only the code files that changed since they were indexed.
+
+        Returns:
+            the number of items whose needs were read again
+        """
+        found = {}
+        updated = 0
+        for item_path in status.find_items(self.root):
+            if not os.path.isdir(item_path):
+                continue
+            key = self.key(item_path)
+            signatures = {
+                file_name: file_signature(os.path.join(item_path, file_name))
+                for file_name in CODE_FILES
+            }
+            entry = self.items.get(key)
+            if not entry or entry['files'] != signatures:
+                entry = {
+                    'files': signatures,
+                    'needs': read_needs(item_path, CODE_FILES)
+                }
+                updated += 1
+            found[key] = entry
+
+        with self._lock:
+            self.items = found
+        return updated
+
+    def library_key(self, name):
+        """
+        Returns the index key of the library named in a needs line,
+        or None if the name has no category.
+        """
+        path = library_path(root=self.root, name=name)
+        return self.key(path) if path else None
+
+    def dependents(self):
+        """
+        Returns a dictionary with library keys as keys, and the sets of keys
+        of the items that need each library as values.
+        """
+        dependents = {}
+        for key, entry in self.items.items():
+            for name in entry['needs']:
+                dependents.setdefault(self.library_key(name), set()).add(key)
+        return dependents
+
+    def affected(self, library_keys):
+        """
+        Finds the operation types that need the libraries, directly or
+        through other libraries.
+
+        Arguments:
+            library_keys (Iterable): index keys of the libraries
+
+        Returns:
+            sorted list of the index keys of the affected operation types
+        """
+        dependents = self.dependents()
+        seen = set()
+        pending = list(library_keys)
+        while pending:
+            key = pending.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            pending.extend(dependents.get(key, ()))
+        return sorted(key for key in seen if is_operation_type_key(key))
+
+
+def find_affected(*, path, library=None, changed=False):
+    """
+    Finds the operation types to test after changes to libraries.
+
+    Arguments:
+        path (String): the pfish directory, or a directory within it
+        library (String): a library, either in the Category/Library Name
+                          form of a needs line or as a path to its directory;
+                          the operation types that need it are selected
+        changed (Boolean): if set, the operation types changed since the last
+                           pull or push, and those that need libraries
+                           changed since then, are selected
+
+    Returns:
+        sorted list of the paths of the selected operation types,
+        or None if they cannot be found
+    """
+    root = find_root(path) or path
+    index = DependencyIndex.load(root)
+    updated = index.update()
+    index.save()
+    logging.info('Updated the needs of %d items in the dependency index',
+                 updated)
+
+    keys = set()
+    if library:
+        if os.path.isdir(library):
+            library_key = index.key(os.path.abspath(library))
+        else:
+            library_key = index.library_key(library)
+        if library_key not in index.items:
+            logging.error('No library %s in %s', library, root)
+            return None
+        keys.add(library_key)
+
+    if changed:
+        if not find_root(path):
+            logging.error(
+                'No pfish manifest found at or above %s. Pull the files first.',
+                path)
+            return None
+        changes = status.compare(
+            sync_manifest=Manifest.load(root), path=root)
+        keys.update(
+            key for state, key in changes
+            if state in (status.MODIFIED, status.NEW) and key in index.items)
+
+    return [
+        os.path.join(root, *key.split('/'))
+        for key in index.affected(keys)
+    ]
@@ -0,0 +1,283 @@
+"""
+Functions for showing what a push would change in Aquarium,
+without changing anything.
+"""
+
+import difflib
+import logging
+import os
+import definition
+import field_type
+import library
+import operation_type
+import prefetch
+import workers
+
+from category import describe_path
+
+CREATE = 'create'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+
+def find_remote(*, interface, definitions):
+    """
+    Retrieves the Aquarium objects named in the definitions,
+    one query per batch of definitions.
+
+    Arguments:
+        interface (QueryInterface): session.OperationType or session.Library
+        definitions (List): definitions of operation types or libraries
+
+    Returns:
+        Dictionary with (category, name) keys and Aquarium objects as values
+    """
+    remote = {}
+    for batch in prefetch.batches(definitions):
+        keys = {(item['category'], item['name']) for item in batch}
+        models = interface.where({
+            'category': sorted({category for category, _ in keys}),
+            'name': sorted({name for _, name in keys})
+        }) or []
+        for model in models:
+            key = (model.category, model.name)
+            if key in keys:
+                remote[key] = model
+    return remote
+
+
+def read_local(path, file_name):
+    """Returns the content of the file in path, or None if there is none."""
+    try:
+        with open(os.path.join(path, file_name)) as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def diff_code(*, key, file_name, remote, local):
+    """
+    Returns the lines of a unified diff from the Aquarium code to the
+    local file.
+
+    Arguments:
+        key (String): the category/subdirectory/name of the item
+        file_name (String): the name of the code file
+        remote (String): the code in Aquarium, or None if there is none
+        local (String): the content of the local file
+    """
+    lines = []
+    for line in difflib.unified_diff(
+            (remote or '').splitlines(keepends=True),
+            local.splitlines(keepends=True),
+            fromfile='aquarium/{}/{}'.format(key, file_name),
+            tofile='local/{}/{}'.format(key, file_name)):
+        if line.endswith('\n'):
+            lines.append(line)
+        else:
+            lines.append(line + '\n')
+            lines.append('\\ No newline at end of file\n')
+    return lines
+
+
+def diff_field_types(*, aquarium_field_types, definitions):
+    """
+    Compares the field types of an operation type in Aquarium with those in
+    its definition file.
+
+    Arguments:
+        aquarium_field_types (List): Field Types retrieved from Aquarium
+        definitions (Dictionary): the definition of the operation type
+
+    Returns:
+        Tuple of a list of lines describing each difference, and whether
+        any difference would stop the push unless it is forced
+    """
+    lines = []
+    blocking = False
+    for role, local_types in [('input', definitions['inputs']),
+                              ('output', definitions['outputs'])]:
+        remote_types = [
+            aquarium_field_type for aquarium_field_type in aquarium_field_types
+            if aquarium_field_type.role == role
+        ]
+        missing_locally, conflicts, _ = field_type.check_for_conflicts(
+            aquarium_field_types=remote_types,
+            definitions=local_types
+        )
+
+        for name in sorted(missing_locally):
+            lines.append('{} "{}": only in Aquarium'.format(role, name))
+        for name, details in sorted(conflicts.items()):
+            for detail, (remote_value, local_value) in sorted(details.items()):
+                lines.append(
+                    '{} "{}": field "{}": aquarium value {!r}, local value {!r}'
+                    .format(role, name, detail, remote_value, local_value))
+        blocking = blocking or bool(missing_locally or conflicts)
+
+        remote_names = {remote_type.name for remote_type in remote_types}
+        for local_type in local_types:
+            if local_type['name'] not in remote_names:
+                lines.append('{} "{}": only in local definition'.format(
+                    role, local_type['name']))
+
+    return lines, blocking
+
+
+def diff_item(*, path, definitions, model, component_names, force=False):
+    """
+    Prints the differences between a local operation type or library and
+    its Aquarium object.
+
+    Arguments:
+        path (String): the operation type or library directory
+        definitions (Dictionary): the definition of the item
+        model (OperationType or Library): the Aquarium object, or None if
+                                          there is none
+        component_names (List): names of the code components
+        force (Boolean): whether field type conflicts would be overridden
+
+    Returns:
+        JobResult with the status and a description of the changes
+    """
+    key = describe_path(path)
+    codes = {}
+    if model:
+        codes = prefetch.loaded_codes(
+            parent=model, component_names=component_names)
+
+    changes = []
+    for name in component_names:
+        file_name = '{}.rb'.format(name)
+        local = read_local(path, file_name)
+        if local is None:
+            changes.append('{} missing'.format(file_name))
+            continue
+
+        code = codes.get(name)
+        lines = diff_code(
+            key=key,
+            file_name=file_name,
+            remote=code.content if code else None,
+            local=local
+        )
+        if lines:
+            print(''.join(lines), end='')
+            changes.append(file_name)
+
+    # as in a push, field types are only checked for an operation type
+    # whose definition has inputs or outputs
+    if model and definitions.get('parent_class') == 'OperationType' \
+            and definition.has_field_types(definitions):
+        lines, blocking = diff_field_types(
+            aquarium_field_types=model.field_types or [],
+            definitions=definitions
+        )
+        if lines:
+            print('definition.json: {}'.format(key))
+            for line in lines:
+                print('  ' + line)
+            changes.append('definition.json')
+        if blocking and not force:
+            changes.append('field type conflicts, not pushed without --force')
+
+    if not model:
+        return workers.JobResult(key, CREATE, None, [], ', '.join(changes))
+    if not changes:
+        return workers.JobResult(key, UNCHANGED, None, [], '')
+    return workers.JobResult(key, CHANGED, None, [], ', '.join(changes))
+
+
+def read_definitions(paths, results):
+    """
+    Returns the (path, definition) pairs for the paths whose definition can
+    be read, and adds a failed result to results for those that cannot.
+    """
+    entries = []
+    for path in paths:
+        try:
+            entries.append((path, definition.read(path)))
+        except (OSError, ValueError) as error:
+            results.append(workers.JobResult(
+                describe_path(path), workers.FAILED, error, []))
+    return entries
+
+
+def show(*, session, library_paths, operation_type_paths, force=False):
+    """
+    Prints diffs of the code and field types that pushing the libraries and
+    operation types would change, followed by a summary table.
+    Nothing is pushed.
+
+    The Aquarium objects, code, and field types for the items are retrieved
+    in bulk.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        library_paths (List): paths of the libraries to compare
+        operation_type_paths (List): paths of the operation types to compare
+        force (Boolean): whether the push would override field type conflicts
+
+    Returns:
+        List of JobResult, one for each library and operation type
+    """
+    results = []
+
+    entries = read_definitions(library_paths, results)
+    remote = find_remote(
+        interface=session.Library,
+        definitions=[definitions for _, definitions in entries])
+    component_names = library.get_component_names()
+    for batch in prefetch.batches(entries):
+        prefetch.load_libraries(
+            session=session,
+            libraries=[
+                remote[(item['category'], item['name'])]
+                for _, item in batch
+                if (item['category'], item['name']) in remote],
+            component_names=component_names
+        )
+        for path, definitions in batch:
+            results.append(diff_item(
+                path=path,
+                definitions=definitions,
+                model=remote.get((definitions['category'], definitions['name'])),
+                component_names=component_names
+            ))
+
+    entries = read_definitions(operation_type_paths, results)
+    remote = find_remote(
+        interface=session.OperationType,
+        definitions=[definitions for _, definitions in entries])
+    component_names = operation_type.all_component_names()
+    for batch in prefetch.batches(entries):
+        prefetch.load_operation_types(
+            session=session,
+            operation_types=[
+                remote[(item['category'], item['name'])]
+                for _, item in batch
+                if (item['category'], item['name']) in remote],
+            component_names=component_names
+        )
+        for path, definitions in batch:
+            results.append(diff_item(
+                path=path,
+                definitions=definitions,
+                model=remote.get((definitions['category'], definitions['name'])),
+                component_names=component_names,
+                force=force
+            ))
+
+    if results:
+        workers.print_table(results, details=lambda result: result.value)
+
+    counts = {
+        status: sum(1 for result in results if result.status == status)
+        for status in [CREATE, CHANGED, UNCHANGED, workers.FAILED]
+    }
+    logging.info(
+        'Dry run: %d to create, %d changed, %d unchanged, %d unreadable. '
+        'Nothing was pushed.',
+        counts[CREATE], counts[CHANGED], counts[UNCHANGED],
+        counts[workers.FAILED])
+    return results
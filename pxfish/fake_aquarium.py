@@ -0,0 +1,628 @@
+"""
+A fake Aquarium server for measuring and testing pfish without an Aquarium
+instance or a network.
+
+The server keeps its records in memory, and answers the requests pydent
+makes for pfish: logging in, JSON queries for the operation type, library,
+code, field type, sample type, object type and user models, creating
+operation types, libraries, sample types and object types, updating field
+types and code, and running tests.
+
+Each request can be delayed by a fixed latency, to model a remote instance,
+and the server counts the requests and bytes it handles.
+
+    aquarium = FakeAquarium(latency=0.01)
+    generate_dataset(aquarium, categories=2, operation_types=20)
+    with running(aquarium) as url:
+        ...
+
+The server can also be run on its own, with a generated dataset:
+
+    python fake_aquarium.py --port 3001 --operation-types 200
+"""
+
+import argparse
+import contextlib
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOGIN = 'neptune'
+PASSWORD = 'aquarium'
+
+TOKEN_COOKIE = 'remember_token_aquarium'
+
+OPERATION_TYPE_COMPONENTS = [
+    'protocol', 'precondition', 'cost_model', 'documentation', 'test']
+
+# the controllers that code is updated through, and the parent class of
+# their code
+CODE_CONTROLLERS = {
+    'operation_types': 'OperationType',
+    'libraries': 'Library'
+}
+
+PASSED = {'result': 'passed', 'log': [], 'backtrace': []}
+
+
+class FakeAquarium:
+    """
+    The records and request statistics of a fake Aquarium instance.
+
+    Records are dictionaries of column values, kept in lists by model name.
+    All methods are safe to call from the server threads.
+    """
+
+    def __init__(self, *, latency=0.0, login=LOGIN, password=PASSWORD):
+        self.latency = latency
+        self.login = login
+        self.password = password
+        self.records = {}
+        self.tokens = set()
+        self.test_results = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self.add('User', login=login, name='Neptune')
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clears the request counts."""
+        with self._lock:
+            self.request_count = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.requests = Counter()
+
+    def count_request(self, *, kind, received, sent):
+        """Counts a handled request of the kind, and its sizes in bytes."""
+        with self._lock:
+            self.request_count += 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+            self.requests[kind] += 1
+
+    def stats(self):
+        """Returns the request counts as a dictionary."""
+        with self._lock:
+            return {
+                'requests': self.request_count,
+                'bytes_received': self.bytes_received,
+                'bytes_sent': self.bytes_sent,
+                'by_kind': dict(self.requests)
+            }
+
+    def add(self, model, **values):
+        """Adds a record of the model and returns it."""
+        with self._lock:
+            now = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+            record = dict(values)
+            record['id'] = self._next_id
+            record.setdefault('created_at', now)
+            record['updated_at'] = now
+            self._next_id += 1
+            self.records.setdefault(model, []).append(record)
+            return record
+
+    def update(self, model, record_id, **values):
+        """Changes the values of a record and returns it."""
+        with self._lock:
+            record = self.find(model, record_id)
+            record.update(values)
+            record['updated_at'] = time.strftime(
+                '%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+            return record
+
+    def find(self, model, record_id):
+        """Returns the record of the model with the id, or None."""
+        with self._lock:
+            for record in self.records.get(model, []):
+                if record['id'] == record_id:
+                    return record
+        return None
+
+    def where(self, model, criteria=None, *, offset=-1, limit=-1,
+              reverse=False):
+        """
+        Returns the records of the model that match the criteria, in the way
+        of an Aquarium JSON query.
+
+        A list of values matches any of the values, and None matches a
+        missing value.
+        """
+        with self._lock:
+            records = [
+                record for record in self.records.get(model, [])
+                if matches(record, criteria or {})
+            ]
+        records.sort(key=lambda record: record['id'], reverse=bool(reverse))
+        if offset is not None and offset > 0:
+            records = records[offset:]
+        if limit is not None and limit >= 0:
+            records = records[:limit]
+        return records
+
+    def remove(self, model, records):
+        """Removes the records of the model."""
+        ids = {record['id'] for record in records}
+        with self._lock:
+            self.records[model] = [
+                record for record in self.records.get(model, [])
+                if record['id'] not in ids
+            ]
+
+    def add_code(self, *, parent_class, parent_id, name, content):
+        """
+        Adds a new version of the named code of a parent, replacing the
+        current version, and returns it.
+        """
+        with self._lock:
+            current = self.where('Code', {
+                'parent_class': parent_class, 'parent_id': parent_id,
+                'name': name, 'child_id': None})
+            code = self.add(
+                'Code', parent_class=parent_class, parent_id=parent_id,
+                name=name, content=content, user_id=self.user_id(),
+                child_id=None)
+            for previous in current:
+                previous['child_id'] = code['id']
+            return code
+
+    def user_id(self):
+        return self.where('User', {'login': self.login})[0]['id']
+
+    def add_field_types(self, *, parent_class, parent_id, field_types):
+        """
+        Replaces the field types of a parent with those described,
+        adding the allowable field types named by sample and object type.
+        """
+        with self._lock:
+            self.remove('FieldType', self.where(
+                'FieldType',
+                {'parent_class': parent_class, 'parent_id': parent_id}))
+            for field_type in field_types or []:
+                values = {
+                    key: value for key, value in field_type.items()
+                    if key not in ('id', 'rid', 'allowable_field_types',
+                                   'parent_class', 'parent_id')
+                    and not isinstance(value, (dict, list))
+                }
+                record = self.add(
+                    'FieldType', parent_class=parent_class,
+                    parent_id=parent_id, **values)
+                for aft in field_type.get('allowable_field_types') or []:
+                    self.add(
+                        'AllowableFieldType',
+                        field_type_id=record['id'],
+                        sample_type_id=self.type_id('SampleType', aft),
+                        object_type_id=self.type_id('ObjectType', aft))
+
+    def type_id(self, model, allowable_field_type):
+        """
+        Returns the id of the sample or object type of an allowable field
+        type, given by id or by name.
+        """
+        key = 'sample_type' if model == 'SampleType' else 'object_type'
+        if allowable_field_type.get(key + '_id'):
+            return allowable_field_type[key + '_id']
+        name = (allowable_field_type.get(key) or {}).get('name')
+        records = self.where(model, {'name': name}) if name else []
+        return records[0]['id'] if records else None
+
+    def with_field_types(self, model, record):
+        """
+        Returns the record with its field types and their allowable field
+        types nested, as Aquarium returns saved operation and sample types.
+        """
+        field_types = []
+        for field_type in self.where(
+                'FieldType',
+                {'parent_class': model, 'parent_id': record['id']}):
+            field_types.append(dict(
+                field_type,
+                allowable_field_types=self.where(
+                    'AllowableFieldType',
+                    {'field_type_id': field_type['id']})))
+        return dict(record, field_types=field_types)
+
+
+def matches(record, criteria) -> bool:
+    """Checks whether the record matches the JSON query criteria."""
+    for key, value in criteria.items():
+        if isinstance(value, list):
+            if record.get(key) not in value:
+                return False
+        elif record.get(key) != value:
+            return False
+    return True
+
+
+def generate_dataset(aquarium, *, categories=1, operation_types=10,
+                     libraries=2, sample_types=2, field_types=2,
+                     code_lines=40, library_lines=None):
+    """
+    Adds a synthetic set of operation types, libraries, sample types and
+    object types to the fake Aquarium.
+
+    The operation types and libraries are spread evenly over the categories.
+    Each operation type has its code, and field types that allow the sample
+    and object types, and its protocol needs the first library of its
+    category.
+
+    Arguments:
+        aquarium (FakeAquarium): the fake Aquarium to add records to
+        categories (Int): the number of categories
+        operation_types (Int): the number of operation types
+        libraries (Int): the number of libraries
+        sample_types (Int): the number of sample types, each with an
+                            object type
+        field_types (Int): the number of field types of each operation type
+        code_lines (Int): the number of lines of each code component
+        library_lines (Int): the number of lines of each library source,
+                             if different from code_lines
+    """
+    type_names = []
+    for index in range(1, sample_types + 1):
+        sample_type = aquarium.add(
+            'SampleType', name='Sample Type {}'.format(index),
+            description='Generated sample type {}'.format(index))
+        aquarium.add_field_types(
+            parent_class='SampleType', parent_id=sample_type['id'],
+            field_types=[{'name': 'Length', 'ftype': 'number',
+                          'required': False, 'array': False, 'choices': None}])
+        object_type = aquarium.add(
+            'ObjectType', name='Container {}'.format(index),
+            description='Generated container {}'.format(index),
+            min=0, max=1, handler='sample_container', safety='', cleanup='',
+            data='', vendor='', unit='each', cost=0.01, release_method='return',
+            release_description='', image='', prefix='', rows=None,
+            columns=None, sample_type_id=sample_type['id'])
+        type_names.append((sample_type['name'], object_type['name']))
+
+    def category(index):
+        return 'Category {}'.format(index % max(categories, 1) + 1)
+
+    def code(label, lines=code_lines):
+        return '\n'.join(
+            ['# {}'.format(label)]
+            + ['# line {} of generated code'.format(line)
+               for line in range(lines - 1)]) + '\n'
+
+    first_library = {}
+    for index in range(1, libraries + 1):
+        name = 'Library {}'.format(index)
+        library = aquarium.add(
+            'Library', name=name, category=category(index - 1))
+        first_library.setdefault(library['category'], name)
+        aquarium.add_code(
+            parent_class='Library', parent_id=library['id'], name='source',
+            content=code('module Library{}'.format(index),
+                         library_lines or code_lines))
+
+    for index in range(1, operation_types + 1):
+        operation_type = aquarium.add(
+            'OperationType', name='Operation Type {}'.format(index),
+            category=category(index - 1), deployed=True, on_the_fly=False)
+        needs = first_library.get(operation_type['category'])
+        for name in OPERATION_TYPE_COMPONENTS:
+            content = code('{} of {}'.format(name, operation_type['name']))
+            if name == 'protocol' and needs:
+                content = "needs '{}/{}'\n{}".format(
+                    operation_type['category'], needs, content)
+            aquarium.add_code(
+                parent_class='OperationType', parent_id=operation_type['id'],
+                name=name, content=content)
+        aquarium.add_field_types(
+            parent_class='OperationType',
+            parent_id=operation_type['id'],
+            field_types=[
+                {
+                    'name': 'Field {}'.format(number),
+                    'role': 'input' if number % 2 else 'output',
+                    'ftype': 'sample', 'array': False, 'part': False,
+                    'routing': 'R{}'.format(number), 'preferred_operation_type_id': None,
+                    'preferred_field_type_id': None, 'choices': None,
+                    'allowable_field_types': [
+                        {'sample_type': {'name': sample_type_name},
+                         'object_type': {'name': object_type_name}}
+                        for sample_type_name, object_type_name in type_names
+                    ]
+                }
+                for number in range(1, field_types + 1)
+            ])
+    return aquarium
+
+
+class FakeAquariumHandler(BaseHTTPRequestHandler):
+    """Answers a request to the fake Aquarium."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    @property
+    def aquarium(self):
+        return self.server.aquarium
+
+    def do_GET(self):
+        self.handle_request('get')
+
+    def do_POST(self):
+        self.handle_request('post')
+
+    def do_PUT(self):
+        self.handle_request('put')
+
+    def handle_request(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        path = self.path.split('?')[0].strip('/')
+        if self.aquarium.latency:
+            time.sleep(self.aquarium.latency)
+
+        try:
+            data = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            data = {}
+
+        cookies = {}
+        if path == 'sessions.json':
+            kind = 'login'
+            status, response, cookies = self.login(data)
+        elif not self.is_signed_in():
+            kind = 'rejected'
+            status, response = 401, {'errors': ['not signed in']}
+        else:
+            kind, status, response = route(
+                self.aquarium, method=method, path=path, data=data)
+
+        content = json.dumps(response).encode('utf-8')
+        # counted before responding, so that a client that has its response
+        # sees the request in the stats
+        self.aquarium.count_request(
+            kind=kind, received=len(body), sent=len(content))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in cookies.items():
+            self.send_header('Set-Cookie', '{}={}; Path=/'.format(name, value))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def login(self, data):
+        session = data.get('session', {})
+        if (session.get('login') != self.aquarium.login
+                or session.get('password') != self.aquarium.password):
+            return 401, {'error': 'Invalid login or password'}, {}
+
+        token = uuid.uuid4().hex
+        with self.aquarium._lock:
+            self.aquarium.tokens.add(token)
+        user = self.aquarium.where('User', {'login': self.aquarium.login})[0]
+        return 200, user, {TOKEN_COOKIE: token}
+
+    def is_signed_in(self) -> bool:
+        for cookie in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = cookie.strip().partition('=')
+            if name == TOKEN_COOKIE and value in self.aquarium.tokens:
+                return True
+        return False
+
+
+def route(aquarium, *, method, path, data):
+    """
+    Answers a request from a signed in client.
+
+    Returns:
+        Tuple of the kind of request, for counting, the HTTP status,
+        and the JSON response
+    """
+    if path == 'json' and method == 'post':
+        return json_query(aquarium, data)
+
+    if path == 'json/save' and method == 'post':
+        model = data.pop('model', {}).get('model')
+        return 'save', 200, save(aquarium, model, data)
+
+    match = re.fullmatch(r'(operation_types|libraries)/code', path)
+    if match and method == 'post':
+        code = aquarium.add_code(
+            parent_class=CODE_CONTROLLERS[match.group(1)],
+            parent_id=data.get('id'),
+            name=data.get('name'),
+            content=data.get('content'))
+        return 'update code', 200, code
+
+    match = re.fullmatch(r'operation_types/(\d+)(\.json)?', path)
+    if match and method == 'put':
+        return 'update operation type', 200, update_operation_type(
+            aquarium, int(match.group(1)), data)
+
+    if path == 'operation_types.json' and method == 'post':
+        return 'create operation type', 200, create_operation_type(
+            aquarium, data)
+
+    if path == 'libraries.json' and method == 'post':
+        return 'create library', 200, create_library(aquarium, data)
+
+    if path == 'sample_types.json' and method == 'post':
+        return 'create sample type', 200, create_sample_type(
+            aquarium, data.get('sample_type', data))
+
+    if path == 'object_types.json' and method == 'post':
+        return 'create object type', 200, save(aquarium, 'ObjectType', data)
+
+    match = re.fullmatch(r'test/run/(\d+)', path)
+    if match and method == 'get':
+        operation_type_id = int(match.group(1))
+        if not aquarium.find('OperationType', operation_type_id):
+            return 'test', 404, {'errors': ['operation type not found']}
+        return 'test', 200, aquarium.test_results.get(
+            operation_type_id, PASSED)
+
+    return 'unknown', 404, {'errors': ['no route for {} {}'.format(
+        method.upper(), path)]}
+
+
+def json_query(aquarium, data):
+    """Answers a query of the JSON API."""
+    model = data.get('model')
+    if isinstance(model, dict):
+        model = model.get('model')
+    kind = '{}.{}'.format(model, data.get('method') or 'find')
+
+    if 'id' in data and not data.get('method'):
+        record = aquarium.find(model, data['id'])
+        if not record:
+            return kind, 422, {'errors': ['{} {} not found'.format(
+                model, data['id'])]}
+        return kind, 200, record
+
+    options = data.get('options') or {}
+    method = data.get('method')
+    if method == 'find_by_name':
+        records = aquarium.where(model, {'name': data['arguments'][0]})
+        return kind, 200, records[0] if records else None
+
+    if method in ('where', 'all'):
+        criteria = data.get('arguments') if method == 'where' else {}
+        return kind, 200, aquarium.where(
+            model, criteria or {},
+            offset=options.get('offset', -1),
+            limit=options.get('limit', -1),
+            reverse=options.get('reverse', False))
+
+    return kind, 422, {'errors': ['unsupported method {}'.format(method)]}
+
+
+def columns(data):
+    """Returns the scalar values of a request body, without ids."""
+    return {
+        key: value for key, value in data.items()
+        if key not in ('id', 'rid') and not isinstance(value, (dict, list))
+    }
+
+
+def save(aquarium, model, data):
+    """Creates or updates a record from a request body."""
+    if data.get('id') and aquarium.find(model, data['id']):
+        return aquarium.update(model, data['id'], **columns(data))
+    return aquarium.add(model, **columns(data))
+
+
+def create_operation_type(aquarium, data):
+    """Creates an operation type with its code and field types."""
+    operation_type = aquarium.add('OperationType', **columns(data))
+    for name in OPERATION_TYPE_COMPONENTS:
+        aquarium.add_code(
+            parent_class='OperationType', parent_id=operation_type['id'],
+            name=name, content=(data.get(name) or {}).get('content', ''))
+    aquarium.add_field_types(
+        parent_class='OperationType', parent_id=operation_type['id'],
+        field_types=data.get('field_types'))
+    return aquarium.with_field_types('OperationType', operation_type)
+
+
+def update_operation_type(aquarium, operation_type_id, data):
+    """Replaces the field types of an operation type."""
+    operation_type = aquarium.update(
+        'OperationType', operation_type_id, **columns(data))
+    aquarium.add_field_types(
+        parent_class='OperationType', parent_id=operation_type_id,
+        field_types=data.get('field_types'))
+    return aquarium.with_field_types('OperationType', operation_type)
+
+
+def create_library(aquarium, data):
+    """Creates a library with its source code."""
+    library = aquarium.add('Library', **columns(data))
+    aquarium.add_code(
+        parent_class='Library', parent_id=library['id'], name='source',
+        content=(data.get('source') or {}).get('content', ''))
+    return library
+
+
+def create_sample_type(aquarium, data):
+    """Creates a sample type with its field types."""
+    sample_type = aquarium.add('SampleType', **columns(data))
+    aquarium.add_field_types(
+        parent_class='SampleType', parent_id=sample_type['id'],
+        field_types=data.get('field_types'))
+    return aquarium.with_field_types('SampleType', sample_type)
+
+
+class FakeAquariumServer(ThreadingHTTPServer):
+    """An HTTP server for a fake Aquarium."""
+
+    daemon_threads = True
+
+    def __init__(self, aquarium, address):
+        self.aquarium = aquarium
+        super().__init__(address, FakeAquariumHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+
+@contextlib.contextmanager
+def running(aquarium, *, host='127.0.0.1', port=0):
+    """
+    Runs a server for the fake Aquarium in a background thread while the
+    context is active.
+
+    Arguments:
+        aquarium (FakeAquarium): the fake Aquarium to serve
+        host (String): the address to listen on
+        port (Int): the port to listen on; by default a free port is chosen
+
+    Yields:
+        the url of the server
+    """
+    server = FakeAquariumServer(aquarium, (host, port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.url
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main():
+    """Runs a fake Aquarium with a generated dataset until interrupted."""
+    parser = argparse.ArgumentParser(
+        description='Run a fake Aquarium server with generated records')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to delay each request')
+    parser.add_argument('--categories', type=int, default=1)
+    parser.add_argument('--operation-types', type=int, default=10)
+    parser.add_argument('--libraries', type=int, default=2)
+    args = parser.parse_args()
+
+    aquarium = generate_dataset(
+        FakeAquarium(latency=args.latency),
+        categories=args.categories,
+        operation_types=args.operation_types,
+        libraries=args.libraries)
+    server = FakeAquariumServer(aquarium, (args.host, args.port))
+    print('Fake Aquarium at {} (login {}, password {})'.format(
+        server.url, aquarium.login, aquarium.password))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Functions for checking which operation types and libraries in a pfish
+directory are behind Aquarium, without writing any files.
+
+The current code versions are found with one Code query for each batch of
+operation types or libraries.
+Aquarium's JSON API cannot limit a query to some columns, so these queries
+return the content of every current code component: a fetch downloads about
+as much code as a pull, but makes no per-item requests and writes nothing.
+"""
+
+import logging
+import library
+import manifest
+import operation_type
+import prefetch
+import status
+
+# changed on Aquarium since the last pull or push
+STALE = 'stale'
+# changed on Aquarium and in the pfish directory
+CONFLICT = 'conflict'
+# on Aquarium, but never pulled
+NEW = 'new'
+# pulled, but no longer on Aquarium
+DELETED = 'deleted'
+
+
+def check(*, session, path, category=None):
+    """
+    Prints the operation types and libraries that changed on Aquarium since
+    they were last pulled or pushed.
+
+    Only the operation type and library records and their current code
+    versions are retrieved, in a few bulk queries, and no files are written.
+    The code queries return the code content as well as the versions, so
+    the data transferred grows with the size of the code checked.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        path (String): the pfish directory or a directory within it
+        category (String): the category to check; if not given, the whole
+                           instance is checked
+
+    Returns:
+        List of (state, key) pairs for the changed items,
+        or None if there is no manifest for the path
+    """
+    root = manifest.find_root(path)
+    if not root:
+        logging.error(
+            'No pfish manifest found at or above %s. Pull the files first.',
+            path)
+        return None
+
+    if category:
+        operation_types = session.OperationType.where({'category': category})
+        libraries = session.Library.where({'category': category})
+    else:
+        operation_types = session.OperationType.all()
+        libraries = session.Library.all()
+
+    changes = compare(
+        session=session,
+        sync_manifest=manifest.Manifest.load(root),
+        operation_types=operation_types or [],
+        libraries=libraries or [],
+        category=category
+    )
+    status.print_changes(changes, empty='Up to date with Aquarium')
+    return changes
+
+
+def compare(*, session, sync_manifest, operation_types, libraries,
+            category=None):
+    """
+    Compares the operation types and libraries on Aquarium with the manifest.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        sync_manifest (Manifest): the manifest for the pfish directory
+        operation_types (List): the operation types on Aquarium
+        libraries (List): the libraries on Aquarium
+        category (String): the category that was retrieved, or None if the
+                           whole instance was
+
+    Returns:
+        List of (state, key) pairs, sorted by key
+    """
+    items = []
+    for batch in prefetch.batches(operation_types):
+        component_names = operation_type.all_component_names()
+        prefetch.load_codes(
+            session=session,
+            parents=batch,
+            parent_class='OperationType',
+            component_names=component_names
+        )
+        for op_type in batch:
+            items.append((
+                operation_type.local_path(
+                    path=sync_manifest.root, operation_type=op_type),
+                op_type,
+                prefetch.loaded_codes(
+                    parent=op_type, component_names=component_names)
+            ))
+
+    for batch in prefetch.batches(libraries):
+        component_names = library.get_component_names()
+        prefetch.load_libraries(
+            session=session,
+            libraries=batch,
+            component_names=component_names
+        )
+        for lib in batch:
+            items.append((
+                library.local_path(path=sync_manifest.root, library=lib),
+                lib,
+                prefetch.loaded_codes(
+                    parent=lib, component_names=component_names)
+            ))
+
+    changes = []
+    found = set()
+    for item_path, model, codes in items:
+        key = sync_manifest.key(item_path)
+        found.add(key)
+
+        entry = sync_manifest.get(item_path)
+        if not entry:
+            changes.append((NEW, key))
+        elif not sync_manifest.is_synced(item_path, model=model, codes=codes):
+            if entry['files'] != status.current_files(item_path):
+                changes.append((CONFLICT, key))
+            else:
+                changes.append((STALE, key))
+
+    for key, entry in sync_manifest.items.items():
+        if entry['parent_class'] not in ('OperationType', 'Library'):
+            continue
+        if category and entry['category'] != category:
+            continue
+        if key not in found:
+            changes.append((DELETED, key))
+
+    return sorted(changes, key=lambda change: change[1])
+
+
+def is_behind(changes) -> bool:
+    """Checks whether any of the changes would be overwritten by a push."""
+    return any(state in (STALE, CONFLICT) for state, _ in changes or [])
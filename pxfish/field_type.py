@@ -1,14 +1,45 @@
 """Functions for Creating Field Types and Allowable Field Types"""
 
 import logging
+import threading
+import prefetch
+import profiler
 import sample_type
 import object_type
 from definition import (
         serialize_field_types
         )
 
+# serializes checks for missing types, so that concurrent pushes
+# do not create the same Sample or Object Type twice
+_create_types_lock = threading.Lock()
 
-def build_field_type_list(*, operation_type, definitions, force=False, session):
+
+def get_field_types(*, session, operation_type):
+    """
+    Retrieves all Field Types of an Operation Type in a single query,
+    along with their AFTs and Sample and Object Types
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        operation_type (Operation Type): parent object
+
+    Returns:
+        List of Field Types
+    """
+    aquarium_field_types = session.FieldType.where(
+        {
+            'parent_id': operation_type.id,
+            'parent_class': 'OperationType'
+        }
+    ) or []
+    prefetch.load_allowable_field_types(
+        session=session, field_types=aquarium_field_types)
+    return aquarium_field_types
+
+
+def build_field_type_list(*, operation_type, definitions, force=False,
+                          session, aquarium_field_types=None):
     """
     Creates a list of Field Type objects to add to Operation Type
 
@@ -16,18 +47,30 @@ def build_field_type_list(*, operation_type, definitions, force=False, session):
         operation_type (Operation Type): parent object
         definitions (Dictionary): data about field types
         session (Session Object): Aquarium session object
+        aquarium_field_types (List): the Operation Type's Field Types in
+                                     Aquarium, retrieved if not given
 
     Returns:
         List of Field Types
     """
+    if aquarium_field_types is None:
+        aquarium_field_types = get_field_types(
+            session=session, operation_type=operation_type)
+
+    existing_types = {}
+    for aquarium_field_type in aquarium_field_types:
+        existing_types.setdefault(
+            (aquarium_field_type.role, aquarium_field_type.name),
+            aquarium_field_type)
 
     field_types = []
     # TODO: Simplify this so it's not so repetative
     for field_type_definition in definitions['inputs']:
         field_types.append(
             build_field_type(
-                operation_type=operation_type,
                 definition=field_type_definition,
+                existing_field_type=existing_types.get(
+                    ('input', field_type_definition['name'])),
                 role='input',
                 force=force,
                 session=session
@@ -37,8 +80,9 @@ def build_field_type_list(*, operation_type, definitions, force=False, session):
     for field_type_definition in definitions['outputs']:
         field_types.append(
             build_field_type(
-                operation_type=operation_type,
                 definition=field_type_definition,
+                existing_field_type=existing_types.get(
+                    ('output', field_type_definition['name'])),
                 role='output',
                 force=force,
                 session=session)
@@ -47,33 +91,26 @@ def build_field_type_list(*, operation_type, definitions, force=False, session):
     return field_types
 
 
-def build_field_type(*, operation_type, definition, role=None, force=False, session):
+def build_field_type(*, definition, existing_field_type=None, role=None,
+                     force=False, session):
     """
-    Retrieves or Creates Field Type Objects
+    Updates an existing Field Type Object or Creates a new one
 
     Arguments:
-        operation_type (Operation Type): parent object
         definition (Dictionary): data about field types
+        existing_field_type (Field Type): the matching Field Type in Aquarium,
+                                          if there is one
         role (String): input or output
-        path (String): path to operation type
         session (Session Object): Aquarium session object
 
     Returns:
         Field Type object
     """
-    query = {
-        'name': definition['name'],
-        'parent_id': operation_type.id,
-        'role': role,
-    }
-
-    aquarium_field_type = session.FieldType.where(query)
-
-    if aquarium_field_type:
-        field_type = aquarium_field_type[0]
+    if existing_field_type:
+        field_type = existing_field_type
 
         if force:
-            aquarium_field_type = update(
+            update(
                 definition=definition,
                 role=role,
                 field_type=field_type
@@ -175,7 +212,18 @@ def check_sample_and_object_types(*, session, path, sample_object_pairs):
     smpl_types = {aft['sample_type'] for aft in sample_object_pairs}
     obj_types = {aft['object_type'] for aft in sample_object_pairs}
 
-    for smpl_type in smpl_types:
+    with _create_types_lock:
+        create_missing_types(
+            session=session,
+            path=path,
+            sample_types=smpl_types,
+            object_types=obj_types
+        )
+
+
+def create_missing_types(*, session, path, sample_types, object_types):
+    """Creates the named Sample and Object Types that are not in Aquarium"""
+    for smpl_type in sample_types:
         if not sample_type.exists(session=session, sample_type=smpl_type):
             sample_type.create(
                 session=session,
@@ -183,7 +231,7 @@ def check_sample_and_object_types(*, session, path, sample_object_pairs):
                 path=path
             )
 
-    for obj_type in obj_types:
+    for obj_type in object_types:
         if not object_type.exists(session=session, object_type=obj_type):
             object_type.create(
                 session=session,
@@ -256,7 +304,8 @@ def check_for_conflicts(*, aquarium_field_types, definitions):
     return (types_missing_locally, conflicts, new_types)
 
 
-def types_valid(*, operation_type, definitions, session):
+@profiler.profiled('types_valid', item='operation_type')
+def types_valid(*, operation_type, definitions, session, aquarium_field_types=None):
     """
     Compares an Operation Type's Field Types to those in the Definitions file
     Reports conflicts to user
@@ -265,11 +314,15 @@ def types_valid(*, operation_type, definitions, session):
         operation_type (Operation Type): parent object
         definitions (Dictionary): data about field types
         session (Session Object): Aquarium session object
+        aquarium_field_types (List): the Operation Type's Field Types in
+                                     Aquarium, retrieved if not given
 
     Returns:
         bool (type validity)
     """
-    aquarium_field_types = session.FieldType.where({'parent_id': operation_type.id})
+    if aquarium_field_types is None:
+        aquarium_field_types = get_field_types(
+            session=session, operation_type=operation_type)
 
     missing_inputs, input_conflicts, valid_inputs = check_for_conflicts(
         aquarium_field_types=[t for t in aquarium_field_types if t.role == 'input'],
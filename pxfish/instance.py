@@ -7,49 +7,61 @@ import definition
 import library
 import operation_type
 import object_type
+import prefetch
 import sample_type
 
 from category import is_category
 
 
-def pull(*, session, path):
+def pull(*, session, path, jobs: int = 1, incremental=False, resume=False):
     """
     Pulls OperationType and/or Library files from the Aquarium instance.
 
+    Operation types and libraries are retrieved a page at a time, and each
+    page is written before the next is retrieved, so memory use does not
+    grow with the size of the instance.
+
     Arguments:
         session (Session Object): Aquarium session object
         path (String): the path where the files will be written
+        jobs (Int): the number of operation types or libraries to write at once
+        incremental (Boolean): if set, only writes files that changed since
+                               the last pull
+        resume (Boolean): if set, skips the items completed by an
+                          interrupted pull
     """
-    operation_types = session.OperationType.all()
-    libraries = session.Library.all()
-
-    for op_type in operation_types:
-        operation_type.write_files(
-            session=session,
-            path=path,
-            operation_type=op_type)
-
-    # TODO: might need to add session back in if we add library tests
-    for lib in libraries:
-        library.write_files(path=path, library=lib)
-
-
-def push(*, session, path):
+    category.write_files(
+        session=session,
+        path=path,
+        operation_types=prefetch.paginate(session.OperationType),
+        libraries=prefetch.paginate(session.Library),
+        jobs=jobs,
+        incremental=incremental,
+        resume=resume
+    )
+
+
+def push(*, session, path, jobs: int = 1, resume=False):
     """
     Pushes all files in directory to instance.
 
     If the path isn't a directory, returns.
 
+    Libraries in all categories are pushed before operation types.
+
     Arguments:
         session (Session): Aquarium session object
         path (String): path to directory
+        jobs (Int): the number of libraries or operation types to push at once
+        resume (Boolean): if set, skips the items completed by an
+                          interrupted push
     """
     if not os.path.isdir(path):
         logging.warning('Path %s is not a directory. Cannot push', path)
         return
 
     if is_category(path):
-        category.push(session=session, path=path)
+        category.push(session=session, path=path, jobs=jobs, resume=resume)
         return
 
     if definition.has_definition(path):
@@ -60,27 +72,56 @@ def push(*, session, path):
             library.push(session=session, path=path)
         return
 
-    categories = os.listdir(path)
-
-    dir_entries = [entry for entry in categories
-                   if os.path.isdir(os.path.join(path, entry))]
-    if not dir_entries:
+    library_paths, operation_type_paths = find_entries(path)
+    if not library_paths and not operation_type_paths:
         logging.warning('Nothing to push in path %s', path)
         return
 
-    for entry in dir_entries:
-        # TODO: account for errors coming back from category
+    category.push_entries(
+        session=session,
+        library_paths=library_paths,
+        operation_type_paths=operation_type_paths,
+        name=path,
+        jobs=jobs,
+        resume=resume
+    )
+
+
+def find_entries(path):
+    """
+    Finds the library and operation type directories in all categories
+    in the directory.
+
+    Arguments:
+        path (String): path to directory
+
+    Returns:
+        Tuple of lists of library paths and operation type paths
+    """
+    library_paths = []
+    operation_type_paths = []
+    for entry in sorted(os.listdir(path)):
         entry_path = os.path.join(path, entry)
-        category.push(session=session, path=entry_path)
+        if os.path.isdir(entry_path) and is_category(entry_path):
+            entry_libraries, entry_operation_types = category.find_entries(
+                entry_path)
+            library_paths.extend(entry_libraries)
+            operation_type_paths.extend(entry_operation_types)
+    return library_paths, operation_type_paths
 
 
-def run_tests(*, session, path, timeout: int = None):
+def run_tests(*, session, path, timeout: int = None, jobs: int = 1,
+              use_cache=True):
     """
     Runs tests on all operation types in directory
 
     Arguments:
         session (Session): Aquarium session object
         path (String): path to directory
+        timeout (Int): time (seconds) to wait for each test result
+        jobs (Int): the number of tests to run at once
+        use_cache (Boolean): if not set, tests with unchanged inputs are
+                             run again
     """
     if not os.path.isdir(path):
         logging.warning(
@@ -96,7 +137,8 @@ def run_tests(*, session, path, timeout: int = None):
                 path=path,
                 category=def_dict['category'],
                 name=def_dict['name'],
-                timeout=timeout
+                timeout=timeout,
+                use_cache=use_cache
             )
         elif definition.is_library(def_dict):
             library.run_test(
@@ -114,11 +156,13 @@ def run_tests(*, session, path, timeout: int = None):
             session=session,
             path=path,
             name=name,
-            timeout=timeout
+            timeout=timeout,
+            jobs=jobs,
+            use_cache=use_cache
         )
         return
 
-    entries = os.listdir(path)
+    entries = sorted(os.listdir(path))
     dir_entries = [entry for entry in entries if os.path.isdir(
         os.path.join(path, entry))]
 
@@ -126,12 +170,17 @@ def run_tests(*, session, path, timeout: int = None):
         logging.warning('Nothing to test in path %s', path)
         return
 
+    operation_type_paths = []
     for entry in dir_entries:
         entry_path = os.path.join(path, entry)
         if is_category(entry_path):
-            category.run_tests(
-                session=session,
-                path=entry_path,
-                name=entry,
-                timeout=timeout
-            )
+            operation_type_paths.extend(category.find_entries(entry_path)[1])
+
+    category.test_entries(
+        session=session,
+        operation_type_paths=operation_type_paths,
+        summary_path=path,
+        timeout=timeout,
+        jobs=jobs,
+        use_cache=use_cache
+    )
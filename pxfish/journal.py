@@ -0,0 +1,209 @@
+"""
+Functions for recording the progress of a bulk pull or push, so that an
+interrupted run can be resumed.
+
+The journal lives at the root of the pfish directory while a pull or push is
+running.
+It is a JSON lines file: the first line names the action, and a line is
+appended as each operation type and library is started and completed, so
+recording an item costs the same however long the run is.
+An item with a started line but no completed line was interrupted.
+The journal is removed when a run finishes without failures.
+"""
+
+import json
+import logging
+import os
+import threading
+
+JOURNAL_FILE = '.pfish_journal.jsonl'
+
+STARTED = 'started'
+COMPLETED = 'completed'
+
+
+def journal_file_path(root):
+    return os.path.join(root, JOURNAL_FILE)
+
+
+class Journal:
+    """
+    The progress of a pull or push of a pfish directory.
+
+    Entries are keyed by the path of the operation type or library directory
+    relative to the root, and each change is appended to the journal file
+    as it is recorded.
+    Recording entries is safe from multiple threads.
+    """
+
+    def __init__(self, root, action, items=None):
+        self.root = root
+        self.action = action
+        self.items = items or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root):
+        """
+        Reads the journal for the directory at root.
+        Returns None if there is none.
+
+        Lines that cannot be read, such as a line cut short when the run was
+        interrupted, are skipped.
+        """
+        file_path = journal_file_path(root)
+        try:
+            with open(file_path) as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(
+                    'Ignoring unreadable line in journal %s: %s',
+                    file_path, line)
+
+        if not records or 'action' not in records[0]:
+            logging.warning('Ignoring journal %s without an action', file_path)
+            return None
+
+        items = {}
+        for record in records[1:]:
+            if record.get('state') == STARTED:
+                items[record['key']] = {
+                    'state': STARTED, 'files': record.get('files', [])}
+            elif record.get('state') == COMPLETED and record['key'] in items:
+                items[record['key']]['state'] = COMPLETED
+        return cls(root, records[0]['action'], items)
+
+    @classmethod
+    def open(cls, root, *, action, resume=False):
+        """
+        Returns the journal for a run of the action in the directory at root.
+
+        If resume is set and the last run of the same action was interrupted,
+        its journal is continued, and the items it only partly wrote are
+        reported.
+        Otherwise a new journal is started.
+
+        Arguments:
+            root (String): the root of the pfish directory
+            action (String): pull or push
+            resume (Boolean): whether to continue the last run
+        """
+        previous = cls.load(root)
+
+        if previous and previous.action == action:
+            previous.report_partial()
+
+        if not resume:
+            if previous:
+                logging.info(
+                    'Discarding the journal of an unfinished %s; '
+                    'use --resume to continue it', previous.action)
+            return cls.start(root, action)
+
+        if not previous or previous.action != action:
+            logging.info('No unfinished %s to resume', action)
+            return cls.start(root, action)
+
+        logging.info(
+            'Resuming %s: %d items already completed',
+            action, len(previous.completed()))
+        return previous
+
+    @classmethod
+    def start(cls, root, action):
+        """Starts a new journal for the action, replacing any previous one."""
+        os.makedirs(root, exist_ok=True)
+        with open(journal_file_path(root), 'w') as file:
+            file.write(json.dumps({'action': action}) + '\n')
+        return cls(root, action)
+
+    def key(self, path) -> str:
+        """Returns the journal key for the directory at path."""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def completed(self):
+        """Returns the keys of the completed items."""
+        return [key for key, entry in self.items.items()
+                if entry['state'] == COMPLETED]
+
+    def is_completed(self, path) -> bool:
+        """Checks whether the item at path was completed."""
+        entry = self.items.get(self.key(path))
+        return bool(entry) and entry['state'] == COMPLETED
+
+    def append(self, record):
+        """Appends a record to the journal file. Called with the lock held."""
+        with open(journal_file_path(self.root), 'a') as file:
+            file.write(json.dumps(record, sort_keys=True) + '\n')
+
+    def begin(self, path, *, files=()):
+        """
+        Records that the item at path has been started.
+
+        Arguments:
+            path (String): the operation type or library directory
+            files (List): names of the files the item is complete with
+        """
+        key = self.key(path)
+        with self._lock:
+            self.items[key] = {'state': STARTED, 'files': list(files)}
+            self.append({'key': key, 'state': STARTED, 'files': list(files)})
+
+    def complete(self, path):
+        """Records that the item at path has been completed."""
+        key = self.key(path)
+        with self._lock:
+            self.items[key]['state'] = COMPLETED
+            self.append({'key': key, 'state': COMPLETED})
+
+    def partial(self):
+        """
+        Finds the items that were started but not completed.
+
+        Returns:
+            Dictionary with the keys of the started items as keys, and the
+            names of the files the item is complete with as values; any of
+            them may be missing or out of date.
+        """
+        return {
+            key: entry['files'] for key, entry in self.items.items()
+            if entry['state'] == STARTED
+        }
+
+    def report_partial(self):
+        """Logs the items that were only partly written."""
+        for key, files in sorted(self.partial().items()):
+            if files:
+                logging.warning(
+                    'The last %s stopped on %s; %s may be missing or '
+                    'out of date',
+                    self.action, key, ', '.join(files))
+            else:
+                logging.warning(
+                    'The last %s stopped while working on %s',
+                    self.action, key)
+
+    def finish(self, *, failed: bool):
+        """
+        Ends the run.
+
+        The journal is removed unless some items failed,
+        so that a rerun with --resume retries only those items.
+        """
+        if failed:
+            logging.info(
+                'Rerun the %s with --resume to retry the failed items',
+                self.action)
+            return
+
+        try:
+            os.remove(journal_file_path(self.root))
+        except FileNotFoundError:
+            pass
@@ -6,6 +6,9 @@ import logging
 import os
 import code_component
 import definition
+import manifest
+import prefetch
+import profiler
 
 from paths import (
     create_named_path,
@@ -52,14 +55,73 @@ def pull(*, session, path, category, name):
             'No Library named %s in Category %s', name, category)
         return
 
+    prefetch.load_libraries(
+        session=session,
+        libraries=retrieved_library[:1],
+        component_names=get_component_names()
+    )
     write_files(path=path, library=retrieved_library[0])
 
+    sync_manifest = manifest.Manifest.load(path)
+    record(sync_manifest=sync_manifest, path=path, library=retrieved_library[0])
+    sync_manifest.save()
+
 
 def get_component_names():
     """Gets code file names associated with library"""
     return ['source']
 
 
+def local_path(*, path, library):
+    """
+    Returns the directory for the files of the library.
+
+    Arguments:
+        path (String): the root of the pfish directory
+        library (Library): the library
+    """
+    category_path = create_named_path(path, library.category)
+    return create_named_path(
+        category_path, library.name, subdirectory="libraries")
+
+
+def record(*, sync_manifest, path, library):
+    """
+    Records the files written for the library in the manifest.
+
+    Arguments:
+        sync_manifest (Manifest): the manifest for the pfish directory
+        path (String): the root of the pfish directory
+        library (Library): the library that was written
+    """
+    sync_manifest.record(
+        local_path(path=path, library=library),
+        parent_class='Library',
+        model=library,
+        codes=prefetch.loaded_codes(
+            parent=library, component_names=get_component_names())
+    )
+
+
+def is_current(*, sync_manifest, path, library):
+    """
+    Checks whether the files for the library are unchanged
+    since it was last synced, using only the code already loaded.
+
+    Arguments:
+        sync_manifest (Manifest): the manifest for the pfish directory
+        path (String): the root of the pfish directory
+        library (Library): the library on Aquarium
+    """
+    return sync_manifest.is_current(
+        local_path(path=path, library=library),
+        model=library,
+        codes=prefetch.loaded_codes(
+            parent=library, component_names=get_component_names())
+    )
+
+
+@profiler.profiled('write_files', item='library')
 def write_files(*, path, library):
     """
     Writes the files for the library to the path.
@@ -70,11 +132,7 @@ def write_files(*, path, library):
     """
     logging.info('writing library %s', library.name)
 
-    category_path = create_named_path(path, library.category)
-    makedirectory(category_path)
-
-    library_path = create_named_path(
-        category_path, library.name, subdirectory="libraries")
+    library_path = local_path(path=path, library=library)
 
     makedirectory(library_path)
 
@@ -130,13 +188,20 @@ def create(*, session, path, category, name):
     session.utils.create_library(new_library)
 
 
-def push(*, session, path):
+def push(*, session, path, sync_manifest=None):
     """
-    Pushes files to the Aquarium instance.
+    Pushes files to the Aquarium instance, and records them in the manifest.
 
     Arguments:
         session (Session Object): Aquarium session object
         path (String): path to files to be pushed
+        sync_manifest (Manifest): the manifest to record the push in;
+                                  if not given, the manifest for the path
+                                  is updated
+
+    Returns:
+        CodeUpdates for the pushed code components,
+        or None if the library was not pushed
     """
     if not is_library(path):
         logging.warning('No Library at %s', path)
@@ -144,7 +209,7 @@ def push(*, session, path):
 
     definitions = definition.read(path)
 
-    user_id = session.User.where({"login": session.login})
+    user_id = session.user_id()
     query = {
         "category": definitions['category'],
         "name": definitions['name']
@@ -159,7 +224,15 @@ def push(*, session, path):
                name=definitions['name'])
         parent_object = session.Library.where(query)
     # TODO: handle case where create failed
-    code_component.update_code_objects(
+    prefetch.load_codes(
+        session=session,
+        parents=parent_object[:1],
+        parent_class='Library',
+        component_names=component_names
+    )
+    codes = prefetch.loaded_codes(
+        parent=parent_object[0], component_names=component_names)
+    updates = code_component.update_code_objects(
         component_names=component_names,
         parent_object=parent_object[0],
         parent_class="Library",
@@ -167,6 +240,14 @@ def push(*, session, path):
         session=session,
         path=path
         )
+    manifest.record_push(
+        path,
+        sync_manifest=sync_manifest,
+        parent_class='Library',
+        model=parent_object[0],
+        codes=dict(codes, **updates.codes)
+    )
+    return updates
 
 
 def run_test(*, session, path, category, name, timeout: int = None):
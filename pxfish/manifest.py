@@ -0,0 +1,270 @@
+"""
+Functions for recording what was last synced between a pfish directory and
+an Aquarium instance.
+
+The manifest lives at the root of the pfish directory and records, for each
+operation type, library, sample type and object type, the Aquarium ids it
+was synced from and the hashes of the files that were written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from writer import write_if_changed
+
+MANIFEST_FILE = '.pfish_manifest.json'
+
+# files written into operation type directories that are not synced
+UNSYNCED_FILES = {'test_results.json'}
+
+
+def manifest_file_path(root):
+    """Returns the path of the manifest file for the directory at root."""
+    return os.path.join(root, MANIFEST_FILE)
+
+
+def find_root(path):
+    """
+    Returns the closest directory at or above path that has a manifest,
+    or None if there is none.
+    """
+    path = os.path.abspath(path)
+    while True:
+        if os.path.isfile(manifest_file_path(path)):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def item_root(path):
+    """
+    Returns the root of the pfish directory for the operation type or
+    library directory at path.
+
+    This is the directory with the manifest if there is one, and otherwise
+    the directory above the category of the item.
+    """
+    return find_root(path) or os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(path))))
+
+
+def content_hash(content) -> str:
+    """Returns the hash used to compare file content."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(file_path) -> str:
+    """Returns the content hash for the file, or None if it does not exist."""
+    try:
+        with open(file_path, 'rb') as file:
+            return content_hash(file.read())
+    except FileNotFoundError:
+        return None
+
+
+def hash_files(path) -> dict:
+    """
+    Returns the content hashes of the synced files in the directory.
+
+    Arguments:
+        path (String): the directory of an operation type or library
+
+    Returns:
+        Dictionary with file names as keys and hashes as values
+    """
+    try:
+        entries = os.listdir(path)
+    except FileNotFoundError:
+        return {}
+
+    return {
+        entry: file_hash(os.path.join(path, entry))
+        for entry in sorted(entries)
+        if entry not in UNSYNCED_FILES
+        and os.path.isfile(os.path.join(path, entry))
+    }
+
+
+class Manifest:
+    """
+    The sync state of a pfish directory.
+
+    Entries are keyed by the path of the operation type or library directory
+    relative to the root.
+    Recording entries is safe from multiple threads.
+    """
+
+    def __init__(self, root, items=None):
+        self.root = root
+        self.items = items or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root):
+        """
+        Reads the manifest for the directory at root.
+        Returns an empty manifest if there is none.
+        """
+        file_path = manifest_file_path(root)
+        try:
+            with open(file_path) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(root)
+        except json.JSONDecodeError as error:
+            logging.warning(
+                'Ignoring unreadable manifest %s: %s', file_path, error)
+            return cls(root)
+
+        return cls(root, data.get('items', {}))
+
+    def save(self):
+        """
+        Writes the manifest to the root directory,
+        unless it is unchanged.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            data = {'items': self.items}
+            write_if_changed(
+                manifest_file_path(self.root),
+                json.dumps(data, indent=2, sort_keys=True))
+
+    def key(self, path) -> str:
+        """Returns the manifest key for the directory at path."""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def get(self, path):
+        """Returns the entry for the directory at path, or None."""
+        return self.items.get(self.key(path))
+
+    def record(self, path, *, parent_class, model, codes):
+        """
+        Records the state of an operation type or library directory
+        after it has been synced with Aquarium.
+
+        Arguments:
+            path (String): the operation type or library directory
+            parent_class (String): OperationType or Library
+            model (OperationType or Library): the synced Aquarium object
+            codes (Dictionary): component names and synced Code objects;
+                                components without a Code object keep the
+                                code id recorded before, since a push of
+                                some components does not load the others
+        """
+        key = self.key(path)
+        files = hash_files(path)
+        with self._lock:
+            previous = self.items.get(key, {})
+            if previous.get('id') != model.id:
+                previous = {}
+            previous = previous.get('codes', {})
+            self.items[key] = {
+                'parent_class': parent_class,
+                'id': model.id,
+                'name': model.name,
+                'category': model.category,
+                'updated_at': getattr(model, 'updated_at', None),
+                'codes': {
+                    name: code.id if code else previous.get(name)
+                    for name, code in codes.items()
+                },
+                'files': files
+            }
+
+    def record_type(self, file_path, *, parent_class, model):
+        """
+        Records the state of a sample type or object type file
+        after it has been synced with Aquarium.
+
+        Arguments:
+            file_path (String): the sample type or object type file
+            parent_class (String): SampleType or ObjectType
+            model (SampleType or ObjectType): the synced Aquarium object
+        """
+        entry = {
+            'parent_class': parent_class,
+            'id': model.id,
+            'name': model.name,
+            'files': {os.path.basename(file_path): file_hash(file_path)}
+        }
+        with self._lock:
+            self.items[self.key(file_path)] = entry
+
+    def is_synced(self, path, *, model, codes) -> bool:
+        """
+        Checks whether the directory at path was last synced with the
+        current version of model in Aquarium, that is, with the same Aquarium
+        object, code versions and update time.
+
+        Arguments:
+            path (String): the operation type or library directory
+            model (OperationType or Library): the Aquarium object
+            codes (Dictionary): component names and current Code objects
+        """
+        entry = self.get(path)
+        if not entry:
+            return False
+
+        if entry['id'] != model.id:
+            return False
+
+        if entry['updated_at'] != getattr(model, 'updated_at', None):
+            return False
+
+        for name, code in codes.items():
+            if entry['codes'].get(name) != (code.id if code else None):
+                return False
+
+        return True
+
+    def is_current(self, path, *, model, codes) -> bool:
+        """
+        Checks whether the directory at path already holds the synced
+        version of model.
+
+        The directory is current if it was synced with the current version
+        of model, and none of its files have changed since.
+
+        Arguments:
+            path (String): the operation type or library directory
+            model (OperationType or Library): the Aquarium object
+            codes (Dictionary): component names and current Code objects
+        """
+        if not self.is_synced(path, model=model, codes=codes):
+            return False
+
+        files = self.get(path)['files']
+        return bool(files) and files == hash_files(path)
+
+
+def record_push(path, *, sync_manifest=None, parent_class, model, codes):
+    """
+    Records an operation type or library directory after it was pushed.
+
+    Arguments:
+        path (String): the operation type or library directory
+        sync_manifest (Manifest): the manifest to record in; if not given,
+                                  the manifest for the directory is loaded,
+                                  updated and saved
+        parent_class (String): OperationType or Library
+        model (OperationType or Library): the Aquarium object pushed to
+        codes (Dictionary): component names and current Code objects,
+                            including those created by the push
+    """
+    if sync_manifest:
+        sync_manifest.record(
+            path, parent_class=parent_class, model=model, codes=codes)
+        return
+
+    sync_manifest = Manifest.load(item_root(path))
+    sync_manifest.record(
+        path, parent_class=parent_class, model=model, codes=codes)
+    sync_manifest.save()
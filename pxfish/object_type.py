@@ -12,22 +12,22 @@ from paths import (
     makedirectory,
     simplename
 )
+from writer import write_json_if_changed
 
 
 def exists(*, session, object_type):
     """
     Checks whether an Object Type named in definition exists in Aquarium
     """
-    object_type = session.ObjectType.where({'name': object_type})
-    return bool(object_type)
+    return bool(session.find_by_name('ObjectType', object_type))
 
 
 def get_sample_type_id(session, sample_type_name):
     """Gets Sample Type ID to be associated with Object Type"""
     # TODO: If ST doesn't exist, create it?
-    sample_type = session.SampleType.where({'name': sample_type_name})
+    sample_type = session.find_by_name('SampleType', sample_type_name)
     if sample_type:
-        return sample_type[0].id
+        return sample_type.id
     return None
 
 
@@ -71,6 +71,7 @@ def create(*, session, object_type, path):
             )
         obj_type.sample_type_id = sample_type_id
     obj_type.save()
+    session.invalidate('ObjectType', obj_type.name)
 
 
 def read(*, path, object_type):
@@ -90,7 +91,6 @@ def read(*, path, object_type):
     return data_dict
 
 
-# TODO: update so this doesn't rewrite the same file repeatedly
 def write_files(*, path, object_type):
     """
     Writes the files associated with the object_type to the path.
@@ -98,6 +98,9 @@ def write_files(*, path, object_type):
     Arguments:
         path (String): the path to where the files will be written
         object_type (ObjectType): the object type being written
+
+    Returns:
+        the path of the written file
     """
     path = create_named_path(path, 'object_types')
 
@@ -131,7 +134,7 @@ def write_files(*, path, object_type):
 
     file_path = (os.path.join(path, "{}.json".format(name)))
 
-    with open(file_path, 'w') as file:
-        file.write(json.dumps(object_type_ser, indent=2))
+    write_json_if_changed(file_path, object_type_ser)
 
     logging.info('Writing object type %s', object_type.name)
+    return file_path
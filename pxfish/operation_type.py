@@ -7,7 +7,11 @@ import os
 import code_component
 import definition
 import field_type
+import manifest
 import object_type
+import prefetch
+import profiler
+import result_cache
 import sample_type
 
 from definition import (
@@ -21,6 +25,7 @@ from protocol_test import (
     parse_test_response,
     write_test_response
 )
+from type_registry import TypeRegistry
 
 
 def is_operation_type(path):
@@ -37,21 +42,49 @@ def is_operation_type(path):
     return definition.is_operation_type(def_dict)
 
 
-def get_associated_types(*, path, operation_type):
+def get_associated_types(*, path, operation_type, registry=None,
+                         sync_manifest=None):
     """
     Retrieves object or sample types associated with the given operation type
+
+    Each type is written only once for a registry, so types shared by many
+    operation types are not rewritten during a pull.
+
+    Arguments:
+        path (String): the path to where the files will be written
+        operation_type (OperationType): the operation type being written
+        registry (TypeRegistry): the types already written during this pull
+        sync_manifest (Manifest): if given, the written types are recorded
     """
+    if registry is None:
+        registry = TypeRegistry()
 
     object_types = operation_type.object_type()
     sample_types = operation_type.sample_type()
 
     for obj_type in object_types:
-        if obj_type:
-            object_type.write_files(path=path, object_type=obj_type)
+        if obj_type and registry.claim('ObjectType', obj_type.id):
+            try:
+                file_path = object_type.write_files(
+                    path=path, object_type=obj_type)
+            except Exception:
+                registry.release('ObjectType', obj_type.id)
+                raise
+            if sync_manifest:
+                sync_manifest.record_type(
+                    file_path, parent_class='ObjectType', model=obj_type)
 
     for samp_type in sample_types:
-        if samp_type:
-            sample_type.write_files(path=path, sample_type=samp_type)
+        if samp_type and registry.claim('SampleType', samp_type.id):
+            try:
+                file_path = sample_type.write_files(
+                    path=path, sample_type=samp_type)
+            except Exception:
+                registry.release('SampleType', samp_type.id)
+                raise
+            if sync_manifest:
+                sync_manifest.record_type(
+                    file_path, parent_class='SampleType', model=samp_type)
 
 
 def pull(*, session, path, category, name):
@@ -71,11 +104,74 @@ def pull(*, session, path, category, name):
             name, category)
         return
 
+    prefetch.load_operation_types(
+        session=session,
+        operation_types=retrieved_operation_type[:1],
+        component_names=all_component_names()
+    )
+    sync_manifest = manifest.Manifest.load(path)
     write_files(session=session, path=path,
-                operation_type=retrieved_operation_type[0])
+                operation_type=retrieved_operation_type[0],
+                sync_manifest=sync_manifest)
+    record(sync_manifest=sync_manifest, path=path,
+           operation_type=retrieved_operation_type[0])
+    sync_manifest.save()
+
+
+def local_path(*, path, operation_type):
+    """
+    Returns the directory for the files of the operation type.
+
+    Arguments:
+        path (String): the root of the pfish directory
+        operation_type (OperationType): the operation type
+    """
+    category_path = create_named_path(path, operation_type.category)
+    return create_named_path(
+        category_path, operation_type.name, subdirectory='operation_types')
+
+
+def record(*, sync_manifest, path, operation_type):
+    """
+    Records the files written for the operation type in the manifest.
+
+    Arguments:
+        sync_manifest (Manifest): the manifest for the pfish directory
+        path (String): the root of the pfish directory
+        operation_type (OperationType): the operation type that was written
+    """
+    sync_manifest.record(
+        local_path(path=path, operation_type=operation_type),
+        parent_class='OperationType',
+        model=operation_type,
+        codes=prefetch.loaded_codes(
+            parent=operation_type,
+            component_names=all_component_names())
+    )
 
 
-def write_files(*, session, path, operation_type):
+def is_current(*, sync_manifest, path, operation_type):
+    """
+    Checks whether the files for the operation type are unchanged
+    since it was last synced, using only the code already loaded.
+
+    Arguments:
+        sync_manifest (Manifest): the manifest for the pfish directory
+        path (String): the root of the pfish directory
+        operation_type (OperationType): the operation type on Aquarium
+    """
+    return sync_manifest.is_current(
+        local_path(path=path, operation_type=operation_type),
+        model=operation_type,
+        codes=prefetch.loaded_codes(
+            parent=operation_type,
+            component_names=all_component_names())
+    )
+
+
+@profiler.profiled('write_files', item='operation_type')
+def write_files(*, session, path, operation_type, registry=None,
+                sync_manifest=None):
     """
     Writes the files associated with the operation_type to the path.
 
@@ -83,15 +179,17 @@ def write_files(*, session, path, operation_type):
         session (Session Object): Aquarium Session object
         path (String): the path to where the files will be written
         operation_type (OperationType): the operation type being written
+        registry (TypeRegistry): the sample and object types already written
+                                 during this pull
+        sync_manifest (Manifest): if given, the written sample and object
+                                  types are recorded
     """
     logging.info('Writing operation type %s', operation_type.name)
-    get_associated_types(path=path, operation_type=operation_type)
+    get_associated_types(
+        path=path, operation_type=operation_type, registry=registry,
+        sync_manifest=sync_manifest)
 
-    category_path = create_named_path(path, operation_type.category)
-    makedirectory(category_path)
-
-    path = create_named_path(
-        category_path, operation_type.name, subdirectory='operation_types')
+    path = local_path(path=path, operation_type=operation_type)
 
     makedirectory(path)
     code_names = all_component_names()
@@ -177,15 +275,25 @@ def create(*, session, path, category, name, field_types=[]):
     session.utils.create_operation_type(new_operation_type)
 
 
-def push(*, session, path, force=False, component_names=all_component_names()):
+def push(*, session, path, force=False, component_names=all_component_names(),
+         sync_manifest=None, push_field_types=True):
     """
-    Pushes files to the Aquarium instance
+    Pushes files to the Aquarium instance, and records them in the manifest
 
     Arguments:
         session (Session Object): Aquarium session object
         path (String): Directory where files are to be found
         force (Boolean): If set, overrides conflict checks for Field Types
         component_names (List): Files to include as part of OT
+        sync_manifest (Manifest): the manifest to record the push in;
+                                  if not given, the manifest for the path
+                                  is updated
+        push_field_types (Boolean): if not set, the field types in the
+                                    definition file are not pushed
+
+    Returns:
+        CodeUpdates for the pushed code components,
+        or None if the operation type was not pushed
     """
     if not is_operation_type(path):
         logging.warning('No Operation Type at %s', path)
@@ -193,7 +301,7 @@ def push(*, session, path, force=False, component_names=all_component_names()):
 
     definitions = definition.read(path)
 
-    user_id = session.User.where({'login': session.login})
+    user_id = session.user_id()
     query = {
         'category': definitions['category'],
         'name': definitions['name']
@@ -208,24 +316,44 @@ def push(*, session, path, force=False, component_names=all_component_names()):
                name=definitions['name'])
         parent_object = session.OperationType.where(query)
 
-    if definition.has_field_types(definitions):
+    if push_field_types and definition.has_field_types(definitions):
+        aquarium_field_types = field_type.get_field_types(
+            session=session, operation_type=parent_object[0])
         if not force and not field_type.types_valid(
                 definitions=definitions,
                 operation_type=parent_object[0],
-                session=session):
+                session=session,
+                aquarium_field_types=aquarium_field_types):
             return
         field_types = build_associated_types(
             definitions=definitions,
             operation_type=parent_object[0],
             force=force,
             session=session,
-            path=path
+            path=path,
+            aquarium_field_types=aquarium_field_types
             )
 
         parent_object[0].field_types = field_types
+        # the update sends every code component, so load them in one query
+        # rather than letting each be fetched as it is serialized
+        prefetch.load_codes(
+            session=session,
+            parents=parent_object[:1],
+            parent_class='OperationType',
+            component_names=all_component_names()
+        )
         session.utils.update_operation_type(parent_object[0])
 
-    code_component.update_code_objects(
+    prefetch.load_codes(
+        session=session,
+        parents=parent_object[:1],
+        parent_class='OperationType',
+        component_names=component_names
+    )
+    codes = prefetch.loaded_codes(
+        parent=parent_object[0], component_names=all_component_names())
+    updates = code_component.update_code_objects(
         component_names=component_names,
         parent_object=parent_object[0],
         parent_class="OperationType",
@@ -233,11 +361,24 @@ def push(*, session, path, force=False, component_names=all_component_names()):
         session=session,
         path=path
         )
+    manifest.record_push(
+        path,
+        sync_manifest=sync_manifest,
+        parent_class='OperationType',
+        model=parent_object[0],
+        codes=dict(codes, **updates.codes)
+    )
+    return updates
 
 
-def build_associated_types(*, definitions, operation_type, force=False, session, path):
+@profiler.profiled('build_associated_types', item='operation_type')
+def build_associated_types(*, definitions, operation_type, force=False, session, path,
+                           aquarium_field_types=None):
     """
     Creates list of Field Types, AFTs, and/or Sample or Object Types
+
+    aquarium_field_types are the Operation Type's existing Field Types,
+    which are retrieved if not given.
     """
     field_types = definitions['inputs'] + definitions['outputs']
     allowable_field_types = definition.allowable_field_types(field_types)
@@ -253,26 +394,84 @@ def build_associated_types(*, definitions, operation_type, force=False, session,
         definitions=definitions,
         operation_type=operation_type,
         force=force,
-        session=session)
+        session=session,
+        aquarium_field_types=aquarium_field_types)
 
     return field_type_list
 
-#TODO: Check that this wasn't effected by the latest change
-def run_test(*, session, path, category, name, timeout: int = None):
+@profiler.profiled('run_test', item='name')
+def run_test(*, session, path, category, name, timeout: int = None,
+             use_cache=True, test_cache=None, sync_manifest=None):
     """
     Runs tests for specified operation type.
 
+    If the protocol, test, and definition files, and the libraries the
+    operation type needs, are unchanged since the test was last run on this
+    instance, the recorded result is reported without running the test.
+
     Arguments:
         session (Session Object): Aquarium session object
         path (String): Path to file
         category (String): Category operation type is found in
         name (String): Name of the Operation Type to be tested
         timeout (Int): Time (seconds) to wait for test result
+        use_cache (Boolean): if not set, the test is always run
+        test_cache (ResultCache): the test results to use; if not given,
+                                  the results for the path are loaded,
+                                  updated and saved
+        sync_manifest (Manifest): the manifest to record the pushed test
+                                  files in; if not given, the manifest for
+                                  the path is updated
+
+    Returns:
+        the test response, or None if the operation type was not found
+    """
+    if not use_cache:
+        return send_test(
+            session=session, path=path, category=category, name=name,
+            timeout=timeout, sync_manifest=sync_manifest)
+
+    save_cache = test_cache is None
+    if save_cache:
+        test_cache = result_cache.ResultCache.load(manifest.item_root(path))
+
+    key = result_cache.test_key(
+        root=test_cache.root, path=path, url=session._aqhttp.url)
+    response = test_cache.lookup(path, key)
+    if response:
+        logging.info('Inputs of %s unchanged, using the cached test result',
+                     name)
+        write_test_response(response=response, path=path)
+        parse_test_response(response=response, file_path=path)
+        return response
+
+    response = send_test(
+        session=session, path=path, category=category, name=name,
+        timeout=timeout, sync_manifest=sync_manifest)
+    if response:
+        test_cache.record(path, key, response)
+        if save_cache:
+            test_cache.save()
+    return response
+
+
+def send_test(*, session, path, category, name, timeout: int = None,
+              sync_manifest=None):
+    """
+    Pushes the test files of the operation type and runs its test
+    on Aquarium.
+
+    The push is recorded in sync_manifest if it is given, otherwise in the
+    manifest for the path.
+
+    Returns:
+        the test response, or None if the operation type was not found
     """
     logging.info('Sending request to test %s', name)
     push(
         session=session, path=path, force=False,
-        component_names=test_component_names()
+        component_names=test_component_names(),
+        sync_manifest=sync_manifest
     )
 
     retrieved_operation_type = session.OperationType.where(
@@ -286,11 +485,13 @@ def run_test(*, session, path, category, name, timeout: int = None):
         logging.warning(
             'No Operation Type named %s in Category %s',
             name, category)
+        return None
 
     response = session._aqhttp.get(
-        "test/run/{}".format(retrieved_operation_type.id),
+        "test/run/{}".format(retrieved_operation_type[0].id),
         timeout
     )
 
     write_test_response(response=response, path=path)
     parse_test_response(response=response, file_path=path)
+    return response
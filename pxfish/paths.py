@@ -13,8 +13,7 @@ def makedirectory(directory_name):
     Arguments:
       directory_name (String): the name of the directory
     """
-    if not os.path.exists(directory_name):
-        os.makedirs(directory_name)
+    os.makedirs(directory_name, exist_ok=True)
 
 
 def simplename(name):
@@ -0,0 +1,207 @@
+"""
+Functions for loading the Aquarium data needed to write operation types and
+libraries in bulk, rather than one relationship at a time.
+"""
+
+import logging
+
+from pydent.browser import Browser
+
+BATCH_SIZE = 100
+
+
+def batches(items, size: int = BATCH_SIZE):
+    """
+    Splits items into lists of at most size items.
+
+    Items are taken from the iterable as they are needed, so an iterable
+    that retrieves items lazily is never held in memory all at once.
+
+    Arguments:
+        items (Iterable): the items to split
+        size (Int): the maximum number of items in a batch
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def paginate(interface, *, page_size: int = BATCH_SIZE):
+    """
+    Yields all models of a model interface, retrieving one page of models
+    at a time.
+
+    Arguments:
+        interface (QueryInterface): e.g. session.OperationType
+        page_size (Int): the number of models retrieved in a request
+    """
+    offset = 0
+    while True:
+        page = interface.all(opts={'offset': offset, 'limit': page_size})
+        if not page:
+            return
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += len(page)
+
+
+def load_codes(*, session, parents, parent_class, component_names):
+    """
+    Loads the current code for the named components of each parent in one
+    query, and attaches each code object to its parent.
+
+    Components without code are left unloaded, so that the parent object
+    will fetch them itself when they are accessed.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        parents (List): operation types or libraries
+        parent_class (String): OperationType or Library
+        component_names (List): names of the code components to load
+    """
+    if not parents or not component_names:
+        return
+
+    codes = session.Code.where({
+        'parent_class': parent_class,
+        'parent_id': [parent.id for parent in parents],
+        'name': component_names,
+        'child_id': None
+    })
+
+    # code(name) returns the most recent version, so keep the largest id
+    current = {}
+    for code in codes or []:
+        key = (code.parent_id, code.name)
+        if key not in current or code.id > current[key].id:
+            current[key] = code
+
+    for parent in parents:
+        for name in component_names:
+            code = current.get((parent.id, name))
+            if code:
+                setattr(parent, name, code)
+
+
+def load_field_types(*, session, operation_types):
+    """
+    Loads the field types, allowable field types, sample types and object
+    types for a batch of operation types using a fixed number of queries.
+
+    Also loads the data written for the associated sample types
+    (their field types) and object types (their sample type).
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        operation_types (List): operation types to load
+    """
+    if not operation_types:
+        return
+
+    browser = Browser(session)
+    browser.recursive_retrieve(
+        operation_types,
+        {
+            'field_types': {
+                'allowable_field_types': {
+                    'sample_type': {'field_types': {}},
+                    'object_type': {'sample_type': {}}
+                }
+            }
+        },
+        strict=False
+    )
+
+
+def load_allowable_field_types(*, session, field_types):
+    """
+    Loads the allowable field types of the field types,
+    along with their sample types and object types.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        field_types (List): field types to load
+    """
+    if not field_types:
+        return
+
+    browser = Browser(session)
+    browser.recursive_retrieve(
+        field_types,
+        {
+            'allowable_field_types': {
+                'sample_type': {},
+                'object_type': {}
+            }
+        },
+        strict=False
+    )
+
+
+def load_operation_types(*, session, operation_types, component_names):
+    """
+    Loads the code and field types for a batch of operation types
+    using a fixed number of queries.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        operation_types (List): operation types to load
+        component_names (List): names of the code components to load
+    """
+    if not operation_types:
+        return
+
+    logging.info('Loading data for %d operation types', len(operation_types))
+    load_codes(
+        session=session,
+        parents=operation_types,
+        parent_class='OperationType',
+        component_names=component_names
+    )
+    load_field_types(session=session, operation_types=operation_types)
+
+
+def loaded_codes(*, parent, component_names):
+    """
+    Returns the code objects already loaded for the named components of
+    parent, without fetching any that are not loaded.
+
+    Arguments:
+        parent (OperationType or Library): the parent of the code objects
+        component_names (List): names of the code components
+
+    Returns:
+        Dictionary with component names as keys and Code objects (or None)
+        as values.
+    """
+    return {
+        name: getattr(parent, name) if parent.is_deserialized(name) else None
+        for name in component_names
+    }
+
+
+def load_libraries(*, session, libraries, component_names):
+    """
+    Loads the code for a batch of libraries in a single query.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        libraries (List): libraries to load
+        component_names (List): names of the code components to load
+    """
+    if not libraries:
+        return
+
+    logging.info('Loading data for %d libraries', len(libraries))
+    load_codes(
+        session=session,
+        parents=libraries,
+        parent_class='Library',
+        component_names=component_names
+    )
@@ -0,0 +1,252 @@
+"""
+Functions for recording where the time of a pfish command goes.
+
+While profiling is on, the main phases of pull, push, and test, and each
+request to Aquarium, are timed.
+Each request is counted against the phase it was made in, and against its
+endpoint, which for queries through the json endpoint includes the model
+and method, e.g. POST json OperationType.where.
+
+Profiling is off unless started, and then the phases and requests are only
+checked against a single global, so that they cost nothing otherwise.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+
+# the number of slowest items in a report
+SLOWEST_ITEMS = 20
+
+# the profile of the running command; None while profiling is off
+_profile = None
+
+_ID_PATTERN = re.compile(r'/\d+(?=/|$|\.)')
+
+
+def start(command=None):
+    """
+    Starts profiling.
+
+    Arguments:
+        command (List): the command line arguments, recorded in the report
+    """
+    global _profile  # pylint: disable=global-statement
+    _profile = Profile(command)
+
+
+def stop():
+    """
+    Stops profiling.
+
+    Returns:
+        the Profile of the command, or None if profiling was not started
+    """
+    global _profile  # pylint: disable=global-statement
+    profile, _profile = _profile, None
+    return profile
+
+
+def is_profiling() -> bool:
+    return _profile is not None
+
+
+def endpoint_name(method, path, json_data=None) -> str:
+    """
+    Returns the endpoint of a request, for counting.
+
+    Ids in the path are replaced by {id}, and queries through the json
+    endpoint are named by their model and method.
+    """
+    name = '{} {}'.format(method.upper(), _ID_PATTERN.sub('/{id}', path))
+    if isinstance(json_data, dict) and 'model' in json_data:
+        name = '{} {}.{}'.format(
+            name, json_data['model'], json_data.get('method') or 'find')
+    return name
+
+
+def describe_item(value):
+    """Returns the name of a model, or the string of any other value."""
+    if value is None:
+        return None
+    return str(getattr(value, 'name', value))
+
+
+def profiled(name, *, item=None):
+    """
+    Decorates a function so that each call is timed as a phase, if profiling.
+
+    Arguments:
+        name (String): the name of the phase
+        item (String): the name of the argument holding the item the call is
+                       for
+    """
+    def decorate(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _profile
+            if profile is None:
+                return function(*args, **kwargs)
+
+            label = None
+            if item:
+                arguments = signature.bind_partial(*args, **kwargs).arguments
+                label = describe_item(arguments.get(item))
+            with profile.phase(name, label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def request(method, path, json_data=None):
+    """Times the block as a request to Aquarium, if profiling."""
+    profile = _profile
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        profile.record_request(
+            endpoint_name(method, path, json_data),
+            time.perf_counter() - started,
+            failed=failed)
+
+
+def new_timing():
+    return {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+
+
+def add_timing(timing, seconds):
+    timing['count'] += 1
+    timing['seconds'] += seconds
+    timing['max_seconds'] = max(timing['max_seconds'], seconds)
+
+
+def rounded(timing):
+    """Returns a copy of the timing with a mean and rounded seconds."""
+    result = dict(timing)
+    result['mean_seconds'] = timing['seconds'] / timing['count'] \
+        if timing['count'] else 0.0
+    for key in ('seconds', 'max_seconds', 'mean_seconds'):
+        result[key] = round(result[key], 6)
+    return result
+
+
+class Profile:
+    """
+    The phase timings and requests of a command.
+
+    Phases and requests can be recorded from multiple threads; requests are
+    counted against the innermost phase running in their thread.
+    """
+
+    def __init__(self, command=None):
+        self.command = command
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.endpoints = {}
+        self.items = []
+        self.unphased_requests = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'phases'):
+            self._local.phases = []
+        return self._local.phases
+
+    @contextmanager
+    def phase(self, name, item=None):
+        stack = self._stack()
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            with self._lock:
+                timing = self.phases.setdefault(
+                    name, dict(new_timing(), requests=0))
+                add_timing(timing, seconds)
+                if item is not None:
+                    self.items.append((seconds, name, item))
+
+    def record_request(self, endpoint, seconds, *, failed=False):
+        stack = self._stack()
+        with self._lock:
+            timing = self.endpoints.setdefault(
+                endpoint, dict(new_timing(), errors=0))
+            add_timing(timing, seconds)
+            if failed:
+                timing['errors'] += 1
+            if stack:
+                self.phases.setdefault(
+                    stack[-1], dict(new_timing(), requests=0))['requests'] += 1
+            else:
+                self.unphased_requests += 1
+
+    def report(self, *, slowest=SLOWEST_ITEMS):
+        """
+        Returns the profile as a dictionary with the wall time of the
+        command, timings of each phase and endpoint, the number of requests
+        made outside any phase, and the slowest items.
+        """
+        with self._lock:
+            items = sorted(self.items, reverse=True)[:slowest]
+            return {
+                'command': self.command,
+                'wall_seconds': round(time.perf_counter() - self.started, 6),
+                'requests': sum(
+                    timing['count'] for timing in self.endpoints.values()),
+                'requests_outside_phases': self.unphased_requests,
+                'phases': {
+                    name: rounded(timing)
+                    for name, timing in sorted(self.phases.items())
+                },
+                'endpoints': {
+                    name: rounded(timing)
+                    for name, timing in sorted(
+                        self.endpoints.items(),
+                        key=lambda entry: -entry[1]['seconds'])
+                },
+                'slowest_items': [
+                    {'phase': name, 'item': item,
+                     'seconds': round(seconds, 6)}
+                    for seconds, name, item in items
+                ]
+            }
+
+
+def write_report(profile, file_path):
+    """
+    Writes the report of the profile as JSON to the file,
+    and logs a summary.
+    """
+    report = profile.report()
+    with open(file_path, 'w') as file:
+        file.write(json.dumps(report, indent=2))
+
+    logging.info(
+        'Profile: %.2f seconds, %d requests (%d outside phases), written to %s',
+        report['wall_seconds'], report['requests'],
+        report['requests_outside_phases'], file_path)
+    for name, timing in sorted(report['phases'].items(),
+                               key=lambda entry: -entry[1]['seconds']):
+        logging.info(
+            '  %-24s %4d calls %8.2f seconds %5d requests',
+            name, timing['count'], timing['seconds'], timing['requests'])
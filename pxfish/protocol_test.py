@@ -6,6 +6,9 @@ import logging
 import os
 
 
+SUMMARY_FILE = 'test_summary.json'
+
+
 def write_test_response(*, response, path):
     file_path = os.path.join(path, 'test_results.json')
 
@@ -49,3 +52,54 @@ def parse_test_response(*, response, file_path):
     else:
         logging.info(
             "All tests passed")
+
+
+def outcome(response) -> str:
+    """
+    Returns 'passed', or the error type of a failed test response.
+    """
+    if response["result"] == "error":
+        return response.get("error_type", "error")
+    return "passed"
+
+
+def write_test_summary(*, path, results):
+    """
+    Writes a summary of the results of testing several operation types
+    to test_summary.json in the given directory.
+
+    Arguments:
+        path (String): the directory tested
+        results (List): JobResult for each test, with the test response
+                        as the value of tests that ran
+    """
+    tests = []
+    for result in results:
+        entry = {'name': result.name, 'status': result.status}
+        if result.value:
+            entry['outcome'] = outcome(result.value)
+            entry['message'] = result.value.get('message')
+        elif result.error:
+            entry['outcome'] = 'not run'
+            entry['message'] = str(result.error)
+        else:
+            entry['outcome'] = 'not run'
+        tests.append(entry)
+
+    outcomes = [test['outcome'] for test in tests]
+    summary = {
+        'total': len(tests),
+        'passed': outcomes.count('passed'),
+        'failed': len(outcomes) - outcomes.count('passed') - outcomes.count('not run'),
+        'not_run': outcomes.count('not run'),
+        'tests': tests
+    }
+
+    file_path = os.path.join(path, SUMMARY_FILE)
+    with open(file_path, 'w') as file:
+        file.write(json.dumps(summary, indent=2))
+
+    logging.info(
+        'Tests: %d passed, %d failed, %d not run. Summary written to %s',
+        summary['passed'], summary['failed'], summary['not_run'], file_path)
+    return summary
@@ -7,10 +7,8 @@ import argparse
 import logging
 import os
 import sys
-import instance
-import category
-import operation_type
-import library
+import daemon
+import status
 
 from config import (
     add_config,
@@ -20,28 +18,66 @@ from config import (
 from paths import (
     create_named_path
 )
-from session import create_session
+
+# The modules for commands that connect to Aquarium are imported by the
+# functions for those commands, so that help, argument errors, configure,
+# and commands sent to a pfish server do not load pydent.
 
 logging.basicConfig(level=logging.INFO)
 
 
 def main():
-    """Calls the function determined by the arguments"""
+    """
+    Calls the function determined by the arguments,
+    in a running pfish server if there is one
+    """
+    argv = sys.argv[1:]
+    if daemon.should_forward(argv):
+        exit_status = daemon.send_command(
+            path=daemon.socket_path(config_path()),
+            argv=argv,
+            cwd=os.getcwd()
+        )
+        if exit_status is not None:
+            sys.exit(exit_status)
+
+    run_command(argv)
+
+
+def run_command(argv):
+    """Calls the function determined by the command line arguments"""
     parser = get_argument_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.profile:
+        import profiler
+        profiler.start(argv)
     try:
         args.func(args)
     except AttributeError:
         parser.print_help(sys.stderr)
+    finally:
+        if args.profile:
+            profiler.write_report(profiler.stop(), args.profile_output)
 
 
 def get_argument_parser():
     """
     Creates parser and subparsers for subcommands
-    Subparsers: create, push, pull, test, config
+    Subparsers: create, push, pull, test, status, fetch, watch, config, serve,
+    bench
     """
     parser = argparse.ArgumentParser(
         description="Create, push, pull, and test Aquarium protocols")
+    parser.add_argument(
+        "--profile",
+        help="time the phases of the command and its requests to Aquarium",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="the file the profile is written to (default: %(default)s)",
+        default="pfish_profile.json"
+    )
 
     subparsers = parser.add_subparsers(title="subcommands")
 
@@ -95,6 +131,99 @@ def get_argument_parser():
     add_code_arguments(parser_test, action="test")
     parser_test.set_defaults(func=do_test)
 
+    parser_status = subparsers.add_parser(
+        "status",
+        help="list files changed since the last pull or push, without contacting Aquarium"
+    )
+    parser_status.add_argument(
+        "-d", "--directory",
+        help="the pfish directory, or a category or item within it (default is current directory)",
+        default=os.getcwd()
+    )
+    parser_status.set_defaults(func=do_status)
+
+    parser_fetch = subparsers.add_parser(
+        "fetch",
+        help="list operation types and libraries changed on Aquarium since the last pull or push "
+             "(downloads the current code in bulk, but writes no files)"
+    )
+    parser_fetch.add_argument(
+        "-a", "--all",
+        help="check all operation types and libraries in the instance",
+        action="store_true"
+    )
+    parser_fetch.add_argument(
+        "-d", "--directory",
+        help="the pfish directory (default is current directory)",
+        default=os.getcwd()
+    )
+    parser_fetch.add_argument(
+        "-n", "--name",
+        help="login configuration name",
+        type=str
+    )
+    parser_fetch.add_argument(
+        "-c", "--category",
+        help="category of the operation types and libraries to check"
+    )
+    parser_fetch.set_defaults(func=do_fetch)
+
+    parser_watch = subparsers.add_parser(
+        "watch",
+        help="push operation types and libraries as their files are edited"
+    )
+    parser_watch.add_argument(
+        "-d", "--directory",
+        help="the directory to watch (default is current directory)",
+        default=os.getcwd()
+    )
+    parser_watch.add_argument(
+        "-n", "--name",
+        help="login configuration name",
+        type=str
+    )
+    parser_watch.set_defaults(func=do_watch)
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="run commands sent by other pfish commands, keeping Aquarium sessions between them"
+    )
+    parser_serve.set_defaults(func=do_serve)
+
+    parser_bench = subparsers.add_parser(
+        "bench",
+        help="measure pull, push, and test against a generated fake Aquarium instance"
+    )
+    parser_bench.add_argument(
+        "benchmarks",
+        nargs="*",
+        help="benchmarks to run, in order (default: pull push_category push_instance run_tests)"
+    )
+    for size_name in ['categories', 'operation_types', 'libraries', 'sample_types',
+                      'field_types', 'code_lines', 'library_lines']:
+        parser_bench.add_argument(
+            "--" + size_name.replace('_', '-'),
+            help="{} of the generated instance".format(size_name.replace('_', ' ')),
+            type=int
+        )
+    parser_bench.add_argument(
+        "--latency",
+        help="seconds to delay each request to the fake instance",
+        type=float,
+        default=0.0
+    )
+    parser_bench.add_argument(
+        "-j", "--jobs",
+        help="number of items to pull, push, or test at once",
+        type=int,
+        default=1
+    )
+    parser_bench.add_argument(
+        "-o", "--output",
+        help="write the results as JSON to this file"
+    )
+    parser_bench.set_defaults(func=do_bench)
+
     return parser
 
 
@@ -159,7 +288,34 @@ def add_code_arguments(parser, *, action):
         help="the operation type to {}".format(action)
     )
 
+    if action in ('pull', 'push', 'test'):
+        parser.add_argument(
+            "-j", "--jobs",
+            help="number of operation types or libraries to {} at once".format(action),
+            type=int,
+            default=1
+        )
+
+    if action in ('pull', 'push'):
+        parser.add_argument(
+            "--resume",
+            help="skip the operation types and libraries completed by an interrupted {}".format(action),
+            action="store_true"
+        )
+
+    if action == 'pull':
+        parser.add_argument(
+            "--incremental",
+            help="only write operation types and libraries that changed since the last pull",
+            action="store_true"
+        )
+
     if action == 'push':
+        parser.add_argument(
+            "--dry-run",
+            help="show the changes the push would make, without pushing",
+            action="store_true"
+        )
         parser.add_argument(
             '-f', '--force',
             help='overwrite existing instance field types with data from definition file',
@@ -174,6 +330,22 @@ def add_code_arguments(parser, *, action):
             type=int,
             default=None
         )
+        parser.add_argument(
+            "--no-cache",
+            help="run tests even if their files and libraries are unchanged since they last ran",
+            dest="use_cache",
+            action="store_false"
+        )
+        parser.add_argument(
+            "--affected-by",
+            metavar="LIBRARY",
+            help="test the operation types that need the library, given as Category/Library Name or as its directory"
+        )
+        parser.add_argument(
+            "--changed",
+            help="test the operation types changed since the last pull or push, and those that need libraries changed since then",
+            action="store_true"
+        )
 
 
 def config_path():
@@ -201,10 +373,104 @@ def do_config_show(args):
     show_config(path=config_path())
 
 
+def do_status(args):
+    """
+    Lists the items changed since the last pull or push
+    """
+    status.show(path=os.path.normpath(args.directory))
+
+
+def do_fetch(args):
+    """
+    Lists the operation types and libraries changed on Aquarium,
+    and exits with status 1 if pushing would overwrite any of them
+    """
+    import fetch
+    from session import create_session
+
+    if not args.category and not args.all:
+        logging.error(
+            'You must choose a category to check. Or use -a or --all to check an entire instance')
+        return
+
+    session = create_session(path=config_path(), name=args.name)
+    changes = fetch.check(
+        session=session,
+        path=os.path.normpath(args.directory),
+        category=args.category
+    )
+    if fetch.is_behind(changes):
+        sys.exit(1)
+
+
+def do_watch(args):
+    """
+    Pushes the operation types and libraries in the directory as their
+    files are edited, until interrupted
+    """
+    import watch
+    from session import create_session
+
+    watch.watch(
+        session=create_session(path=config_path(), name=args.name),
+        path=os.path.normpath(args.directory)
+    )
+
+
+def do_bench(args):
+    """
+    Runs benchmarks against a fake Aquarium instance, printing the results
+    and optionally writing them as JSON
+    """
+    import bench
+
+    unknown = [name for name in args.benchmarks if name not in bench.BENCHMARKS]
+    if unknown:
+        logging.error(
+            'Unknown benchmarks %s. Choose from %s',
+            ', '.join(unknown), ', '.join(bench.BENCHMARKS))
+        sys.exit(2)
+
+    size = {
+        name: getattr(args, name) for name in bench.DEFAULT_SIZE
+        if getattr(args, name) is not None
+    }
+    report = bench.run(
+        benchmarks=args.benchmarks or bench.BENCHMARKS,
+        size=size,
+        latency=args.latency,
+        jobs=args.jobs
+    )
+    bench.print_results(report)
+    if args.output:
+        bench.write_results(report, args.output)
+
+
+def do_serve(args):
+    """
+    Runs pfish commands sent over the server socket until interrupted
+    """
+    from session import keep_sessions
+
+    keep_sessions()
+    try:
+        daemon.serve(
+            path=daemon.socket_path(config_path()),
+            run_command=run_command
+        )
+    except daemon.ServerRunningError as error:
+        logging.error(
+            'A pfish server is already listening on %s', error.socket_path)
+
+
 def do_create(args):
     """
     Calls appropriate create function based on arguments
     """
+    import library
+    import operation_type
+    from session import create_session
+
     session = create_session(path=config_path(), name=args.name)
     path = os.path.normpath(args.directory)
 
@@ -240,6 +506,12 @@ def do_pull(args):
     """
     Calls appropriate pull function based on arguments
     """
+    import category
+    import instance
+    import library
+    import operation_type
+    from session import create_session
+
     session = create_session(path=config_path(), name=args.name)
     path = os.path.normpath(args.directory)
 
@@ -256,7 +528,10 @@ def do_pull(args):
                 category=args.category, name=args.operation_type)
             return
 
-        category.pull(session=session, path=path, name=args.category)
+        category.pull(
+            session=session, path=path,
+            name=args.category, jobs=args.jobs,
+            incremental=args.incremental, resume=args.resume)
         return
 
     if args.library or args.operation_type:
@@ -265,7 +540,10 @@ def do_pull(args):
         return
 
     if args.all:
-        instance.pull(session=session, path=path)
+        instance.pull(
+            session=session, path=path,
+            jobs=args.jobs, incremental=args.incremental,
+            resume=args.resume)
         return
 
     logging.error(
@@ -276,12 +554,31 @@ def do_push(args):
     """
     Calls appropriate push function based on arguments
     """
+    import category
+    import instance
+    import library
+    import operation_type
+    from session import create_session
+
     session = create_session(path=config_path(), name=args.name)
     path = os.path.normpath(args.directory)
 
     if args.force and not args.operation_type:
         logging.warning('Force Flag only operates with a single Operation Type')
         return
+
+    if args.dry_run:
+        entries = get_push_entries(args, path)
+        if entries:
+            import dry_run
+
+            dry_run.show(
+                session=session,
+                library_paths=entries[0],
+                operation_type_paths=entries[1],
+                force=args.force
+            )
+        return
     
     # TODO: get category from the definition file
     if args.category:
@@ -304,7 +601,9 @@ def do_push(args):
             )
             return
 
-        category.push(session=session, path=category_path)
+        category.push(
+            session=session, path=category_path,
+            jobs=args.jobs, resume=args.resume)
         return
 
     if args.library or args.operation_type:
@@ -313,7 +612,8 @@ def do_push(args):
         return
 
     if args.all:
-        instance.push(session=session, path=path)
+        instance.push(
+            session=session, path=path, jobs=args.jobs, resume=args.resume)
         return
 
     logging.error(
@@ -322,13 +622,77 @@ def do_push(args):
     return
 
 
+def get_push_entries(args, path):
+    """
+    Returns the library paths and operation type paths that the push
+    arguments select, or None if the arguments select nothing
+    """
+    import category
+    import instance
+
+    if args.category:
+        category_path = create_named_path(path, args.category)
+        if args.library:
+            return [create_named_path(
+                category_path, args.library, subdirectory='libraries')], []
+        if args.operation_type:
+            return [], [create_named_path(
+                category_path, args.operation_type,
+                subdirectory='operation_types')]
+        return category.find_entries(category_path)
+
+    if args.library or args.operation_type:
+        logging.error(
+            'To push a single operation type or library, you must enter a category')
+        return None
+
+    if args.all:
+        if not os.path.isdir(path):
+            logging.warning('Path %s is not a directory. Cannot push', path)
+            return None
+        return instance.find_entries(path)
+
+    logging.error(
+        'You must choose either a category, library, or operation type to push. Or use -a or --all to push an entire directory'
+        )
+    return None
+
+
 def do_test(args):
     """
     Calls appropriate test function based on arguments
     """
-    session = create_session(path=config_path(), name=args.name)
+    import category
+    import instance
+    import library
+    import operation_type
+    from session import create_session
+
     path = os.path.normpath(args.directory)
 
+    if args.affected_by or args.changed:
+        import dependencies
+
+        operation_type_paths = dependencies.find_affected(
+            path=path, library=args.affected_by, changed=args.changed)
+        if operation_type_paths is None:
+            return
+        if not operation_type_paths:
+            logging.info('No affected operation types to test')
+            return
+
+        category.test_entries(
+            session=create_session(path=config_path(), name=args.name),
+            operation_type_paths=operation_type_paths,
+            summary_path=path,
+            timeout=args.timeout,
+            jobs=args.jobs,
+            use_cache=args.use_cache
+        )
+        return
+
+    session = create_session(path=config_path(), name=args.name)
+
     if args.category:
         category_path = create_named_path(path, args.category)
         if args.library:
@@ -351,7 +715,8 @@ def do_test(args):
                     subdirectory="operation_types"),
                 category=args.category,
                 name=args.operation_type,
-                timeout=args.timeout
+                timeout=args.timeout,
+                use_cache=args.use_cache
             )
             return
 
@@ -359,7 +724,9 @@ def do_test(args):
             session=session,
             path=category_path,
             name=args.category,
-            timeout=args.timeout
+            timeout=args.timeout,
+            jobs=args.jobs,
+            use_cache=args.use_cache
             )
         return
 
@@ -369,7 +736,10 @@ def do_test(args):
         return
 
     if args.all:
-        instance.run_tests(session=session, path=path, timeout=args.timeout)
+        instance.run_tests(
+            session=session, path=path,
+            timeout=args.timeout, jobs=args.jobs,
+            use_cache=args.use_cache)
         return
 
     logging.error(
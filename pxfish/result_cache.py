@@ -0,0 +1,161 @@
+"""
+Functions for reusing the results of operation type tests whose inputs have
+not changed.
+
+A test result is recorded with a hash of everything the test depends on:
+the protocol, test and definition files of the operation type, the source of
+the libraries it needs, and the Aquarium instance it was run on.
+While the hash is unchanged, the recorded result is reported instead of
+running the test again.
+
+The results live in a file at the root of the pfish directory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import dependencies
+
+from writer import write_if_changed
+
+CACHE_FILE = '.pfish_test_cache.json'
+
+# files of an operation type that a test depends on
+TEST_FILES = ['protocol.rb', 'test.rb', 'definition.json']
+
+
+def cache_file_path(root):
+    return os.path.join(root, CACHE_FILE)
+
+
+def read_bytes(file_path):
+    """Returns the content of the file, or None if it does not exist."""
+    try:
+        with open(file_path, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def test_key(*, root, path, url):
+    """
+    Returns the hash of the inputs of the test of an operation type.
+
+    Arguments:
+        root (String): the root of the pfish directory
+        path (String): the operation type directory
+        url (String): the url of the Aquarium instance the test runs on
+
+    Returns:
+        the hash, or None if a needed library is not in the pfish directory,
+        since a change to it could not be detected
+    """
+    libraries = dependencies.find_libraries(
+        root=root, path=path, file_names=['protocol.rb', 'test.rb'])
+    missing = [name for name, library_path in libraries.items()
+               if not library_path]
+    if missing:
+        logging.info(
+            'Not caching the test of %s, which needs libraries that are not '
+            'pulled: %s', path, ', '.join(sorted(missing)))
+        return None
+
+    digest = hashlib.sha256()
+
+    def add(label, content):
+        digest.update(label.encode('utf-8') + b'\0')
+        digest.update(b'\1' if content is None else content + b'\0')
+
+    add('url', url.encode('utf-8'))
+    for file_name in TEST_FILES:
+        add(file_name, read_bytes(os.path.join(path, file_name)))
+    for name, library_path in sorted(libraries.items()):
+        add(name, read_bytes(os.path.join(library_path, 'source.rb')))
+    return digest.hexdigest()
+
+
+def is_cacheable(response) -> bool:
+    """
+    Checks whether a test response depends only on the test inputs.
+
+    Errors of the generic error type can come from the server rather than
+    the protocol, so they are not reused.
+    """
+    if not isinstance(response, dict) or 'result' not in response:
+        return False
+    return not (response['result'] == 'error'
+                and response.get('error_type') == 'error')
+
+
+class ResultCache:
+    """
+    The last test result for each operation type in a pfish directory,
+    with the hash of the inputs it was run with.
+
+    Entries are keyed by the path of the operation type directory relative
+    to the root.
+    Looking up and recording results is safe from multiple threads.
+    """
+
+    def __init__(self, root, items=None):
+        self.root = root
+        self.items = items or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root):
+        """
+        Reads the test results for the directory at root.
+        Returns an empty cache if there are none.
+        """
+        file_path = cache_file_path(root)
+        try:
+            with open(file_path) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(root)
+        except json.JSONDecodeError as error:
+            logging.warning(
+                'Ignoring unreadable test cache %s: %s', file_path, error)
+            return cls(root)
+
+        return cls(root, data.get('items', {}))
+
+    def save(self):
+        """Writes the test results to the root directory."""
+        with self._lock:
+            data = {'items': self.items}
+            write_if_changed(
+                cache_file_path(self.root),
+                json.dumps(data, indent=2, sort_keys=True))
+
+    def path_key(self, path) -> str:
+        """Returns the cache key for the operation type directory at path."""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def lookup(self, path, key):
+        """
+        Returns the recorded test response for the operation type at path,
+        or None if there is none for the hash of its inputs.
+        """
+        if not key:
+            return None
+        with self._lock:
+            entry = self.items.get(self.path_key(path))
+        if not entry or entry['key'] != key:
+            return None
+        return entry['response']
+
+    def record(self, path, key, response):
+        """
+        Records the test response for the operation type at path,
+        if it can be reused.
+        """
+        with self._lock:
+            if key and is_cacheable(response):
+                self.items[self.path_key(path)] = {
+                    'key': key, 'response': response}
+            else:
+                self.items.pop(self.path_key(path), None)
@@ -12,14 +12,14 @@ from paths import (
     makedirectory,
     simplename
 )
+from writer import write_json_if_changed
 
 
 def exists(*, session, sample_type):
     """
     Checks whether a Sample Type named in definition exists in Aquarium
     """
-    sample_type = session.SampleType.where({'name': sample_type})
-    return bool(sample_type)
+    return bool(session.find_by_name('SampleType', sample_type))
 
 
 def create(*, session, sample_type, path):
@@ -45,6 +45,7 @@ def create(*, session, sample_type, path):
         smpl_type.field_types.append(data_ft)
 
     session.utils.create_sample_type(smpl_type)
+    session.invalidate('SampleType', smpl_type.name)
 
     logging.info('Created Sample Type %s ', smpl_type.name)
 
@@ -71,7 +72,6 @@ def read(*, path, sample_type):
     return data_dict
 
 
-# TODO: update so this doesn't rewrite the same file repeatedly
 def write_files(*, path, sample_type):
     """
     Writes the files associated with the sample_type to the path.
@@ -79,6 +79,9 @@ def write_files(*, path, sample_type):
     Arguments:
         path (String): the path to where the files will be written
         sample_type (ObjectType): the object type being written
+
+    Returns:
+        the path of the written file
     """
     logging.info('writing sample type %s', sample_type.name)
 
@@ -95,5 +98,5 @@ def write_files(*, path, sample_type):
     name = simplename(sample_type_ser['name'])
 
     file_path = (os.path.join(path, "{}.json".format(name)))
-    with open(file_path, 'w') as file:
-        file.write(json.dumps(sample_type_ser, indent=2))
+    write_json_if_changed(file_path, sample_type_ser)
+    return file_path
@@ -1,9 +1,41 @@
 """Functions to create an Aquarium session object through pydent"""
 
+import json
+import logging
+import os
+import threading
+import time
+import profiler
+
+from concurrent.futures import Future
+
 from config import get_config, config_file_path
 from pydent import AqSession
+from pydent.aqhttp import AqHTTP
+from pydent.exceptions import TridentRequestError
+from pydent.utils import logger, url_build
+
+# seconds a saved login is reused before pfish logs in again
+SESSION_LIFETIME = 12 * 60 * 60
+
+# Aquarium sessions kept between commands by a pfish server, keyed by the
+# instance name and credentials; None when sessions are not kept
+_kept_sessions = None
+_kept_sessions_lock = threading.Lock()
+
+
+def keep_sessions():
+    """
+    Keeps the Aquarium session for each instance after a command finishes,
+    so that later commands in the same process reuse it.
+    """
+    global _kept_sessions  # pylint: disable=global-statement
+    with _kept_sessions_lock:
+        if _kept_sessions is None:
+            _kept_sessions = {}
 
 
+@profiler.profiled('create_session', item='name')
 def create_session(*, path, name: str = None):
     """
     Creates an aquarium session connected to the named Aquarium instance.
@@ -12,7 +44,7 @@ def create_session(*, path, name: str = None):
         path (String): the config directory path
 
     Returns:
-        Aquarium Session Object
+        CachedSession wrapping the Aquarium Session Object
     """
     file_path = config_file_path(path)
     config = get_config(file_path)
@@ -24,14 +56,233 @@ def create_session(*, path, name: str = None):
         raise BadInstanceError(name)
 
     credentials = config["instances"][name]
-    session = AqSession(
+    key = (
+        name,
         credentials["login"],
         credentials["password"],
         credentials["aquarium_url"]
     )
+    with _kept_sessions_lock:
+        session = _kept_sessions.get(key) if _kept_sessions else None
+
+    if not session:
+        http = CachedLoginHTTP(
+            login=credentials["login"],
+            password=credentials["password"],
+            aquarium_url=credentials["aquarium_url"],
+            cache_path=session_cache_path(path, name)
+        )
+        session = AqSession(None, None, None, aqhttp=http)
+        session.set_verbose(False)
+
+        with _kept_sessions_lock:
+            if _kept_sessions is not None:
+                _kept_sessions[key] = session
+
+    # lookups are cached for one command, so a kept session is wrapped anew
+    return CachedSession(session)
+
+
+def session_cache_path(path, name):
+    """Returns the path of the saved login for the named instance."""
+    return os.path.join(path, 'sessions', '{}.json'.format(name))
+
+
+def read_session_cookies(*, cache_path, login, aquarium_url):
+    """
+    Returns the cookies saved for the login and URL,
+    or None if there are none or they have expired.
+
+    Arguments:
+        cache_path (String): the path of the saved login
+        login (String): the Aquarium login
+        aquarium_url (String): the URL of the Aquarium instance
+    """
+    try:
+        with open(cache_path) as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if data.get('login') != login or data.get('aquarium_url') != aquarium_url:
+        return None
+    if data.get('expires', 0) <= time.time():
+        return None
+
+    return data.get('cookies')
+
+
+def write_session_cookies(*, cache_path, login, aquarium_url, cookies):
+    """
+    Saves the cookies for the login and URL so they can be used by
+    later pfish commands.
+    The file is only readable by the user since the cookies grant access
+    to Aquarium.
+
+    Arguments:
+        cache_path (String): the path of the saved login
+        login (String): the Aquarium login
+        aquarium_url (String): the URL of the Aquarium instance
+        cookies (Dictionary): the session cookies
+    """
+    data = {
+        'login': login,
+        'aquarium_url': aquarium_url,
+        'expires': time.time() + SESSION_LIFETIME,
+        'cookies': cookies
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        descriptor = os.open(
+            cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(json.dumps(data, indent=2))
+    except OSError as error:
+        logging.warning('Unable to save login to %s: %s', cache_path, error)
+
+
+class CachedLoginHTTP(AqHTTP):
+    """
+    An Aquarium connection that reuses the login saved by an earlier pfish
+    command, and saves its own login for later commands.
+
+    If Aquarium rejects the saved login, the connection logs in again and
+    retries the request once.
+    """
+
+    def __init__(self, *, login, password, aquarium_url, cache_path):
+        self._password = password
+        self._cache_path = cache_path
+
+        cookies = read_session_cookies(
+            cache_path=cache_path, login=login, aquarium_url=aquarium_url)
+        if not cookies:
+            super().__init__(login, password, aquarium_url)
+            self._save_cookies()
+            return
+
+        # the same attributes as AqHTTP.__init__, without logging in
+        self.login = login
+        self.aquarium_url = aquarium_url
+        self._requests_session = None
+        self.timeout = self.__class__.TIMEOUT
+        self.cookies = cookies
+        self.log = logger(name="AqHTTP@{}".format(aquarium_url))
+        self._using_requests = True
+        self.num_requests = 0
+
+    def _save_cookies(self):
+        write_session_cookies(
+            cache_path=self._cache_path,
+            login=self.login,
+            aquarium_url=self.aquarium_url,
+            cookies=self.cookies
+        )
+
+    def _is_rejected_login(self, error):
+        response = getattr(error, 'response', None)
+        if response is None:
+            return False
+        return (response.status_code in (401, 403)
+                or response.url == url_build(self.aquarium_url, 'signin'))
+
+    def _login(self, login, password):
+        with profiler.request('post', 'sessions.json'):
+            super()._login(login, password)
+
+    def _request(self, method, path, **kwargs):
+        with profiler.request(method, path, kwargs.get('json')):
+            return super().request(method, path, **kwargs)
+
+    def request(self, method, path, timeout=None, allow_none=True, **kwargs):
+        try:
+            return self._request(
+                method, path, timeout=timeout, allow_none=allow_none, **kwargs)
+        except TridentRequestError as error:
+            if not self._is_rejected_login(error):
+                raise
+
+        logging.info('Saved login for %s expired, logging in again',
+                     self.aquarium_url)
+        self._login(self.login, self._password)
+        self._save_cookies()
+        return self._request(
+            method, path, timeout=timeout, allow_none=allow_none, **kwargs)
+
+
+class CachedSession:
+    """
+    Wraps an Aquarium session for a single pfish command, and memoizes
+    lookups of records by name and of the current user.
+
+    Attributes that are not defined here are those of the wrapped session,
+    so a CachedSession can be used wherever an Aquarium session is expected.
+
+    Each lookup is made once, even when several threads ask for it at the
+    same time: the first thread makes the request, and the others wait for
+    its result.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def _memoize(self, key, lookup):
+        """
+        Returns the result of lookup for the key, calling it only if no
+        other call for the key has finished or is in progress.
+        A lookup that raises is not kept, so it is tried again.
+        """
+        with self._lock:
+            future = self._records.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._records[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(lookup())
+            except Exception as error:
+                with self._lock:
+                    if self._records.get(key) is future:
+                        del self._records[key]
+                future.set_exception(error)
+        return future.result()
+
+    def find_by_name(self, model_name, name):
+        """
+        Returns the first record of the model with the name, or None.
+
+        Arguments:
+            model_name (String): the model, e.g. SampleType or ObjectType
+            name (String): the name of the record
+        """
+        def lookup():
+            records = getattr(self._session, model_name).where({'name': name})
+            return records[0] if records else None
+
+        return self._memoize((model_name, name), lookup)
+
+    def invalidate(self, model_name, name):
+        """
+        Forgets the lookup of the named record,
+        e.g. after pfish has created it.
+        """
+        with self._lock:
+            self._records.pop((model_name, name), None)
+
+    def user_id(self):
+        """Returns the id of the user logged in to the session."""
+        def lookup():
+            users = self._session.User.where({'login': self._session.login})
+            return users[0].id if users else None
 
-    session.set_verbose(False)
-    return session
+        return self._memoize(('User', None), lookup)
 
 
 class BadInstanceError(Exception):
@@ -0,0 +1,153 @@
+"""
+Functions for comparing a pfish directory to the manifest recorded by the
+last pull or push, without contacting Aquarium.
+"""
+
+import logging
+import os
+
+from manifest import Manifest, file_hash, find_root, hash_files
+
+MODIFIED = 'modified'
+NEW = 'new'
+DELETED = 'deleted'
+
+# directories at the root of a pfish directory that hold type files
+TYPE_DIRECTORIES = ['object_types', 'sample_types']
+
+# directories in a category that hold operation types and libraries
+ITEM_DIRECTORIES = ['libraries', 'operation_types']
+
+
+def list_directories(path):
+    """Returns the sorted paths of the visible subdirectories of path."""
+    try:
+        entries = sorted(os.listdir(path))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return [
+        os.path.join(path, entry) for entry in entries
+        if not entry.startswith('.') and os.path.isdir(os.path.join(path, entry))
+    ]
+
+
+def find_items(root):
+    """
+    Finds the operation types, libraries, sample types and object types in
+    a pfish directory.
+
+    Arguments:
+        root (String): the root of the pfish directory
+
+    Returns:
+        List of paths of operation type and library directories,
+        and of sample type and object type files
+    """
+    items = []
+    for directory in list_directories(root):
+        if os.path.basename(directory) in TYPE_DIRECTORIES:
+            items.extend(
+                os.path.join(directory, entry)
+                for entry in sorted(os.listdir(directory))
+                if entry.endswith('.json')
+                and os.path.isfile(os.path.join(directory, entry)))
+            continue
+
+        for subdirectory in ITEM_DIRECTORIES:
+            items.extend(
+                list_directories(os.path.join(directory, subdirectory)))
+    return items
+
+
+def current_files(path):
+    """
+    Returns the content hashes of the synced files of the item at path,
+    in the form recorded in the manifest.
+    """
+    if os.path.isdir(path):
+        return hash_files(path)
+    if os.path.isfile(path):
+        return {os.path.basename(path): file_hash(path)}
+    return {}
+
+
+def compare(*, sync_manifest, path):
+    """
+    Compares the items under path with the manifest.
+
+    Arguments:
+        sync_manifest (Manifest): the manifest for the pfish directory
+        path (String): the pfish directory or a directory within it
+
+    Returns:
+        List of (state, key) pairs, sorted by key, where state is one of
+        MODIFIED, NEW, or DELETED and key is the path of the item relative
+        to the root of the pfish directory
+    """
+    prefix = sync_manifest.key(path)
+    prefix = '' if prefix == '.' else prefix + '/'
+
+    def in_scope(key):
+        return (key + '/').startswith(prefix)
+
+    changes = []
+    found = set()
+    for item_path in find_items(sync_manifest.root):
+        key = sync_manifest.key(item_path)
+        if not in_scope(key):
+            continue
+        found.add(key)
+
+        entry = sync_manifest.items.get(key)
+        if not entry:
+            changes.append((NEW, key))
+        elif entry['files'] != current_files(item_path):
+            changes.append((MODIFIED, key))
+
+    for key in sync_manifest.items:
+        if key not in found and in_scope(key):
+            changes.append((DELETED, key))
+
+    return sorted(changes, key=lambda change: change[1])
+
+
+def show(*, path):
+    """
+    Prints the operation types, libraries, sample types and object types
+    under path that were modified, added, or deleted since the last pull
+    or push.
+
+    Arguments:
+        path (String): the pfish directory or a directory within it
+
+    Returns:
+        List of (state, key) pairs for the changed items,
+        or None if there is no manifest for the path
+    """
+    root = find_root(path)
+    if not root:
+        logging.error(
+            'No pfish manifest found at or above %s. Pull the files first.',
+            path)
+        return None
+
+    changes = compare(sync_manifest=Manifest.load(root), path=path)
+    print_changes(changes, empty='No changes since the last pull or push')
+    return changes
+
+
+def print_changes(changes, *, empty):
+    """
+    Prints a line with the state and key of each change.
+
+    Arguments:
+        changes (List): (state, key) pairs
+        empty (String): the message printed if there are no changes
+    """
+    if not changes:
+        print(empty)
+        return
+
+    state_width = max(len(state) for state, _ in changes)
+    for state, key in changes:
+        print('{:<{width}}  {}'.format(state + ':', key, width=state_width + 1))
@@ -0,0 +1,36 @@
+"""
+Tracks the sample types and object types written during a single pull
+"""
+
+import threading
+
+
+class TypeRegistry:
+    """
+    Records which sample types and object types have been written,
+    keyed by model name and Aquarium id.
+    Claiming a type is safe from multiple threads.
+    """
+
+    def __init__(self):
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    def claim(self, model_name, type_id) -> bool:
+        """
+        Claims the type for writing.
+
+        Returns:
+            True if the type had not already been claimed during this run
+        """
+        key = (model_name, type_id)
+        with self._lock:
+            if key in self._claimed:
+                return False
+            self._claimed.add(key)
+            return True
+
+    def release(self, model_name, type_id):
+        """Releases a claimed type so that it can be written again."""
+        with self._lock:
+            self._claimed.discard((model_name, type_id))
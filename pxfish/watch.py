@@ -0,0 +1,222 @@
+"""
+Functions for pushing operation types and libraries as their files are
+edited.
+
+The pfish directory is polled for changes to code and definition files.
+Once a burst of saves has settled, each changed file is mapped to its
+operation type or library through the definition file in its directory,
+and only the changed code components are pushed, over the session opened
+when watching started.
+"""
+
+import logging
+import os
+import time
+import definition
+import library
+import operation_type
+import workers
+
+from category import describe_path
+
+# seconds between checks for changed files
+POLL_INTERVAL = 0.2
+
+# seconds without further changes before changed files are pushed
+DEBOUNCE = 0.3
+
+DEFINITION_FILE = 'definition.json'
+
+
+def is_watched(file_name) -> bool:
+    """Checks whether edits to the named file are pushed."""
+    return file_name.endswith('.rb') or file_name == DEFINITION_FILE
+
+
+def snapshot(path):
+    """
+    Records the modification time and size of each code and definition file
+    under path, skipping hidden directories.
+
+    Returns:
+        Dictionary with file paths as keys and (mtime, size) pairs as values
+    """
+    files = {}
+    for directory, subdirectories, file_names in os.walk(path):
+        subdirectories[:] = sorted(
+            name for name in subdirectories if not name.startswith('.'))
+        for file_name in file_names:
+            if not is_watched(file_name):
+                continue
+            file_path = os.path.join(directory, file_name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            files[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def changed_files(before, after):
+    """
+    Returns the sorted paths of the files that were added or modified
+    between two snapshots.
+    """
+    return sorted(
+        file_path for file_path, state in after.items()
+        if before.get(file_path) != state
+    )
+
+
+class ChangeCollector:
+    """
+    Collects changed files across polls, and releases them once no file has
+    changed for the debounce period.
+    """
+
+    def __init__(self, path, *, debounce=DEBOUNCE):
+        self.path = path
+        self.debounce = debounce
+        self.files = snapshot(path)
+        self.pending = set()
+        self.last_change = None
+
+    def poll(self, now):
+        """
+        Checks for changed files.
+
+        Arguments:
+            now (Float): the current time.monotonic() value
+
+        Returns:
+            the sorted paths of the changed files once the changes have
+            settled, otherwise an empty list
+        """
+        current = snapshot(self.path)
+        changed = changed_files(self.files, current)
+        self.files = current
+        if changed:
+            self.pending.update(changed)
+            self.last_change = now
+            return []
+
+        if not self.pending or now - self.last_change < self.debounce:
+            return []
+
+        ready = sorted(self.pending)
+        self.pending = set()
+        return ready
+
+
+def group_changes(file_paths):
+    """
+    Maps changed files to the operation types and libraries they belong to.
+
+    Files in directories without a definition file are ignored.
+
+    Arguments:
+        file_paths (List): paths of changed code and definition files
+
+    Returns:
+        Dictionary with the paths of the operation type and library
+        directories as keys, and the sets of changed file names as values
+    """
+    changes = {}
+    for file_path in file_paths:
+        item_path, file_name = os.path.split(file_path)
+        if not os.path.isfile(os.path.join(item_path, DEFINITION_FILE)):
+            logging.debug('Ignoring %s outside an operation type or library',
+                          file_path)
+            continue
+        changes.setdefault(item_path, set()).add(file_name)
+    return changes
+
+
+def push_changes(*, session, item_path, file_names):
+    """
+    Pushes the changed files of an operation type or library.
+
+    Only the code components whose files changed are pushed, and the field
+    types of an operation type are only pushed if its definition changed.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        item_path (String): the operation type or library directory
+        file_names (Set): names of the changed files
+
+    Returns:
+        CodeUpdates for the pushed code components,
+        or None if nothing was pushed
+    """
+    definitions = definition.read(item_path)
+
+    if definition.is_library(definitions):
+        return library.push(session=session, path=item_path)
+
+    if not definition.is_operation_type(definitions):
+        logging.warning('No Operation Type or Library at %s', item_path)
+        return None
+
+    component_names = [
+        name for name in operation_type.all_component_names()
+        if '{}.rb'.format(name) in file_names
+    ]
+    return operation_type.push(
+        session=session,
+        path=item_path,
+        component_names=component_names,
+        push_field_types=DEFINITION_FILE in file_names
+    )
+
+
+def push_files(*, session, file_paths):
+    """
+    Pushes the operation types and libraries with changed files,
+    libraries first, and logs the outcome of each push.
+
+    Returns:
+        List of JobResult, one for each operation type and library
+    """
+    changes = group_changes(file_paths)
+    item_paths = sorted(
+        changes,
+        key=lambda item_path: (not library.is_library(item_path), item_path))
+
+    def push_item(item_path):
+        return push_changes(
+            session=session,
+            item_path=item_path,
+            file_names=changes[item_path]) or False
+
+    results = workers.run_jobs(
+        items=item_paths, function=push_item, describe=describe_path)
+    for result in results:
+        if result.status == workers.SUCCEEDED:
+            logging.info('Pushed %s: %s', result.name,
+                         ', '.join(result.value.uploaded) or 'no changes')
+    return results
+
+
+def watch(*, session, path, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """
+    Pushes edited operation types and libraries under path until interrupted.
+
+    Arguments:
+        session (Session Object): Aquarium session object
+        path (String): the directory to watch
+        poll_interval (Float): seconds between checks for changed files
+        debounce (Float): seconds without changes before pushing
+    """
+    collector = ChangeCollector(path, debounce=debounce)
+    logging.info('Watching %s for changes; press Ctrl-C to stop', path)
+    try:
+        while True:
+            time.sleep(poll_interval)
+            file_paths = collector.poll(time.monotonic())
+            if file_paths:
+                started = time.monotonic()
+                push_files(session=session, file_paths=file_paths)
+                logging.info('Pushed in %.2f seconds',
+                             time.monotonic() - started)
+    except KeyboardInterrupt:
+        logging.info('Stopped watching %s', path)
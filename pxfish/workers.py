@@ -0,0 +1,167 @@
+"""
+Functions for running pull, push, and test jobs on a pool of worker threads
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SUCCEEDED = 'succeeded'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+JobResult = namedtuple(
+    'JobResult', ['name', 'status', 'error', 'messages', 'value'],
+    defaults=[None])
+
+_current_job = threading.local()
+
+
+class JobLogHandler(logging.Handler):
+    """
+    Collects log messages emitted by a running job so they can be reported
+    with the result for that job.
+    """
+
+    def emit(self, record):
+        messages = getattr(_current_job, 'messages', None)
+        if messages is not None:
+            messages.append(self.format(record))
+
+
+def run_job(*, name, function, item):
+    """
+    Calls function on item, capturing errors and log messages.
+
+    If the function returns False the job is reported as skipped.
+    Otherwise the value returned by the function is kept in the result.
+
+    Arguments:
+        name (String): the name used to report the job
+        function (Function): function taking a single item
+        item (Object): the argument for the function
+
+    Returns:
+        JobResult for the job
+    """
+    messages = []
+    _current_job.messages = messages
+    try:
+        value = function(item)
+    except Exception as error:  # pylint: disable=broad-except
+        # stop capturing first, so that the failure is not also reported
+        # among the job's messages
+        _current_job.messages = None
+        logging.error('%s failed: %s', name, error)
+        return JobResult(name, FAILED, error, messages)
+    finally:
+        _current_job.messages = None
+
+    status = SKIPPED if value is False else SUCCEEDED
+    return JobResult(name, status, None, messages, value)
+
+
+def run_jobs(*, items, function, describe=str, jobs: int = 1, on_result=None):
+    """
+    Runs function on each item using up to jobs worker threads.
+
+    An error raised for one item is recorded in its result and does not stop
+    the remaining jobs.
+    An interrupt, such as Ctrl-C, cancels the jobs that have not started,
+    waits for the running jobs, and is raised again.
+
+    Arguments:
+        items (List): the items to be processed
+        function (Function): function taking a single item
+        describe (Function): returns the name used to report an item
+        jobs (Int): the maximum number of jobs to run at once
+        on_result (Function): called with each JobResult as soon as its job
+                              finishes, in the order jobs finish
+
+    Returns:
+        List of JobResult, in the same order as items
+    """
+    handler = JobLogHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+
+    def job(item):
+        return run_job(name=describe(item), function=function, item=item)
+
+    def finished(result):
+        if on_result:
+            on_result(result)
+        return result
+
+    try:
+        if not jobs or jobs <= 1:
+            return [finished(job(item)) for item in items]
+
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            futures = [executor.submit(job, item) for item in items]
+            for future in as_completed(futures):
+                finished(future.result())
+            return [future.result() for future in futures]
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            executor.shutdown(wait=True)
+    finally:
+        root_logger.removeHandler(handler)
+
+
+def report(results, *, action):
+    """
+    Logs the number of succeeded, skipped, and failed jobs,
+    along with the messages logged by each failed job.
+
+    Arguments:
+        results (List): list of JobResult
+        action (String): description of the jobs, used in the log message
+    """
+    failures = [result for result in results if result.status == FAILED]
+    skipped = [result for result in results if result.status == SKIPPED]
+
+    for failure in failures:
+        logging.error(
+            'Failed to %s %s: %s\n%s',
+            action, failure.name, failure.error, '\n'.join(failure.messages))
+
+    logging.info(
+        '%s: %d succeeded, %d skipped, %d failed',
+        action.capitalize(),
+        len(results) - len(failures) - len(skipped),
+        len(skipped),
+        len(failures)
+    )
+
+
+def print_table(results, *, details=None):
+    """
+    Prints a table with the name and status of each job.
+
+    Arguments:
+        results (List): list of JobResult
+        details (Function): returns extra text to show for a result
+    """
+    rows = []
+    for result in results:
+        if result.status == FAILED:
+            detail = str(result.error)
+        elif details:
+            detail = details(result)
+        else:
+            detail = ''
+        rows.append((result.name, result.status, detail))
+
+    name_width = max([len('Name')] + [len(row[0]) for row in rows])
+    status_width = max(len(status) for status in ['Status', SUCCEEDED])
+    row_format = '{:<%d}  {:<%d}  {}' % (name_width, status_width)
+
+    print(row_format.format('Name', 'Status', 'Details').rstrip())
+    for row in rows:
+        print(row_format.format(*row).rstrip())
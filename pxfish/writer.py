@@ -0,0 +1,74 @@
+"""
+Functions for writing pulled files.
+
+Files are only written when their content changes, so that pulling files
+that have not changed leaves them, and their modification times, alone.
+Changed files are written to a temporary file in the same directory and
+then renamed over the old file, so an interrupted pull never leaves a
+partly written file.
+
+Files are read and written without newline translation, so that content
+with \r\n line endings compares equal to the file it was written to.
+"""
+
+import json
+import os
+import threading
+
+
+def write_if_changed(file_path, content) -> bool:
+    """
+    Writes content to the file, unless the file already has that content.
+
+    Arguments:
+        file_path (String): the path of the file to write
+        content (String): the text to write
+
+    Returns:
+        True if the file was written, False if it was already current
+    """
+    if read_existing(file_path) == content:
+        return False
+
+    temporary_path = '{}.{}.{}.tmp'.format(
+        os.path.join(os.path.dirname(file_path),
+                     '.' + os.path.basename(file_path)),
+        os.getpid(),
+        threading.get_ident()
+    )
+    try:
+        with open(temporary_path, 'w', newline='') as file:
+            file.write(content)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return True
+
+
+def write_json_if_changed(file_path, data) -> bool:
+    """
+    Writes data as indented JSON to the file,
+    unless the file already has that content.
+
+    Arguments:
+        file_path (String): the path of the file to write
+        data (Object): the JSON serializable data to write
+
+    Returns:
+        True if the file was written, False if it was already current
+    """
+    return write_if_changed(file_path, json.dumps(data, indent=2))
+
+
+def read_existing(file_path):
+    """
+    Returns the content of the file,
+    or None if it does not exist or cannot be read as text.
+    """
+    try:
+        with open(file_path, newline='') as file:
+            return file.read()
+    except (OSError, UnicodeError):
+        return None
@@ -0,0 +1,29 @@
+import json
+import bench
+
+
+class TestBench:
+
+    def test_run(self, tmpdir):
+        report = bench.run(
+            benchmarks=['pull', 'push_category'],
+            size={'categories': 2, 'operation_types': 4, 'libraries': 2},
+            path=str(tmpdir)
+        )
+
+        assert report['config']['operation_types'] == 4
+        assert [result['name'] for result in report['results']] == [
+            'pull', 'push_category']
+        pull, push = report['results']
+        assert pull['requests_by_kind']['OperationType.all'] == 1
+        assert pull['bytes_received'] > pull['bytes_sent'] > 0
+        assert push['requests'] > 0
+        assert push['peak_rss'] > 0
+        assert tmpdir.join('category_1', 'operation_types').check(dir=1)
+
+    def test_write_results(self, tmpdir):
+        report = {'config': {}, 'python': '3', 'results': []}
+        file_path = str(tmpdir.join('bench.json'))
+        bench.write_results(report, file_path)
+        with open(file_path) as file:
+            assert json.load(file) == report
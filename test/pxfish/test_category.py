@@ -0,0 +1,193 @@
+import json
+import os
+from types import SimpleNamespace
+import pytest
+import instance
+import operation_type
+import status
+from pydent import AqSession
+from bench import edit_protocols
+from category import (
+    push,
+    run_tests
+)
+from fake_aquarium import FakeAquarium, generate_dataset, running
+from manifest import Manifest
+from protocol_test import SUMMARY_FILE
+from session import CachedSession
+
+
+@pytest.fixture
+def category_path(tmpdir):
+    path = tmpdir.mkdir('cloning')
+    for name in ['gradient_pcr', 'stripwell_methods']:
+        path.ensure_dir('libraries', name)
+    for name in ['run_gel', 'order_primer', 'broken']:
+        path.ensure_dir('operation_types', name)
+    return str(path)
+
+
+class TestCategory:
+
+    def test_push_libraries_first(self, category_path, mocker, capsys):
+        pushed = []
+
+        def push_library(*, session, path, sync_manifest):
+            pushed.append(path)
+            return SimpleNamespace(uploaded=['source'], skipped=[])
+
+        def push_operation_type(*, session, path, sync_manifest):
+            pushed.append(path)
+            if path.endswith('broken'):
+                raise ValueError('bad definition')
+            if path.endswith('order_primer'):
+                return None
+            return SimpleNamespace(uploaded=[], skipped=['protocol'])
+
+        mocker.patch('library.push', side_effect=push_library)
+        mocker.patch('operation_type.push', side_effect=push_operation_type)
+
+        results = push(session=None, path=category_path, jobs=3)
+
+        kinds = [path.split('/')[-2] for path in pushed]
+        assert kinds[:2] == ['libraries', 'libraries']
+        assert set(kinds[2:]) == {'operation_types'}
+
+        statuses = {result.name: result.status for result in results}
+        assert statuses == {
+            'cloning/libraries/gradient_pcr': 'succeeded',
+            'cloning/libraries/stripwell_methods': 'succeeded',
+            'cloning/operation_types/broken': 'failed',
+            'cloning/operation_types/order_primer': 'skipped',
+            'cloning/operation_types/run_gel': 'succeeded',
+        }
+
+        table = capsys.readouterr().out
+        assert 'bad definition' in table
+        assert 'uploaded 0, unchanged 1' in table
+
+    def test_push_resume(self, category_path, mocker):
+        pushed = []
+
+        def push_entry(*, session, path, sync_manifest):
+            pushed.append(path)
+            if path.endswith('broken'):
+                raise ValueError('bad definition')
+            return None
+
+        mocker.patch('library.push', side_effect=push_entry)
+        mocker.patch('operation_type.push', side_effect=push_entry)
+
+        push(session=None, path=category_path)
+        pushed.clear()
+        results = push(session=None, path=category_path, resume=True)
+
+        assert [path.split('/')[-1] for path in pushed] == ['broken']
+        statuses = [result.status for result in results]
+        assert statuses.count('skipped') == 4
+
+    def test_run_tests_writes_summary(self, category_path, mocker):
+        responses = {
+            'run_gel': {'result': 'passed'},
+            'order_primer': {
+                'result': 'error',
+                'error_type': 'assertion_failure',
+                'message': 'expected 2 gels'
+            },
+            'broken': None,
+        }
+
+        mocker.patch('definition.read', side_effect=lambda path: {
+            'category': 'Cloning', 'name': path.split('/')[-1]})
+        mocker.patch(
+            'operation_type.run_test',
+            side_effect=lambda **kwargs: responses[kwargs['name']])
+
+        results = run_tests(
+            session=None, path=category_path, name='Cloning', jobs=2)
+        assert len(results) == 3
+
+        with open(os.path.join(category_path, SUMMARY_FILE)) as file:
+            summary = json.load(file)
+        assert summary['total'] == 3
+        assert summary['passed'] == 1
+        assert summary['failed'] == 1
+        assert summary['not_run'] == 1
+
+    def test_concurrent_tests_record_pushes(self, tmpdir):
+        aquarium = generate_dataset(
+            FakeAquarium(), categories=1, operation_types=16)
+        with running(aquarium) as url:
+            session = CachedSession(
+                AqSession(aquarium.login, aquarium.password, url))
+            instance.pull(session=session, path=str(tmpdir))
+            category_path = str(tmpdir.join('category_1'))
+            edit_protocols(category_path)
+
+            results = run_tests(
+                session=session, path=category_path, name='Category 1',
+                jobs=8, use_cache=False)
+
+        assert len(results) == 16
+        assert status.compare(
+            sync_manifest=Manifest.load(str(tmpdir)), path=str(tmpdir)) == []
+
+    def test_push_after_tests(self, tmpdir, caplog):
+        aquarium = generate_dataset(
+            FakeAquarium(), categories=1, operation_types=2)
+        with running(aquarium) as url:
+            session = CachedSession(
+                AqSession(aquarium.login, aquarium.password, url))
+            instance.pull(session=session, path=str(tmpdir))
+            category_path = str(tmpdir.join('category_1'))
+            run_tests(session=session, path=category_path, name='Category 1')
+            assert os.path.isfile(os.path.join(category_path, SUMMARY_FILE))
+
+            caplog.clear()
+            results = push(session=session, path=category_path)
+
+        assert len(results) == 4
+        assert not [record for record in caplog.records
+                    if record.levelname == 'WARNING']
+
+    def test_resume_after_interrupt(self, tmpdir, mocker):
+        aquarium = generate_dataset(
+            FakeAquarium(), categories=1, operation_types=6)
+
+        def interrupt_third(function):
+            calls = []
+
+            def interrupted(**kwargs):
+                calls.append(kwargs)
+                if len(calls) == 3:
+                    raise KeyboardInterrupt
+                return function(**kwargs)
+            return interrupted
+
+        with running(aquarium) as url:
+            session = CachedSession(
+                AqSession(aquarium.login, aquarium.password, url))
+
+            write = mocker.patch(
+                'operation_type.write_files',
+                side_effect=interrupt_third(operation_type.write_files))
+            with pytest.raises(KeyboardInterrupt):
+                instance.pull(session=session, path=str(tmpdir))
+            mocker.stop(write)
+            instance.pull(session=session, path=str(tmpdir), resume=True)
+            assert status.compare(
+                sync_manifest=Manifest.load(str(tmpdir)),
+                path=str(tmpdir)) == []
+
+            category_path = str(tmpdir.join('category_1'))
+            edit_protocols(category_path)
+            operation_type_push = mocker.patch(
+                'operation_type.push',
+                side_effect=interrupt_third(operation_type.push))
+            with pytest.raises(KeyboardInterrupt):
+                push(session=session, path=category_path)
+            mocker.stop(operation_type_push)
+            push(session=session, path=category_path, resume=True)
+
+        assert status.compare(
+            sync_manifest=Manifest.load(str(tmpdir)), path=str(tmpdir)) == []
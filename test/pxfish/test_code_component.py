@@ -7,7 +7,8 @@ from pxfish.code_component import (
     add_default_content,
     create_code_object,
     create_code_objects,
-    read
+    read,
+    update_code_objects
 )
 
 
@@ -68,3 +69,74 @@ class TestCode:
         code_objects = create_code_objects(session=session, component_names=['protocol'])
         
         assert 'protocol' in code_objects
+
+    def test_update_skips_unchanged(self, tmpdir):
+        path = tmpdir.mkdir('update')
+        path.join('protocol.rb').write('unchanged content')
+        path.join('test.rb').write('changed content')
+
+        class MockParent:
+            id = 1
+            name = 'DummyType'
+
+            @staticmethod
+            def code(name):
+                return pydent.models.Code(name=name, content='unchanged content')
+
+        class MockCodeInterface:
+            @staticmethod
+            def new(**kwargs):
+                return pydent.models.Code(**kwargs)
+
+        class MockUtils:
+            def __init__(self):
+                self.updated = []
+
+            def update_code(self, code):
+                self.updated.append(code.name)
+
+        class MockSession:
+            def __init__(self):
+                self.Code = MockCodeInterface
+                self.utils = MockUtils()
+
+        session = MockSession()
+        updates = update_code_objects(
+            component_names=['protocol', 'test'],
+            parent_object=MockParent,
+            parent_class='OperationType',
+            user_id=1,
+            session=session,
+            path=str(path)
+        )
+        assert session.utils.updated == ['test']
+        assert updates.uploaded == ['test']
+        assert updates.skipped == ['protocol']
+
+    def test_write_unchanged(self, tmpdir):
+        path = str(tmpdir)
+        code_object = pydent.models.Code(name='source', content='code')
+        write(path=path, file_name='source.rb', code_object=code_object)
+        file_path = os.path.join(path, 'source.rb')
+        os.utime(file_path, (0, 0))
+
+        write(path=path, file_name='source.rb', code_object=code_object)
+        assert os.path.getmtime(file_path) == 0
+
+        code_object.content = 'changed code'
+        write(path=path, file_name='source.rb', code_object=code_object)
+        assert os.path.getmtime(file_path) > 0
+        assert os.listdir(path) == ['source.rb']
+
+    def test_write_unchanged_crlf(self, tmpdir):
+        path = str(tmpdir)
+        code_object = pydent.models.Code(
+            name='source', content='def main\r\n  show\r\nend\r\n')
+        write(path=path, file_name='source.rb', code_object=code_object)
+        file_path = os.path.join(path, 'source.rb')
+        with open(file_path, 'rb') as file:
+            assert file.read() == b'def main\r\n  show\r\nend\r\n'
+        os.utime(file_path, (0, 0))
+
+        write(path=path, file_name='source.rb', code_object=code_object)
+        assert os.path.getmtime(file_path) == 0
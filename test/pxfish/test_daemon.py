@@ -0,0 +1,87 @@
+import logging
+import os
+import sys
+import threading
+import pytest
+from daemon import (
+    ServerRunningError,
+    create_server,
+    send_command,
+    should_forward,
+    socket_path
+)
+
+EXIT_CODES = {'none': None, 'zero': 0, 'three': 3, 'message': 'stopped'}
+
+
+@pytest.fixture
+def server(tmpdir):
+    commands = []
+
+    def run_command(argv):
+        commands.append((argv, os.getcwd()))
+        if argv == ['fail']:
+            raise ValueError('command failed')
+        if argv[0] == 'exit':
+            sys.exit(EXIT_CODES[argv[1]])
+        print('output for', ' '.join(argv))
+        logging.warning('log for %s', ' '.join(argv))
+
+    path = socket_path(str(tmpdir))
+    server = create_server(path=path, run_command=run_command)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path, commands
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestDaemon:
+
+    def test_command_runs_in_client_directory(self, server, tmpdir, capsys):
+        path, commands = server
+        cwd = str(tmpdir.mkdir('work'))
+
+        status = send_command(path=path, argv=['pull', '-a'], cwd=cwd)
+
+        assert status == 0
+        assert commands == [(['pull', '-a'], cwd)]
+        captured = capsys.readouterr()
+        assert 'output for pull -a' in captured.out
+        assert 'log for pull -a' in captured.err
+
+    def test_failed_command(self, server, tmpdir, capsys):
+        path, _ = server
+        status = send_command(path=path, argv=['fail'], cwd=str(tmpdir))
+        assert status == 1
+        assert 'command failed' in capsys.readouterr().err
+
+    @pytest.mark.parametrize('code,expected', [
+        ('none', 0), ('zero', 0), ('three', 3), ('message', 1)])
+    def test_exit_status(self, server, tmpdir, code, expected):
+        path, _ = server
+        status = send_command(
+            path=path, argv=['exit', code], cwd=str(tmpdir))
+        assert status == expected
+
+    def test_only_one_server(self, server):
+        path, _ = server
+        with pytest.raises(ServerRunningError):
+            create_server(path=path, run_command=print)
+
+    def test_no_server(self, tmpdir):
+        path = socket_path(str(tmpdir))
+        assert send_command(path=path, argv=['pull'], cwd='.') is None
+
+    def test_should_forward(self, monkeypatch):
+        monkeypatch.delenv('PFISH_NO_DAEMON', raising=False)
+        assert should_forward(['push', '-a'])
+        assert not should_forward(['serve'])
+        assert not should_forward(['configure', 'show'])
+        assert not should_forward(['watch'])
+        assert not should_forward(['bench'])
+        assert not should_forward(['--profile', 'push', '-a'])
+        assert not should_forward([])
+        monkeypatch.setenv('PFISH_NO_DAEMON', '1')
+        assert not should_forward(['push', '-a'])
@@ -0,0 +1,73 @@
+import os
+import pytest
+from dependencies import INDEX_FILE, DependencyIndex, find_affected
+from manifest import Manifest
+from status import current_files, find_items
+
+
+@pytest.fixture
+def root(tmpdir):
+    def write_item(category, kind, name, files):
+        path = tmpdir.ensure_dir(category, kind, name)
+        path.join('definition.json').write('{}')
+        for file_name, content in files.items():
+            path.join(file_name).write(content)
+
+    write_item('standard_libs', 'libraries', 'debug', {
+        'source.rb': 'module Debug; end'})
+    write_item('cloning', 'libraries', 'gel_helpers', {
+        'source.rb': "needs 'Standard Libs/Debug'\nmodule GelHelpers; end"})
+    write_item('cloning', 'operation_types', 'run_gel', {
+        'protocol.rb': "needs 'Cloning/Gel Helpers'", 'test.rb': ''})
+    write_item('cloning', 'operation_types', 'extract_gel', {
+        'protocol.rb': '', 'test.rb': "needs 'Standard Libs/Debug'"})
+    write_item('cloning', 'operation_types', 'order_primer', {
+        'protocol.rb': '', 'test.rb': ''})
+    return tmpdir
+
+
+def names(paths):
+    return [os.path.basename(path) for path in paths]
+
+
+class TestDependencies:
+
+    def test_affected_transitively(self, root):
+        assert names(find_affected(
+            path=str(root), library='Standard Libs/Debug')) == [
+                'extract_gel', 'run_gel']
+        assert names(find_affected(
+            path=str(root),
+            library=str(root.join('cloning', 'libraries', 'gel_helpers')))) == [
+                'run_gel']
+        assert root.join(INDEX_FILE).exists()
+
+    def test_unknown_library(self, root):
+        assert find_affected(path=str(root), library='Cloning/Missing') is None
+
+    def test_incremental_update(self, root):
+        index = DependencyIndex(str(root))
+        assert index.update() == 5
+        assert index.update() == 0
+
+        protocol = root.join('cloning', 'operation_types', 'order_primer',
+                             'protocol.rb')
+        protocol.write("needs 'Cloning/Gel Helpers'\n")
+        assert index.update() == 1
+        assert index.affected(['cloning/libraries/gel_helpers']) == [
+            'cloning/operation_types/order_primer',
+            'cloning/operation_types/run_gel'
+        ]
+
+    def test_changed(self, root):
+        manifest = Manifest(str(root))
+        for item in find_items(str(root)):
+            manifest.items[manifest.key(item)] = {'files': current_files(item)}
+        manifest.save()
+        root.join('cloning', 'libraries', 'gel_helpers', 'source.rb').write(
+            "needs 'Standard Libs/Debug'\nmodule GelHelpers; VERSION = 2; end")
+        root.join('cloning', 'operation_types', 'order_primer', 'test.rb').write(
+            'edited')
+
+        assert names(find_affected(path=str(root), changed=True)) == [
+            'order_primer', 'run_gel']
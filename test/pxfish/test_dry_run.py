@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+from dry_run import UNCHANGED, diff_code, diff_field_types, diff_item
+
+
+def aquarium_field_type(name, role, **values):
+    attributes = dict(
+        name=name, role=role, part=None, array=None, routing=None,
+        ftype='sample', choices=None, required=None,
+        parent_class='OperationType', allowable_field_types=[])
+    attributes.update(values)
+    return SimpleNamespace(**attributes)
+
+
+def local_field_type(name, **values):
+    definition = dict(
+        name=name, part=None, array=None, routing=None, ftype='sample',
+        choices=None, required=None, allowable_field_types=[])
+    definition.update(values)
+    return definition
+
+
+class TestDryRun:
+
+    def test_diff_code(self):
+        lines = diff_code(
+            key='cloning/operation_types/run_gel',
+            file_name='protocol.rb',
+            remote='class Protocol\nend',
+            local='class Protocol\n  def main; end\nend\n'
+        )
+        assert lines[0] == '--- aquarium/cloning/operation_types/run_gel/protocol.rb\n'
+        assert lines[1] == '+++ local/cloning/operation_types/run_gel/protocol.rb\n'
+        assert '+  def main; end\n' in lines
+        assert '\\ No newline at end of file\n' in lines
+        assert all(line.endswith('\n') for line in lines)
+
+    def test_unchanged_code(self):
+        assert diff_code(
+            key='cloning/libraries/helpers', file_name='source.rb',
+            remote='module Helpers; end\n', local='module Helpers; end\n') == []
+
+    def test_diff_field_types(self):
+        lines, blocking = diff_field_types(
+            aquarium_field_types=[
+                aquarium_field_type('Fragment', 'input'),
+                aquarium_field_type('Ladder', 'input'),
+                aquarium_field_type('Gel', 'output'),
+            ],
+            definitions={
+                'inputs': [
+                    local_field_type('Fragment', array=True),
+                    local_field_type('Dye'),
+                ],
+                'outputs': [local_field_type('Gel')],
+            }
+        )
+        assert lines == [
+            'input "Ladder": only in Aquarium',
+            'input "Fragment": field "array": aquarium value None, local value True',
+            'input "Dye": only in local definition',
+        ]
+        assert blocking
+
+    def test_new_field_types_do_not_block(self):
+        lines, blocking = diff_field_types(
+            aquarium_field_types=[],
+            definitions={'inputs': [local_field_type('Dye')], 'outputs': []}
+        )
+        assert lines == ['input "Dye": only in local definition']
+        assert not blocking
+
+    def test_definition_without_field_types_is_not_compared(self, tmpdir):
+        path = tmpdir.mkdir('cloning').mkdir('operation_types').mkdir('run_gel')
+        path.join('protocol.rb').write('class Protocol; end\n')
+        model = SimpleNamespace(
+            protocol=SimpleNamespace(content='class Protocol; end\n'),
+            field_types=[aquarium_field_type('Fragment', 'input')],
+            is_deserialized=lambda name: True)
+
+        result = diff_item(
+            path=str(path),
+            definitions={
+                'parent_class': 'OperationType', 'inputs': [], 'outputs': []},
+            model=model,
+            component_names=['protocol']
+        )
+
+        assert result.status == UNCHANGED
@@ -0,0 +1,43 @@
+from pydent import AqSession
+import pytest
+import instance
+from fake_aquarium import FakeAquarium, generate_dataset, running
+from session import CachedSession
+
+
+@pytest.fixture
+def aquarium():
+    return generate_dataset(
+        FakeAquarium(), categories=2, operation_types=4, libraries=2)
+
+
+class TestFakeAquarium:
+
+    def test_where(self, aquarium):
+        codes = aquarium.where('Code', {
+            'parent_class': 'OperationType', 'name': ['protocol', 'test'],
+            'child_id': None})
+        assert len(codes) == 8
+        assert aquarium.where('OperationType', {}, limit=1, reverse=True)[0][
+            'name'] == 'Operation Type 4'
+
+    def test_code_versions(self, aquarium):
+        library = aquarium.where('Library', {'name': 'Library 1'})[0]
+        first = aquarium.where('Code', {'parent_id': library['id'],
+                                        'parent_class': 'Library'})[0]
+        code = aquarium.add_code(
+            parent_class='Library', parent_id=library['id'], name='source',
+            content='module Library1; end')
+        assert first['child_id'] == code['id']
+
+    def test_pull(self, aquarium, tmpdir):
+        with running(aquarium) as url:
+            session = CachedSession(
+                AqSession(aquarium.login, aquarium.password, url))
+            instance.pull(session=session, path=str(tmpdir))
+
+        protocol = tmpdir.join(
+            'category_1', 'operation_types', 'operation_type_1', 'protocol.rb')
+        assert protocol.read().startswith("needs 'Category 1/Library 1'")
+        assert tmpdir.join('sample_types', 'sample_type_1.json').exists()
+        assert aquarium.stats()['by_kind']['login'] == 1
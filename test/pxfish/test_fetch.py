@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+import pydent
+import pytest
+from fetch import CONFLICT, DELETED, NEW, STALE, compare, is_behind
+from manifest import Manifest
+
+
+def operation_type(id, name):
+    op_type = pydent.models.OperationType()
+    op_type.id = id
+    op_type.name = name
+    op_type.category = 'Cloning'
+    op_type.updated_at = '2021-07-27'
+    return op_type
+
+
+class MockCodeInterface:
+    def __init__(self, codes):
+        self.codes = codes
+        self.queries = []
+
+    def where(self, query):
+        self.queries.append(query)
+        return [code for code in self.codes
+                if code.parent_class == query['parent_class']
+                and code.parent_id in query['parent_id']]
+
+
+class MockSession:
+    def __init__(self, codes):
+        self.Code = MockCodeInterface(codes)
+
+
+def code(id, parent_id):
+    return pydent.models.Code(
+        id=id, parent_id=parent_id, parent_class='OperationType',
+        name='protocol', content='')
+
+
+@pytest.fixture
+def sync_manifest(tmpdir):
+    manifest = Manifest(str(tmpdir))
+    pulled = [(7, 'run_gel', 2), (8, 'order_primer', 3), (9, 'make_media', 5)]
+    for id, name, code_id in pulled:
+        path = tmpdir.ensure_dir('cloning', 'operation_types', name)
+        path.join('protocol.rb').write('protocol')
+        manifest.record(
+            str(path), parent_class='OperationType',
+            model=operation_type(id, name),
+            codes={'protocol': SimpleNamespace(id=code_id)})
+
+    path = tmpdir.ensure_dir('cloning', 'libraries', 'old_helpers')
+    path.join('source.rb').write('source')
+    manifest.record(
+        str(path), parent_class='Library',
+        model=SimpleNamespace(
+            id=1, name='Old Helpers', category='Cloning', updated_at=None),
+        codes={'source': SimpleNamespace(id=1)})
+    return manifest
+
+
+class TestFetch:
+
+    def test_compare(self, tmpdir, sync_manifest):
+        tmpdir.join('cloning', 'operation_types', 'make_media', 'protocol.rb').write(
+            'edited')
+        session = MockSession([code(2, 7), code(4, 8), code(6, 9)])
+
+        changes = compare(
+            session=session,
+            sync_manifest=sync_manifest,
+            operation_types=[
+                operation_type(7, 'Run Gel'),
+                operation_type(8, 'Order Primer'),
+                operation_type(9, 'Make Media'),
+                operation_type(10, 'New One'),
+            ],
+            libraries=[],
+            category='Cloning'
+        )
+
+        assert changes == [
+            (DELETED, 'cloning/libraries/old_helpers'),
+            (CONFLICT, 'cloning/operation_types/make_media'),
+            (NEW, 'cloning/operation_types/new_one'),
+            (STALE, 'cloning/operation_types/order_primer'),
+        ]
+        assert len(session.Code.queries) == 1
+        assert is_behind(changes)
+
+    def test_other_category_not_deleted(self, sync_manifest):
+        changes = compare(
+            session=MockSession([]),
+            sync_manifest=sync_manifest,
+            operation_types=[],
+            libraries=[],
+            category='Media'
+        )
+        assert changes == []
+        assert not is_behind(changes)
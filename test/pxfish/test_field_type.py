@@ -0,0 +1,70 @@
+import pydent
+import pytest
+from field_type import build_field_type_list
+
+
+class MockInterface:
+    def __init__(self, model):
+        self.model = model
+
+    def new(self, **kwargs):
+        return self.model(**kwargs)
+
+    def where(self, query):
+        raise AssertionError('unexpected query {}'.format(query))
+
+
+class MockSession:
+    def __init__(self):
+        self.FieldType = MockInterface(pydent.models.FieldType)
+        self.SampleType = MockInterface(pydent.models.SampleType)
+        self.ObjectType = MockInterface(pydent.models.ObjectType)
+
+
+@pytest.fixture
+def aquarium_field_types():
+    field_type = pydent.models.FieldType(
+        name='Primer', role='input', ftype='sample',
+        parent_class='OperationType')
+    aft = pydent.models.AllowableFieldType()
+    aft.sample_type = pydent.models.SampleType(name='Primer')
+    aft.object_type = pydent.models.ObjectType(name='Primer Aliquot')
+    field_type.allowable_field_types = [aft]
+    return [field_type]
+
+
+def definition(name, *afts):
+    return {
+        'name': name,
+        'ftype': 'sample',
+        'allowable_field_types': [
+            {'sample_type': sample, 'object_type': container}
+            for sample, container in afts
+        ]
+    }
+
+
+class TestFieldType:
+
+    def test_build_uses_given_field_types(self, aquarium_field_types):
+        definitions = {
+            'inputs': [definition(
+                'Primer',
+                ('Primer', 'Primer Aliquot'),
+                ('Primer', 'Primer Stock'))],
+            'outputs': [definition('Primer', ('Primer', 'Primer Stock'))]
+        }
+        field_types = build_field_type_list(
+            operation_type=pydent.models.OperationType(),
+            definitions=definitions,
+            session=MockSession(),
+            aquarium_field_types=aquarium_field_types
+        )
+
+        existing, created = field_types
+        assert existing is aquarium_field_types[0]
+        assert len(existing.allowable_field_types) == 2
+
+        assert created is not existing
+        assert created.role == 'output'
+        assert len(created.allowable_field_types) == 1
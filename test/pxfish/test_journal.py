@@ -0,0 +1,97 @@
+import os
+import pytest
+from journal import JOURNAL_FILE, Journal
+
+
+@pytest.fixture
+def item_path(tmpdir):
+    return str(tmpdir.ensure_dir('cloning', 'operation_types', 'run_gel'))
+
+
+class TestJournal:
+
+    def test_records_progress(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path, files=['protocol.rb', 'definition.json'])
+        assert not journal.is_completed(item_path)
+
+        journal.complete(item_path)
+
+        assert journal.is_completed(item_path)
+        saved = Journal.load(str(tmpdir))
+        assert saved.action == 'pull'
+        assert saved.completed() == ['cloning/operation_types/run_gel']
+
+    def test_partial_items(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path, files=['protocol.rb', 'definition.json'])
+        # files left unchanged by the interrupted pull are still reported
+        with open(os.path.join(item_path, 'protocol.rb'), 'w') as file:
+            file.write('protocol')
+
+        assert Journal.load(str(tmpdir)).partial() == {
+            'cloning/operation_types/run_gel': [
+                'protocol.rb', 'definition.json']
+        }
+
+    def test_appends_records(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='push')
+        for name in ['run_gel', 'order_primer', 'pour_gel']:
+            path = str(tmpdir.ensure_dir('cloning', 'operation_types', name))
+            journal.begin(path)
+            journal.complete(path)
+
+        assert len(tmpdir.join(JOURNAL_FILE).readlines()) == 7
+
+    def test_interrupted_line(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path, files=['definition.json'])
+        with open(str(tmpdir.join(JOURNAL_FILE)), 'a') as file:
+            file.write('{"key": "cloning/operation_types/run_gel", "st')
+
+        loaded = Journal.load(str(tmpdir))
+        assert not loaded.is_completed(item_path)
+        assert loaded.partial() == {
+            'cloning/operation_types/run_gel': ['definition.json']}
+
+    def test_resume(self, tmpdir, item_path, caplog):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path, files=['definition.json'])
+        journal.complete(item_path)
+        other_path = str(tmpdir.ensure_dir('cloning', 'libraries', 'helpers'))
+        journal.begin(other_path, files=['source.rb', 'definition.json'])
+
+        resumed = Journal.open(str(tmpdir), action='pull', resume=True)
+
+        assert resumed.is_completed(item_path)
+        assert not resumed.is_completed(other_path)
+        assert 'cloning/libraries/helpers; source.rb, definition.json' in (
+            caplog.text)
+
+    def test_fresh_start_without_resume(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path)
+        journal.complete(item_path)
+
+        assert not Journal.open(str(tmpdir), action='pull').is_completed(
+            item_path)
+
+    def test_resume_other_action(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='pull')
+        journal.begin(item_path)
+        journal.complete(item_path)
+
+        resumed = Journal.open(str(tmpdir), action='push', resume=True)
+
+        assert resumed.action == 'push'
+        assert not resumed.is_completed(item_path)
+
+    def test_finish(self, tmpdir, item_path):
+        journal = Journal.open(str(tmpdir), action='push')
+        journal.begin(item_path)
+
+        journal.finish(failed=True)
+        assert tmpdir.join(JOURNAL_FILE).exists()
+
+        journal.finish(failed=False)
+        assert not tmpdir.join(JOURNAL_FILE).exists()
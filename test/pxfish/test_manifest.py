@@ -0,0 +1,74 @@
+import os
+from types import SimpleNamespace
+import pytest
+from manifest import (
+    MANIFEST_FILE,
+    Manifest,
+    hash_files
+)
+
+
+@pytest.fixture
+def item_path(tmpdir):
+    path = tmpdir.mkdir('cat').mkdir('operation_types').mkdir('my_type')
+    path.join('protocol.rb').write('protocol content')
+    path.join('definition.json').write('{}')
+    path.join('test_results.json').write('{}')
+    return str(path)
+
+
+def model():
+    return SimpleNamespace(
+        id=4, name='My Type', category='Cat', updated_at='2021-07-27')
+
+
+def codes(protocol_id=10):
+    return {'protocol': SimpleNamespace(id=protocol_id), 'test': None}
+
+
+class TestManifest:
+
+    def test_hash_files_ignores_test_results(self, item_path):
+        assert set(hash_files(item_path)) == {'protocol.rb', 'definition.json'}
+
+    def test_record_save_load(self, tmpdir, item_path):
+        manifest = Manifest(str(tmpdir))
+        manifest.record(
+            item_path, parent_class='OperationType',
+            model=model(), codes=codes())
+        manifest.save()
+        assert os.path.exists(os.path.join(str(tmpdir), MANIFEST_FILE))
+
+        entry = Manifest.load(str(tmpdir)).items['cat/operation_types/my_type']
+        assert entry['id'] == 4
+        assert entry['codes'] == {'protocol': 10, 'test': None}
+
+    def test_record_keeps_unloaded_codes(self, tmpdir, item_path):
+        manifest = Manifest(str(tmpdir))
+        manifest.record(
+            item_path, parent_class='OperationType',
+            model=model(), codes=codes())
+        manifest.record(
+            item_path, parent_class='OperationType',
+            model=model(), codes={'protocol': None, 'test': SimpleNamespace(id=12)})
+
+        entry = manifest.items['cat/operation_types/my_type']
+        assert entry['codes'] == {'protocol': 10, 'test': 12}
+
+    def test_is_current(self, tmpdir, item_path):
+        manifest = Manifest(str(tmpdir))
+        assert not manifest.is_current(item_path, model=model(), codes=codes())
+
+        manifest.record(
+            item_path, parent_class='OperationType',
+            model=model(), codes=codes())
+        assert manifest.is_current(item_path, model=model(), codes=codes())
+
+        # a new code version on the server
+        assert not manifest.is_current(
+            item_path, model=model(), codes=codes(protocol_id=11))
+
+        # a local edit
+        with open(os.path.join(item_path, 'protocol.rb'), 'w') as file:
+            file.write('edited')
+        assert not manifest.is_current(item_path, model=model(), codes=codes())
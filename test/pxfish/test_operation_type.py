@@ -0,0 +1,31 @@
+import pydent
+from operation_type import get_associated_types
+from type_registry import TypeRegistry
+
+
+class TestOperationType:
+
+    def test_associated_types_written_once(self, tmpdir, mocker):
+        sample_type = pydent.models.SampleType(name='Primer', description='')
+        sample_type.id = 7
+        sample_type.field_types = []
+
+        class MockOperationType:
+            @staticmethod
+            def sample_type():
+                return [sample_type, sample_type, None]
+
+            @staticmethod
+            def object_type():
+                return []
+
+        write = mocker.patch('sample_type.write_files')
+        registry = TypeRegistry()
+        for _ in range(3):
+            get_associated_types(
+                path=str(tmpdir),
+                operation_type=MockOperationType,
+                registry=registry
+            )
+
+        assert write.call_count == 1
@@ -0,0 +1,79 @@
+import pydent
+from prefetch import (
+    batches,
+    load_codes,
+    paginate
+)
+
+
+class MockModelInterface:
+    def __init__(self, count):
+        self.models = list(range(count))
+        self.requests = []
+
+    def all(self, opts):
+        self.requests.append(opts)
+        return self.models[opts['offset']:opts['offset'] + opts['limit']]
+
+
+class TestPrefetch:
+
+    def test_batches(self):
+        assert list(batches(range(5), size=2)) == [[0, 1], [2, 3], [4]]
+        assert list(batches([], size=2)) == []
+
+    def test_paginate(self):
+        interface = MockModelInterface(7)
+        assert list(paginate(interface, page_size=3)) == list(range(7))
+        assert [opts['offset'] for opts in interface.requests] == [0, 3, 6]
+
+        interface = MockModelInterface(6)
+        assert list(paginate(interface, page_size=3)) == list(range(6))
+        assert len(interface.requests) == 3
+
+    def test_batches_retrieve_pages_as_needed(self):
+        interface = MockModelInterface(10)
+        pages = batches(paginate(interface, page_size=4), size=4)
+
+        assert next(pages) == [0, 1, 2, 3]
+        assert len(interface.requests) == 1
+        assert next(pages) == [4, 5, 6, 7]
+        assert len(interface.requests) == 2
+        assert list(pages) == [[8, 9]]
+
+    def test_load_codes_uses_one_query(self):
+        class MockCodeInterface:
+            def __init__(self):
+                self.queries = []
+
+            def where(self, query):
+                self.queries.append(query)
+                return [
+                    pydent.models.Code(
+                        id=1, parent_id=7, name='protocol', content='old'),
+                    pydent.models.Code(
+                        id=2, parent_id=7, name='protocol', content='new'),
+                    pydent.models.Code(
+                        id=3, parent_id=8, name='protocol', content='other'),
+                ]
+
+        class MockSession:
+            def __init__(self):
+                self.Code = MockCodeInterface()
+
+        session = MockSession()
+        op_types = [pydent.models.OperationType(), pydent.models.OperationType()]
+        op_types[0].id = 7
+        op_types[1].id = 8
+
+        load_codes(
+            session=session,
+            parents=op_types,
+            parent_class='OperationType',
+            component_names=['protocol']
+        )
+
+        assert len(session.Code.queries) == 1
+        assert session.Code.queries[0]['parent_id'] == [7, 8]
+        assert op_types[0].protocol.content == 'new'
+        assert op_types[1].protocol.content == 'other'
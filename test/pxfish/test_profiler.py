@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+import pytest
+import profiler
+
+
+@pytest.fixture
+def profiling():
+    profiler.start(['push', '-a'])
+    yield
+    profiler.stop()
+
+
+@profiler.profiled('update', item='parent')
+def update(session, parent):
+    with profiler.request('post', 'json', {'model': 'Code', 'method': 'where'}):
+        pass
+    with profiler.request('post', 'operation_types/12/code'):
+        pass
+    return parent.name
+
+
+class TestProfiler:
+
+    def test_endpoint_name(self):
+        assert profiler.endpoint_name('get', 'test/run/42') == \
+            'GET test/run/{id}'
+        assert profiler.endpoint_name('put', 'operation_types/7.json') == \
+            'PUT operation_types/{id}.json'
+        assert profiler.endpoint_name(
+            'post', 'json', {'model': 'OperationType', 'id': 3}) == \
+            'POST json OperationType.find'
+
+    def test_not_profiling(self):
+        assert not profiler.is_profiling()
+        assert update(None, SimpleNamespace(name='Make PCR')) == 'Make PCR'
+        assert profiler.stop() is None
+
+    def test_report(self, profiling):
+        update(None, SimpleNamespace(name='Make PCR'))
+        update(None, parent=SimpleNamespace(name='Run Gel'))
+        with profiler.request('post', 'sessions.json'):
+            pass
+        with pytest.raises(ValueError):
+            with profiler.request('get', 'test/run/3'):
+                raise ValueError('timeout')
+
+        report = profiler.stop().report()
+        assert report['command'] == ['push', '-a']
+        assert report['requests'] == 6
+        assert report['requests_outside_phases'] == 2
+        assert report['phases']['update']['count'] == 2
+        assert report['phases']['update']['requests'] == 4
+        assert report['endpoints']['POST json Code.where']['count'] == 2
+        assert report['endpoints']['POST operation_types/{id}/code'][
+            'count'] == 2
+        assert report['endpoints']['GET test/run/{id}']['errors'] == 1
+        assert sorted(item['item'] for item in report['slowest_items']) == [
+            'Make PCR', 'Run Gel']
@@ -0,0 +1,130 @@
+"""
+Bounds on the number of requests made by pull and push, measured against
+the fake Aquarium, so that queries made for each field type or code
+component of an item fail these tests.
+"""
+
+from contextlib import ExitStack
+from pydent import AqSession
+import pytest
+import category
+import instance
+import operation_type
+import prefetch
+from bench import edit_protocols
+from fake_aquarium import FakeAquarium, generate_dataset, running
+from session import CachedSession
+
+# requests for a pull of a whole instance of fewer than 100 of each kind
+PULL_REQUESTS = 9
+
+# requests to load and write one operation type
+WRITE_OPERATION_TYPE_REQUESTS = 6
+
+# requests to push one operation type with changed field types and code
+PUSH_OPERATION_TYPE_REQUESTS = 14
+
+# requests for a category push: fixed, including the lookup of each sample
+# and object type, and for each library and operation type
+PUSH_CATEGORY_REQUESTS = 5
+PUSH_CATEGORY_REQUESTS_PER_LIBRARY = 2
+PUSH_CATEGORY_REQUESTS_PER_OPERATION_TYPE = 9
+
+# libraries and sample types of each generated instance
+LIBRARIES = 2
+SAMPLE_TYPES = 2
+
+
+@pytest.fixture
+def fake_instance():
+    """
+    Yields a function that generates a fake Aquarium instance, and returns
+    it with a session connected to it.
+    """
+    with ExitStack() as servers:
+        def create(**size):
+            aquarium = generate_dataset(
+                FakeAquarium(), categories=1, libraries=LIBRARIES,
+                sample_types=SAMPLE_TYPES, **size)
+            url = servers.enter_context(running(aquarium))
+            session = CachedSession(
+                AqSession(aquarium.login, aquarium.password, url))
+            return aquarium, session
+
+        yield create
+
+
+def count_requests(aquarium, action):
+    """Returns the number of requests made to the fake by the action."""
+    aquarium.reset_stats()
+    action()
+    return aquarium.stats()['requests']
+
+
+class TestRequestCounts:
+
+    @pytest.mark.parametrize('operation_types,field_types', [
+        (4, 2), (40, 2), (40, 8)])
+    def test_pull(self, fake_instance, tmpdir, operation_types, field_types):
+        aquarium, session = fake_instance(
+            operation_types=operation_types, field_types=field_types)
+
+        requests = count_requests(aquarium, lambda: instance.pull(
+            session=session, path=str(tmpdir)))
+
+        assert requests <= PULL_REQUESTS
+
+    @pytest.mark.parametrize('field_types', [1, 4, 8])
+    def test_write_operation_type(self, fake_instance, tmpdir, field_types):
+        aquarium, session = fake_instance(
+            operation_types=2, field_types=field_types)
+        operation_types = session.OperationType.where(
+            {'name': 'Operation Type 1'})
+
+        def write():
+            prefetch.load_operation_types(
+                session=session,
+                operation_types=operation_types,
+                component_names=operation_type.all_component_names())
+            operation_type.write_files(
+                session=session, path=str(tmpdir),
+                operation_type=operation_types[0])
+
+        assert count_requests(aquarium, write) <= \
+            WRITE_OPERATION_TYPE_REQUESTS
+
+    @pytest.mark.parametrize('field_types', [1, 4, 8])
+    def test_push_operation_type(self, fake_instance, tmpdir, field_types):
+        aquarium, session = fake_instance(
+            operation_types=2, field_types=field_types)
+        operation_type.pull(
+            session=session, path=str(tmpdir),
+            category='Category 1', name='Operation Type 1')
+        path = str(tmpdir.join(
+            'category_1', 'operation_types', 'operation_type_1'))
+        edit_protocols(path)
+
+        requests = count_requests(aquarium, lambda: operation_type.push(
+            session=session, path=path))
+
+        assert aquarium.stats()['by_kind']['update code'] == 1
+        assert requests <= PUSH_OPERATION_TYPE_REQUESTS
+
+    @pytest.mark.parametrize('operation_types,field_types', [
+        (2, 2), (8, 2), (16, 2), (8, 6)])
+    def test_push_category(self, fake_instance, tmpdir, operation_types,
+                           field_types):
+        aquarium, session = fake_instance(
+            operation_types=operation_types, field_types=field_types)
+        instance.pull(session=session, path=str(tmpdir))
+        path = str(tmpdir.join('category_1'))
+        edit_protocols(path)
+
+        requests = count_requests(aquarium, lambda: category.push(
+            session=session, path=path))
+
+        assert aquarium.stats()['by_kind']['update code'] == operation_types
+        assert requests <= (
+            PUSH_CATEGORY_REQUESTS
+            + PUSH_CATEGORY_REQUESTS_PER_LIBRARY * LIBRARIES
+            + PUSH_CATEGORY_REQUESTS_PER_OPERATION_TYPE * operation_types)
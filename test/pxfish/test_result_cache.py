@@ -0,0 +1,84 @@
+import json
+from types import SimpleNamespace
+import pytest
+import operation_type
+from dependencies import parse_needs
+from result_cache import CACHE_FILE, ResultCache, test_key as input_key
+
+URL = 'http://localhost/'
+
+
+@pytest.fixture
+def root(tmpdir):
+    path = tmpdir.ensure_dir('cloning', 'operation_types', 'run_gel')
+    path.join('protocol.rb').write("needs 'Cloning/Gel Helpers'\n")
+    path.join('test.rb').write('test')
+    path.join('definition.json').write(json.dumps({
+        'name': 'Run Gel', 'category': 'Cloning',
+        'parent_class': 'OperationType'}))
+    helpers = tmpdir.ensure_dir('cloning', 'libraries', 'gel_helpers')
+    helpers.join('source.rb').write('needs "Standard Libs/Debug"\n')
+    debug = tmpdir.ensure_dir('standard_libs', 'libraries', 'debug')
+    debug.join('source.rb').write('module Debug; end')
+    return tmpdir
+
+
+def item_path(root):
+    return str(root.join('cloning', 'operation_types', 'run_gel'))
+
+
+def session():
+    return SimpleNamespace(_aqhttp=SimpleNamespace(url=URL))
+
+
+class TestResultCache:
+
+    def test_parse_needs(self):
+        source = "needs 'Cloning/Gel Helpers'\n  needs(\"Standard Libs/Debug\")\n# needs nothing"
+        assert parse_needs(source) == ['Cloning/Gel Helpers', 'Standard Libs/Debug']
+
+    def test_key_changes_with_inputs(self, root):
+        key = input_key(root=str(root), path=item_path(root), url=URL)
+        assert key == input_key(root=str(root), path=item_path(root), url=URL)
+        assert key != input_key(
+            root=str(root), path=item_path(root), url='http://other/')
+
+        root.join('standard_libs', 'libraries', 'debug', 'source.rb').write(
+            'module Debug; def self.log; end; end')
+        assert key != input_key(root=str(root), path=item_path(root), url=URL)
+
+    def test_no_key_without_library(self, root):
+        root.join('standard_libs').remove()
+        assert input_key(root=str(root), path=item_path(root), url=URL) is None
+
+    def test_run_test_uses_cache(self, root, mocker):
+        send_test = mocker.patch(
+            'operation_type.send_test', return_value={'result': 'passed'})
+
+        def run_test(**kwargs):
+            return operation_type.run_test(
+                session=session(), path=item_path(root),
+                category='Cloning', name='Run Gel', **kwargs)
+
+        assert run_test() == {'result': 'passed'}
+        assert run_test() == {'result': 'passed'}
+        assert send_test.call_count == 1
+        assert root.join(CACHE_FILE).exists()
+
+        run_test(use_cache=False)
+        assert send_test.call_count == 2
+
+        root.join('cloning', 'operation_types', 'run_gel', 'test.rb').write(
+            'changed test')
+        run_test()
+        assert send_test.call_count == 3
+
+    def test_server_errors_not_cached(self, root):
+        cache = ResultCache(str(root))
+        cache.record(item_path(root), 'key', {
+            'result': 'error', 'error_type': 'error', 'message': 'timeout'})
+        assert cache.lookup(item_path(root), 'key') is None
+
+        failure = {'result': 'error', 'error_type': 'assertion_failure'}
+        cache.record(item_path(root), 'key', failure)
+        assert cache.lookup(item_path(root), 'key') == failure
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from pydent.exceptions import TridentRequestError
+from session import (
+    SESSION_LIFETIME,
+    CachedLoginHTTP,
+    CachedSession,
+    read_session_cookies,
+    session_cache_path,
+    write_session_cookies
+)
+
+
+class MockInterface:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+        self.delay = 0
+
+    def where(self, query):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        return [record for record in self.records
+                if all(getattr(record, key) == value
+                       for key, value in query.items())]
+
+
+class MockSession:
+    login = 'neptune'
+
+    def __init__(self):
+        self.SampleType = MockInterface(
+            [SimpleNamespace(id=3, name='Primer')])
+        self.User = MockInterface(
+            [SimpleNamespace(id=1, login='neptune')])
+
+
+class TestCachedSession:
+
+    def test_find_by_name_queries_once(self):
+        session = CachedSession(MockSession())
+        for _ in range(3):
+            assert session.find_by_name('SampleType', 'Primer').id == 3
+            assert session.find_by_name('SampleType', 'Plasmid') is None
+        assert len(session.SampleType.queries) == 2
+
+    def test_invalidate(self):
+        session = CachedSession(MockSession())
+        assert session.find_by_name('SampleType', 'Plasmid') is None
+        session.SampleType.records.append(SimpleNamespace(id=4, name='Plasmid'))
+        assert session.find_by_name('SampleType', 'Plasmid') is None
+        session.invalidate('SampleType', 'Plasmid')
+        assert session.find_by_name('SampleType', 'Plasmid').id == 4
+
+    def test_user_id(self):
+        session = CachedSession(MockSession())
+        assert session.user_id() == 1
+        assert session.user_id() == 1
+        assert len(session.User.queries) == 1
+        assert session.login == 'neptune'
+
+    def test_concurrent_lookups_query_once(self):
+        session = CachedSession(MockSession())
+        session.SampleType.delay = 0.05
+        session.User.delay = 0.05
+        found = []
+
+        def look_up():
+            found.append((session.find_by_name('SampleType', 'Primer').id,
+                          session.user_id()))
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert found == [(3, 1)] * 8
+        assert len(session.SampleType.queries) == 1
+        assert len(session.User.queries) == 1
+
+    def test_failed_lookup_is_retried(self):
+        session = CachedSession(MockSession())
+        session.SampleType.records = None
+        with pytest.raises(TypeError):
+            session.find_by_name('SampleType', 'Primer')
+        session.SampleType.records = [SimpleNamespace(id=3, name='Primer')]
+        assert session.find_by_name('SampleType', 'Primer').id == 3
+
+
+class TestSessionCache:
+
+    def test_saved_cookies_are_read(self, tmpdir):
+        cache_path = session_cache_path(str(tmpdir), 'local')
+        write_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost', cookies={'remember_token': 'x'})
+        assert os.stat(cache_path).st_mode & 0o077 == 0
+        assert read_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost') == {'remember_token': 'x'}
+
+    def test_saved_cookies_for_other_instance_are_ignored(self, tmpdir):
+        cache_path = session_cache_path(str(tmpdir), 'local')
+        write_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost', cookies={'remember_token': 'x'})
+        assert read_session_cookies(
+            cache_path=cache_path, login='mars',
+            aquarium_url='http://localhost') is None
+        assert read_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://example.com') is None
+
+    def test_expired_cookies_are_ignored(self, tmpdir, mocker):
+        cache_path = session_cache_path(str(tmpdir), 'local')
+        write_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost', cookies={'remember_token': 'x'})
+        mocker.patch('session.time.time',
+                     return_value=time.time() + SESSION_LIFETIME + 1)
+        assert read_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost') is None
+
+    def test_saved_login_skips_login(self, tmpdir, mocker):
+        cache_path = session_cache_path(str(tmpdir), 'local')
+        write_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost', cookies={'remember_token': 'x'})
+        login = mocker.patch('session.AqHTTP._login')
+        http = CachedLoginHTTP(
+            login='neptune', password='aquarium',
+            aquarium_url='http://localhost', cache_path=cache_path)
+        login.assert_not_called()
+        assert http.cookies == {'remember_token': 'x'}
+
+    def test_rejected_login_logs_in_again(self, tmpdir, mocker):
+        cache_path = session_cache_path(str(tmpdir), 'local')
+        write_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost', cookies={'remember_token': 'old'})
+        http = CachedLoginHTTP(
+            login='neptune', password='aquarium',
+            aquarium_url='http://localhost', cache_path=cache_path)
+
+        def login(self, login, password):
+            self.cookies = {'remember_token': 'new'}
+        mocker.patch('session.AqHTTP._login', login)
+
+        rejected = SimpleNamespace(
+            status_code=200, url='http://localhost/signin')
+
+        def request(self, method, path, **kwargs):
+            if self.cookies['remember_token'] == 'old':
+                raise TridentRequestError('signin', rejected)
+            return {'ok': True}
+        mocker.patch('session.AqHTTP.request', request)
+
+        assert http.request('get', 'json') == {'ok': True}
+        assert read_session_cookies(
+            cache_path=cache_path, login='neptune',
+            aquarium_url='http://localhost') == {'remember_token': 'new'}
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import pytest
+
+PYFISH_DIR = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, 'pxfish')
+PYFISH = os.path.join(PYFISH_DIR, 'pyfish.py')
+
+# modules pfish may import, beyond those of a bare interpreter, for commands
+# that do not connect to Aquarium; importing pydent adds several hundred
+EXTRA_IMPORTS = 100
+
+# runs a pfish command in process and prints whether pydent was imported
+IMPORTS_PYDENT = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+sys.argv = ['pyfish.py'] + sys.argv[2:]
+import pyfish
+try:
+    pyfish.main()
+except SystemExit:
+    pass
+print('pydent' in sys.modules)
+'''
+
+
+def run(args, *, config_dir):
+    environment = dict(
+        os.environ, SCRIPT_DIR=str(config_dir), PFISH_NO_DAEMON='1')
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=False
+    )
+
+
+def count_imports(process):
+    """Returns the number of modules listed by -X importtime."""
+    return sum(1 for line in process.stderr.splitlines()
+               if line.startswith('import time:') and '|' in line
+               and not line.rstrip().endswith('imported package'))
+
+
+class TestStartup:
+
+    @pytest.mark.parametrize('command', [
+        ['--help'],
+        ['configure', 'show'],
+        ['push', '--help'],
+        ['pull', '--bogus-flag']
+    ])
+    def test_no_pydent(self, tmpdir, command):
+        process = run([PYFISH] + command, config_dir=tmpdir)
+        assert 'pydent' not in process.stderr
+
+        process = run(
+            ['-c', IMPORTS_PYDENT, PYFISH_DIR] + command, config_dir=tmpdir)
+        assert process.stdout.splitlines()[-1] == 'False'
+
+    @pytest.mark.parametrize('command', [['--help'], ['configure', 'show']])
+    def test_imports_bounded(self, tmpdir, command):
+        interpreter = count_imports(run(['-c', 'pass'], config_dir=tmpdir))
+        pfish = count_imports(run([PYFISH] + command, config_dir=tmpdir))
+        assert pfish - interpreter < EXTRA_IMPORTS
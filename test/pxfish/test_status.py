@@ -0,0 +1,94 @@
+import os
+from types import SimpleNamespace
+import pytest
+from manifest import Manifest, find_root, record_push
+from status import DELETED, MODIFIED, NEW, compare, show
+
+
+def model(name):
+    return SimpleNamespace(
+        id=1, name=name, category='Cloning', updated_at='2021-07-27')
+
+
+@pytest.fixture
+def root(tmpdir):
+    category = tmpdir.mkdir('cloning')
+    for name in ['run_gel', 'order_primer']:
+        path = category.ensure_dir('operation_types', name)
+        path.join('protocol.rb').write('protocol for ' + name)
+        path.join('definition.json').write('{}')
+    library = category.ensure_dir('libraries', 'gel_helpers')
+    library.join('source.rb').write('module GelHelpers; end')
+    sample_types = tmpdir.mkdir('sample_types')
+    sample_types.join('primer.json').write('{"name": "Primer"}')
+
+    manifest = Manifest(str(tmpdir))
+    for path in category.join('operation_types').listdir():
+        manifest.record(
+            str(path), parent_class='OperationType',
+            model=model(path.basename), codes={})
+    manifest.record(
+        str(library), parent_class='Library',
+        model=model('Gel Helpers'), codes={})
+    manifest.record_type(
+        str(sample_types.join('primer.json')),
+        parent_class='SampleType', model=model('Primer'))
+    manifest.save()
+    return tmpdir
+
+
+class TestStatus:
+
+    def test_no_changes(self, root, capsys):
+        assert show(path=str(root)) == []
+        assert 'No changes' in capsys.readouterr().out
+
+    def test_changes(self, root, capsys):
+        root.join('cloning', 'operation_types', 'run_gel', 'protocol.rb').write(
+            'edited')
+        root.join('cloning', 'operation_types', 'run_gel', 'test_results.json').write(
+            '{}')
+        root.join('cloning', 'operation_types', 'order_primer').remove()
+        root.ensure_dir('cloning', 'libraries', 'new_helpers').join(
+            'source.rb').write('module NewHelpers; end')
+        root.join('sample_types', 'primer.json').write('{"name": "Primer!"}')
+
+        changes = show(path=str(root))
+
+        assert changes == [
+            (NEW, 'cloning/libraries/new_helpers'),
+            (DELETED, 'cloning/operation_types/order_primer'),
+            (MODIFIED, 'cloning/operation_types/run_gel'),
+            (MODIFIED, 'sample_types/primer.json'),
+        ]
+        lines = [line.split() for line in capsys.readouterr().out.splitlines()]
+        assert ['modified:', 'cloning/operation_types/run_gel'] in lines
+
+    def test_scoped_to_directory(self, root):
+        root.join('cloning', 'libraries', 'gel_helpers', 'source.rb').write('edited')
+        root.join('sample_types', 'primer.json').write('edited')
+
+        changes = compare(
+            sync_manifest=Manifest.load(str(root)),
+            path=os.path.join(str(root), 'cloning'))
+
+        assert changes == [(MODIFIED, 'cloning/libraries/gel_helpers')]
+
+    def test_find_root_from_item(self, root):
+        item = os.path.join(str(root), 'cloning', 'operation_types', 'run_gel')
+        assert find_root(item) == str(root)
+
+    def test_push_is_recorded(self, root):
+        item = root.join('cloning', 'operation_types', 'run_gel')
+        item.join('protocol.rb').write('edited')
+        record_push(
+            str(item), parent_class='OperationType', model=model('run_gel'),
+            codes={'protocol': SimpleNamespace(id=3), 'test': SimpleNamespace(id=4)})
+
+        manifest = Manifest.load(str(root))
+        assert compare(sync_manifest=manifest, path=str(root)) == []
+        entry = manifest.items['cloning/operation_types/run_gel']
+        assert entry['codes'] == {'protocol': 3, 'test': 4}
+
+    def test_no_manifest(self, tmpdir):
+        assert show(path=str(tmpdir)) is None
@@ -0,0 +1,88 @@
+import json
+import os
+import pytest
+from watch import ChangeCollector, group_changes, push_changes, push_files
+
+
+@pytest.fixture
+def root(tmpdir):
+    operation_type = tmpdir.ensure_dir('cloning', 'operation_types', 'run_gel')
+    operation_type.join('definition.json').write(json.dumps({
+        'name': 'Run Gel', 'category': 'Cloning',
+        'parent_class': 'OperationType', 'inputs': [], 'outputs': []}))
+    for name in ['protocol', 'test']:
+        operation_type.join(name + '.rb').write(name)
+    library = tmpdir.ensure_dir('cloning', 'libraries', 'gel_helpers')
+    library.join('definition.json').write(json.dumps({
+        'name': 'Gel Helpers', 'category': 'Cloning',
+        'parent_class': 'Library'}))
+    library.join('source.rb').write('module GelHelpers; end')
+    return tmpdir
+
+
+def touch(file, content):
+    file.write(content)
+    stat = os.stat(str(file))
+    os.utime(str(file), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestWatch:
+
+    def test_debounce(self, root):
+        collector = ChangeCollector(str(root), debounce=0.3)
+        protocol = root.join('cloning', 'operation_types', 'run_gel', 'protocol.rb')
+
+        assert collector.poll(10.0) == []
+        touch(protocol, 'edited')
+        assert collector.poll(10.1) == []
+        touch(protocol, 'edited again')
+        assert collector.poll(10.2) == []
+        assert collector.poll(10.4) == []
+        assert collector.poll(10.5) == [str(protocol)]
+        assert collector.poll(11.0) == []
+
+    def test_ignores_other_files(self, root):
+        collector = ChangeCollector(str(root), debounce=0)
+        root.join('cloning', 'operation_types', 'run_gel',
+                  'test_results.json').write('{}')
+        root.join('.pfish_manifest.json').write('{}')
+        root.ensure_dir('notes').join('scratch.rb').write('')
+
+        collector.poll(1.0)
+        changed = collector.poll(2.0)
+
+        assert changed == [str(root.join('notes', 'scratch.rb'))]
+        assert group_changes(changed) == {}
+
+    def test_push_changed_components(self, root, mocker):
+        push = mocker.patch('operation_type.push')
+        path = str(root.join('cloning', 'operation_types', 'run_gel'))
+
+        push_changes(session=None, item_path=path, file_names={'test.rb'})
+        push.assert_called_with(
+            session=None, path=path,
+            component_names=['test'], push_field_types=False)
+
+        push_changes(
+            session=None, item_path=path,
+            file_names={'definition.json', 'protocol.rb'})
+        push.assert_called_with(
+            session=None, path=path,
+            component_names=['protocol'], push_field_types=True)
+
+    def test_push_libraries_first(self, root, mocker):
+        pushed = []
+        mocker.patch(
+            'library.push',
+            side_effect=lambda *, session, path: pushed.append(path))
+        mocker.patch(
+            'operation_type.push',
+            side_effect=lambda *, session, path, **kwargs: pushed.append(path))
+
+        push_files(session=None, file_paths=[
+            str(root.join('cloning', 'operation_types', 'run_gel', 'protocol.rb')),
+            str(root.join('cloning', 'libraries', 'gel_helpers', 'source.rb')),
+        ])
+
+        assert [path.split(os.sep)[-1] for path in pushed] == [
+            'gel_helpers', 'run_gel']
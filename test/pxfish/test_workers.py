@@ -0,0 +1,80 @@
+import logging
+import time
+import pytest
+from workers import (
+    FAILED,
+    SKIPPED,
+    SUCCEEDED,
+    report,
+    run_jobs
+)
+
+
+class TestWorkers:
+
+    @pytest.mark.parametrize('jobs', [1, 4])
+    def test_results_in_order(self, jobs):
+        def double(item):
+            return item * 2
+
+        results = run_jobs(items=list(range(10)), function=double, jobs=jobs)
+        assert [result.name for result in results] == [str(i) for i in range(10)]
+        assert all(result.status == SUCCEEDED for result in results)
+
+    @pytest.mark.parametrize('jobs', [1, 4])
+    def test_failure_does_not_stop_other_jobs(self, jobs):
+        def check(item):
+            if item == 'bad':
+                logging.warning('about to fail on %s', item)
+                raise ValueError('bad item')
+            if item == 'skip':
+                return False
+            return True
+
+        results = run_jobs(
+            items=['good', 'bad', 'skip', 'also good'],
+            function=check,
+            jobs=jobs
+        )
+        statuses = {result.name: result.status for result in results}
+        assert statuses == {
+            'good': SUCCEEDED,
+            'bad': FAILED,
+            'skip': SKIPPED,
+            'also good': SUCCEEDED
+        }
+
+        failure = results[1]
+        assert isinstance(failure.error, ValueError)
+        assert any('about to fail on bad' in message
+                   for message in failure.messages)
+        assert not any('bad' in message for message in results[0].messages)
+
+    def test_failure_reported_once(self, caplog):
+        def fail(item):
+            raise ValueError('bad item')
+
+        results = run_jobs(items=['bad'], function=fail)
+        report(results, action='push')
+
+        assert caplog.text.count('bad failed: bad item') == 1
+
+    def test_interrupt_cancels_pending_jobs(self):
+        started = []
+
+        def slow(item):
+            started.append(item)
+            time.sleep(0.05)
+            return True
+
+        def interrupt(result):
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            run_jobs(items=list(range(200)), function=slow, jobs=4,
+                     on_result=interrupt)
+        count = len(started)
+        time.sleep(0.2)
+
+        assert count < 20
+        assert len(started) == count